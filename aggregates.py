@@ -0,0 +1,131 @@
+import datetime
+import json
+import os
+import numpy as np
+import pandas as pd
+from data_storage import load_table, resolve_table_path
+from instrumentation import track_stage
+
+# ملخصات صغيرة (JSON) تكتبها الـ pipelines بجانب مخرجاتها، حتى تقرأ لوحة التحكم عدداً من المجموعات
+# بدلاً من كل صفوف العملاء والتعليقات والأسعار. كل ملف يحتفظ بمؤشرات (KPIs) التشغيل السابق لحساب الفرق (delta)
+
+AGGREGATES_DIR = "data/aggregates"
+RISK_CATEGORY_ORDER = ['Low Risk (Stable)', 'Medium Risk (Monitor)', 'High Risk (Action Needed)']
+SENTIMENT_SCORE_BINS = np.linspace(-1.0, 1.0, 21)
+
+CHURN_PREDICTIONS_PATH = "data/predictions/churn_predictions.csv"
+SENTIMENT_RESULTS_PATH = "data/sentiment_results/sentiment_analysis_results.csv"
+PRICES_PATH = "data/pricing_results/optimal_prices.csv"
+
+
+def aggregate_path(name, aggregates_dir=AGGREGATES_DIR):
+    return os.path.join(aggregates_dir, f"{name}.json")
+
+
+def load_aggregates(name, aggregates_dir=AGGREGATES_DIR):
+    """Return the aggregates artifact ``name`` as a dict, or None if it doesn't exist or is unreadable."""
+    try:
+        with open(aggregate_path(name, aggregates_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_aggregates(name, aggregates, aggregates_dir=AGGREGATES_DIR):
+    """Write ``aggregates`` (which must hold a ``kpis`` dict) and keep the previous run's KPIs for deltas."""
+    previous = load_aggregates(name, aggregates_dir)
+    payload = {
+        **aggregates,
+        "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "previous_kpis": previous.get("kpis", {}) if previous else {},
+    }
+    os.makedirs(aggregates_dir, exist_ok=True)
+    path = aggregate_path(name, aggregates_dir)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def kpi_delta(aggregates, key):
+    """Change of a KPI since the previous pipeline run, or None when there is no previous value."""
+    previous = (aggregates or {}).get("previous_kpis", {}).get(key)
+    current = (aggregates or {}).get("kpis", {}).get(key)
+    if previous is None or current is None:
+        return None
+    return current - previous
+
+
+def _counts(series, order=None):
+    counts = series.value_counts()
+    if order is not None:
+        counts = counts.reindex(order, fill_value=0)
+    return {str(key): int(value) for key, value in counts.items()}
+
+
+def churn_aggregates(df):
+    total = len(df)
+    risk_counts = _counts(df['Risk_Category'].astype(str), RISK_CATEGORY_ORDER) if 'Risk_Category' in df.columns else {}
+    predicted_churn = int((df['Predicted_Churn'] == 1).sum()) if 'Predicted_Churn' in df.columns else 0
+    return {
+        "risk_category_counts": risk_counts,
+        "predicted_churn_counts": {"0": total - predicted_churn, "1": predicted_churn},
+        "kpis": {
+            "customers": total,
+            "predicted_churn_rate": predicted_churn / total if total else 0.0,
+            "high_risk_customers": risk_counts.get(RISK_CATEGORY_ORDER[-1], 0),
+            "mean_churn_probability": float(df['Churn_Probability'].mean()) if total and 'Churn_Probability' in df.columns else 0.0,
+        },
+    }
+
+
+def sentiment_aggregates(df):
+    total = len(df)
+    scores = pd.to_numeric(df['sentiment_score'], errors='coerce').dropna().to_numpy() if 'sentiment_score' in df.columns else np.array([])
+    histogram, edges = np.histogram(scores, bins=SENTIMENT_SCORE_BINS)
+    distribution = _counts(df['sentiment'].astype(str)) if 'sentiment' in df.columns else {}
+    return {
+        "sentiment_counts": distribution,
+        "score_histogram": {"edges": [round(float(edge), 4) for edge in edges], "counts": histogram.tolist()},
+        "kpis": {
+            "comments": total,
+            "positive_share": distribution.get("Positive", 0) / total if total else 0.0,
+            "mean_sentiment_score": float(scores.mean()) if len(scores) else 0.0,
+        },
+    }
+
+
+def pricing_aggregates(df):
+    by_category = df.groupby('car_category', observed=True, sort=False)['suggested_price'].mean()
+    by_day = df.groupby('day_of_week', observed=True, sort=False)['suggested_price'].mean()
+    return {
+        "mean_price_by_category": {str(key): round(float(value), 2) for key, value in by_category.items()},
+        "mean_price_by_day": {str(key): round(float(value), 2) for key, value in by_day.items()},
+        "kpis": {
+            "prices": len(df),
+            "mean_suggested_price": float(df['suggested_price'].mean()) if len(df) else 0.0,
+        },
+    }
+
+
+# الأعمدة التي يحتاجها كل ملخص فقط، حتى لا تُقرأ أعمدة الميزات الكاملة
+AGGREGATE_SOURCES = {
+    "churn": (CHURN_PREDICTIONS_PATH, ['Risk_Category', 'Predicted_Churn', 'Churn_Probability'], churn_aggregates),
+    "sentiment": (SENTIMENT_RESULTS_PATH, ['sentiment', 'sentiment_score'], sentiment_aggregates),
+    "pricing": (PRICES_PATH, ['car_category', 'day_of_week', 'suggested_price'], pricing_aggregates),
+}
+
+
+def refresh_aggregates(name):
+    """Recompute the aggregates artifact ``name`` from its pipeline output; returns the path or None."""
+    source_path, columns, summarize = AGGREGATE_SOURCES[name]
+    if resolve_table_path(source_path) is None:
+        print(f"⚠️ Cannot build '{name}' aggregates: {source_path} not found.")
+        return None
+    with track_stage("aggregates", name) as stage:
+        df = load_table(source_path, columns=columns)
+        stage.rows = len(df)
+        path = write_aggregates(name, summarize(df))
+    print(f"✅ '{name}' aggregates saved to: {path}")
+    return path
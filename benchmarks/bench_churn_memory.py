@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn import config_context
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from imblearn.over_sampling import SMOTE
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from churn_model_pipeline import (  # noqa: E402
+    RAW_DATA_PATH, SPARSE_WORKING_MEMORY_MB, build_sparse_training_matrix, clean_raw_churn_data,
+)
+
+# مقارنة ذروة استهلاك الذاكرة (peak RSS) بين مسار get_dummies الكثيف والمسار المتفرق (sparse)
+# كل مسار يعمل في عملية منفصلة لأن ru_maxrss لا ينخفض داخل نفس العملية
+# التشغيل من جذر المستودع: python benchmarks/bench_churn_memory.py --scale 50
+
+
+def peak_rss_mb():
+    # ru_maxrss بالكيلوبايت على لينكس
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_scaled_raw(scale):
+    df = pd.read_csv(RAW_DATA_PATH)
+    if scale > 1:
+        df = pd.concat([df] * scale, ignore_index=True)
+    return clean_raw_churn_data(df)
+
+
+def run_worker(path, scale, n_estimators):
+    df = load_scaled_raw(scale)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    if path == "sparse":
+        X, y, _, _ = build_sparse_training_matrix(df)
+    else:
+        df_processed = df.drop('customerID', axis=1)
+        categorical_cols = df_processed.select_dtypes(include=['object', 'string']).columns
+        df_processed = pd.get_dummies(df_processed, columns=categorical_cols, drop_first=True)
+        X = df_processed.drop('Churn', axis=1)
+        y = df_processed['Churn']
+    del df
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    with config_context(working_memory=SPARSE_WORKING_MEMORY_MB if path == "sparse" else None):
+        X_train_resampled, y_train_resampled = SMOTE(random_state=42).fit_resample(X_train, y_train)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1, class_weight='balanced')
+    model.fit(X_train_resampled, y_train_resampled)
+    accuracy = float(np.mean(model.predict(X_test) == np.asarray(y_test)))
+
+    print(json.dumps({
+        "path": path,
+        "rows": int(X.shape[0]),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "seconds": round(time.perf_counter() - start, 2),
+        "test_accuracy": round(accuracy, 4),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of the dense vs sparse churn training paths")
+    parser.add_argument("--scale", type=int, default=20, help="replicate the Telco rows this many times")
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--worker", choices=["dense", "sparse"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.scale, args.n_estimators)
+        return
+
+    results = {}
+    for path in ["dense", "sparse"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--worker", path, "--scale", str(args.scale), "--n-estimators", str(args.n_estimators)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[path] = json.loads(output.strip().splitlines()[-1])
+        print(results[path])
+
+    # الفرق فوق خط الأساس (بعد تحميل البيانات الخام) هو ما يستهلكه مسار المعالجة نفسه
+    dense_growth = results["dense"]["peak_rss_mb"] - results["dense"]["baseline_rss_mb"]
+    sparse_growth = results["sparse"]["peak_rss_mb"] - results["sparse"]["baseline_rss_mb"]
+    print(f"Peak RSS: dense {results['dense']['peak_rss_mb']:.1f} MB, sparse {results['sparse']['peak_rss_mb']:.1f} MB")
+    print(f"Growth over raw data: dense {dense_growth:.1f} MB, sparse {sparse_growth:.1f} MB "
+          f"({100 * (1 - sparse_growth / dense_growth):.1f}% less)" if dense_growth > 0 else "")
+
+
+if __name__ == "__main__":
+    main()
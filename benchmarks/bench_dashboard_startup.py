@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from dashboard import SECTIONS  # noqa: E402
+
+# قياس زمن أول عرض (time to first render) لكل قسم من لوحة التحكم في عملية Python جديدة،
+# أي ما يدفعه أول مستخدم بعد تشغيل حاوية جديدة، ثم زمن إعادة التشغيل (rerun) في نفس العملية
+# التشغيل من جذر المستودع: python benchmarks/bench_dashboard_startup.py --repeat 3
+# لمقارنة نسخة أخرى من اللوحة: --app path/to/old/app.py
+
+# مكتبات ثقيلة نسجل إن كان القسم قد استوردها
+HEAVY_MODULES = ["matplotlib.pyplot", "seaborn", "pyarrow.dataset", "sklearn"]
+
+
+def run_worker(app_path, section):
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_import_s = time.perf_counter() - start
+
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.query_params["section"] = section
+    start = time.perf_counter()
+    at.run()
+    first_render_s = time.perf_counter() - start
+    start = time.perf_counter()
+    at.run()
+    rerun_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "section": section,
+        "streamlit_import_s": round(streamlit_import_s, 3),
+        "first_render_s": round(first_render_s, 3),
+        "rerun_s": round(rerun_s, 3),
+        "exceptions": len(at.exception),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first render of each dashboard section in a fresh process")
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"))
+    parser.add_argument("--sections", nargs="+", choices=list(SECTIONS.values()), default=list(SECTIONS.values()))
+    parser.add_argument("--repeat", type=int, default=1, help="fresh processes per section (the median is reported)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # AppTest يحل المسارات النسبية بالنسبة لهذا الملف، لا لمجلد التشغيل
+    args.app = os.path.abspath(args.app)
+
+    if args.worker:
+        run_worker(args.app, args.worker)
+        return
+
+    print(f"{'section':<12} {'first_render_s':>15} {'rerun_s':>8}  heavy modules loaded")
+    for section in args.sections:
+        runs = []
+        for _ in range(args.repeat):
+            # عملية جديدة لكل قياس، حتى لا تكون المكتبات أو الذاكرات المؤقتة محملة من قياس سابق
+            output = subprocess.run([sys.executable, __file__, "--app", args.app, "--worker", section],
+                                    cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        runs.sort(key=lambda run: run["first_render_s"])
+        median = runs[len(runs) // 2]
+        warning = f"  ⚠️ {median['exceptions']} exceptions" if median["exceptions"] else ""
+        print(f"{section:<12} {median['first_render_s']:>15.3f} {median['rerun_s']:>8.3f}  "
+              f"{', '.join(median['heavy_modules']) or '-'}{warning}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_storage import save_table  # noqa: E402
+from pricing_engine import (  # noqa: E402
+    BRANCH_MULTIPLIERS, CATEGORY_MULTIPLIERS, MONTH_FACTORS, WEEKDAY_FACTORS, compute_price_grid, date_axis,
+    grid_to_frame, weather_demand_factors,
+)
+
+# قياس سرعة محرك التسعير على شبكة كبيرة (الافتراضي: 20 فئة × 1500 فرع × 365 يوم ≈ 11 مليون سعر)
+# ومقارنته بحلقة Python متداخلة (مثل النسخة القديمة) على جزء صغير من الشبكة
+# التشغيل من جذر المستودع: python benchmarks/bench_pricing_engine.py --categories 20 --branches 1500 --days 365
+
+
+def loop_prices(categories, branches, dates, demand):
+    rows = []
+    for category in categories:
+        for branch in branches:
+            for i, date in enumerate(dates):
+                price = 150.0 * CATEGORY_MULTIPLIERS.get(category, 1.0) * BRANCH_MULTIPLIERS.get(branch, 1.0)
+                price *= WEEKDAY_FACTORS[date.weekday()] * MONTH_FACTORS[date.month - 1] * demand[i]
+                rows.append({"car_category": category, "rental_branch": branch, "date": date,
+                             "suggested_price": round(price, 2)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized pricing engine")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--branches", type=int, default=1500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--loop-branches", type=int, default=20, help="branches used for the nested-loop baseline")
+    args = parser.parse_args()
+
+    categories = [f"category-{i}" for i in range(args.categories)]
+    branches = [f"branch-{i}" for i in range(args.branches)]
+    dates = date_axis("2026-01-01", args.days)
+    rng = np.random.default_rng(42)
+    demand = weather_demand_factors(dates, pd.Series(rng.normal(33, 6, len(dates)), index=dates))
+    n_cells = len(categories) * len(branches) * len(dates)
+    print(f"Pricing grid: {len(categories)} categories x {len(branches)} branches x {len(dates)} days = {n_cells:,} cells")
+
+    start = time.perf_counter()
+    prices = compute_price_grid(categories, branches, dates, demand)
+    grid_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    df = grid_to_frame(prices, categories, branches, dates, "2026-01-01 00:00:00")
+    frame_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        save_table(df, os.path.join(tmp_dir, "optimal_prices.csv"), write_csv=False)
+        write_seconds = time.perf_counter() - start
+    total = grid_seconds + frame_seconds + write_seconds
+    print(f"grid {grid_seconds:.2f}s, frame {frame_seconds:.2f}s, parquet write {write_seconds:.2f}s "
+          f"-> {n_cells / total / 1e6:.1f}M cells/s end to end")
+
+    loop_branches = branches[:args.loop_branches]
+    start = time.perf_counter()
+    df_loop = loop_prices(categories, loop_branches, dates, demand)
+    loop_seconds = time.perf_counter() - start
+    print(f"nested loop: {len(df_loop):,} cells in {loop_seconds:.2f}s -> {len(df_loop) / loop_seconds / 1e6:.2f}M cells/s")
+
+    # نفس الأسعار من الطريقتين للفروع المشتركة
+    vectorized = prices[:, :len(loop_branches), :].reshape(-1)
+    print(f"max |price diff| vs loop: {np.abs(vectorized - df_loop['suggested_price'].to_numpy(np.float32)).max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from timeseries_store import append_points, compact, read_range  # noqa: E402
+
+# قياس زمن قراءة مخزن السلاسل الزمنية بعد سنة من بيانات الطقس كل ساعة لعدة فروع
+# يتم إنشاء المخزن في مجلد مؤقت، مع إضافة يومية (كما في الـ pipeline) ثم دمج الأيام القديمة
+# التشغيل من جذر المستودع: python benchmarks/bench_timeseries_store.py --days 365 --locations 10
+
+
+def build_store(root, days, n_locations, today):
+    rng = np.random.default_rng(42)
+    locations = [f"Branch {i}" for i in range(n_locations)]
+    start = pd.Timestamp(today) - pd.Timedelta(days=days)
+    for day in range(days):
+        hours = pd.date_range(start + pd.Timedelta(days=day), periods=24, freq="h")
+        df = pd.DataFrame({
+            "timestamp": np.repeat(hours, n_locations),
+            "location": np.tile(locations, len(hours)),
+            "temperature_celsius": rng.normal(30, 5, len(hours) * n_locations).round(1),
+            "condition": "clear sky",
+        })
+        append_points("weather", df, root=root)
+    return locations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark downsampled reads from the time-series store")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--max-points", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="timeseries-bench-")
+    today = datetime.date.today()
+    try:
+        start = time.perf_counter()
+        build_store(root, args.days, args.locations, today)
+        print(f"Appended {args.days} days x {args.locations} locations x 24 h in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        merged = compact("weather", root=root, today=today)
+        print(f"Compacted {merged} daily partitions in {time.perf_counter() - start:.1f}s")
+
+        end = pd.Timestamp(today) + pd.Timedelta(days=1)
+        for label, days in (("7 days", 7), ("30 days", 30), ("1 year", args.days)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                df = read_range("weather", end - pd.Timedelta(days=days), end, columns=["temperature_celsius"],
+                                max_points=args.max_points, root=root)
+                best = min(best, time.perf_counter() - start)
+            print(f"read_range {label:>8}: {len(df):>6,} rows returned in {best * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_storage import load_table  # noqa: E402
+from price_quote_service import PRICES_PATH, PriceQuoteService, make_server  # noqa: E402
+
+# اختبار حمل لخدمة عرض الأسعار: عدة عملاء متزامنين، كل عميل باتصال HTTP دائم (keep-alive)
+# يطبع زمن الاستجابة p50/p99 وعدد الطلبات في الثانية للطلب المفرد (GET /quote) وللدفعات (POST /quotes)
+# التشغيل من جذر المستودع (يشغل الخدمة داخلياً): python benchmarks/load_test_price_quotes.py --clients 8 --seconds 10
+# أو ضد خدمة قائمة: python benchmarks/load_test_price_quotes.py --url http://127.0.0.1:8600
+
+
+def sample_lookups(n):
+    df = load_table(PRICES_PATH, columns=['car_category', 'rental_branch', 'day_of_week'])
+    rows = df.astype(str).drop_duplicates().to_dict('records')
+    rng = random.Random(42)
+    return [{"category": r['car_category'], "branch": r['rental_branch'], "day": r['day_of_week']}
+            for r in rng.choices(rows, k=n)]
+
+
+def run_client(host, port, lookups, batch_size, deadline, latencies):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if batch_size == 1:
+            connection.request("GET", "/quote?" + urlencode(lookups[i % len(lookups)]))
+        else:
+            items = [lookups[(i + j) % len(lookups)] for j in range(batch_size)]
+            connection.request("POST", "/quotes", body=json.dumps({"items": items}),
+                               headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status} for lookup {i}")
+        latencies.append(time.perf_counter() - start)
+        i += batch_size
+    connection.close()
+
+
+def report(label, latencies, seconds, batch_size):
+    ms = np.array(latencies) * 1000
+    print(f"{label:<22} {len(ms) / seconds:>9,.0f} req/s {len(ms) * batch_size / seconds:>11,.0f} quotes/s   "
+          f"p50 {np.percentile(ms, 50):6.2f} ms   p99 {np.percentile(ms, 99):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the price quote HTTP service")
+    parser.add_argument("--url", default=None, help="test a running service instead of starting one")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    lookups = sample_lookups(10_000)
+    server = None
+    if args.url is None:
+        service = PriceQuoteService()
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+
+        # زمن البحث داخل نفس العملية (ما تستخدمه لوحة التحكم) بدون HTTP
+        start = time.perf_counter()
+        for lookup in lookups:
+            service.quote(lookup['category'], lookup['branch'], lookup['day'])
+        per_lookup_us = (time.perf_counter() - start) / len(lookups) * 1e6
+        print(f"in-process lookup: {per_lookup_us:.2f} µs per quote")
+    else:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+
+    for label, batch_size in (("GET /quote", 1), (f"POST /quotes x{args.batch_size}", args.batch_size)):
+        latencies = []
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=run_client, args=(host, port, lookups, batch_size, deadline, latencies))
+                   for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report(label, latencies, args.seconds, batch_size)
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
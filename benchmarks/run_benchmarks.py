@@ -0,0 +1,244 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+import timeseries_store  # noqa: E402
+from aggregates import AGGREGATE_SOURCES  # noqa: E402
+from churn_explorer import (  # noqa: E402
+    CUSTOMER_FEATURE_COLUMNS, EXPLORER_COLUMNS, ChurnExplorer, index_customer_features, with_customer_features,
+)
+from churn_model_pipeline import (  # noqa: E402
+    PREDICTIONS_OUTPUT_FILE, RAW_DATA_PATH, run_churn_pipeline, run_churn_scoring_pipeline,
+)
+from dashboard_cache import FrameCache  # noqa: E402
+from demand_forecast_pipeline import (  # noqa: E402
+    BOOKINGS_PATH, DEMAND_FORECAST_PATH, HISTORY_DAYS, run_demand_forecast_pipeline,
+)
+from data_storage import load_table, resolve_table_path, save_table  # noqa: E402
+from instrumentation import load_stage_metrics, track_stage  # noqa: E402
+from nlp_reviews_pipeline import (  # noqa: E402
+    OUTPUT_FILE_PATH as SENTIMENT_RESULTS_PATH, REVIEWS_INPUT_PATH, register_sentiment_model,
+    run_sentiment_analysis_pipeline,
+)
+from price_quote_service import PRICES_PATH  # noqa: E402
+from synthetic_data import (  # noqa: E402
+    SCALES, parse_rows, synthetic_daily_bookings, synthetic_pricing_grid, synthetic_reviews, synthetic_weather_history,
+    write_synthetic_csv,
+)
+
+# مجموعة قياسات أداء لكل الـ pipelines ولقراءات أقسام لوحة التحكم على بيانات اصطناعية بأحجام مختلفة
+# كل حجم يعمل داخل مجلد مؤقت (المسارات النسبية data/... و models/... تشير إليه)، فلا تُلمس بيانات المستودع
+# النتائج تُحفظ في benchmarks/results/<label>.json للمقارنة بين النسخ:
+#   python benchmarks/run_benchmarks.py --scales 10k 100k
+#   python benchmarks/run_benchmarks.py --scales 10k 100k --compare benchmarks/results/<old label>.json
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+BENCHMARKS = ["churn_train", "churn_score", "sentiment", "pricing", "demand", "dashboard_loads"]
+# عدد التعليقات المستخدمة لتدريب موديل مشاعر مؤقت يُسجَّل في سجل الموديلات داخل المجلد المؤقت
+# (ملفات الموديل في المستودع محفوظة عبر Git LFS)
+SENTIMENT_TRAINING_ROWS = 20_000
+# سجل الطقس: سنة واحدة من القراءات كل 3 ساعات، وعدد المدن يكبر مع الحجم (بحد أقصى)
+WEATHER_READINGS_PER_LOCATION = 365 * 8
+MAX_WEATHER_LOCATIONS = 100
+# حجوزات يومية لسنتين (نافذة التدريب) لكل فرع × فئة؛ عدد الفروع يكبر مع الحجم
+DEMAND_CATEGORIES = 20
+# نفس قراءات الأقسام في app.py: (المسار، الأعمدة)
+SECTION_LOADS = {
+    "churn": (PREDICTIONS_OUTPUT_FILE, tuple(EXPLORER_COLUMNS)),
+    "sentiment": (SENTIMENT_RESULTS_PATH, ("comment_id", "analysis_date", "sentiment", "sentiment_score")),
+    "pricing": (PRICES_PATH, ("car_category", "rental_branch", "day_of_week", "suggested_price")),
+    "demand": (DEMAND_FORECAST_PATH, ("date", "rental_branch", "car_category", "actual_bookings", "forecast_bookings",
+                                      "is_forecast")),
+    **{f"{name}_aggregates": (path, tuple(columns)) for name, (path, columns, _) in AGGREGATE_SOURCES.items()},
+}
+
+
+def git_label():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_inputs(rows, seed):
+    """Write the synthetic raw files (churn, reviews, weather, bookings) and register a small sentiment model in the current (temporary) directory."""
+    write_synthetic_csv("churn", rows, RAW_DATA_PATH, seed=seed)
+    write_synthetic_csv("reviews", rows, REVIEWS_INPUT_PATH, seed=seed)
+
+    training = synthetic_reviews(min(rows, SENTIMENT_TRAINING_ROWS), seed=seed + 1, with_labels=True)
+    vectorizer = TfidfVectorizer(max_features=5_000)
+    model = LogisticRegression(max_iter=200).fit(vectorizer.fit_transform(training["comment_text"]), training["label"])
+    register_sentiment_model(model, vectorizer, params={"training_rows": len(training)})
+
+    n_locations = min(max(1, rows // WEATHER_READINGS_PER_LOCATION), MAX_WEATHER_LOCATIONS)
+    history = synthetic_weather_history(n_locations * WEATHER_READINGS_PER_LOCATION, n_locations=n_locations, seed=seed)
+    timeseries_store.append_points("weather", history)
+    # مثل pipeline الطقس: الأيام القديمة تُدمج في أقسام شهرية
+    timeseries_store.maintain("weather")
+
+    n_branches = max(1, rows // (DEMAND_CATEGORIES * HISTORY_DAYS))
+    end = history["timestamp"].max().normalize() - pd.Timedelta(days=1)
+    bookings = synthetic_daily_bookings([f"Branch {i + 1}" for i in range(n_branches)],
+                                        [f"Category {i + 1}" for i in range(DEMAND_CATEGORIES)],
+                                        end - pd.Timedelta(days=HISTORY_DAYS - 1), end, seed=seed)
+    save_table(bookings, BOOKINGS_PATH)
+    return history["timestamp"].min(), history["timestamp"].max()
+
+
+def bench_pricing(rows):
+    df_prices = synthetic_pricing_grid(rows)
+    save_table(df_prices, PRICES_PATH)
+    return len(df_prices)
+
+
+def _load_section_frame(path, columns):
+    return load_table(path, columns=list(columns) if columns is not None else None)
+
+
+def bench_dashboard_loads(history_range):
+    """Cold and warm FrameCache reads of every section file, the churn explorer and the weather history."""
+    cache = FrameCache()
+    timings = {}
+    for name, (path, columns) in SECTION_LOADS.items():
+        if resolve_table_path(path) is None:
+            # مخرجات pipeline لم يُشغَّل ضمن --only
+            continue
+        for attempt in ("cold", "warm"):
+            with track_stage("dashboard", f"{name}_{attempt}") as stage:
+                df = cache.get(path, _load_section_frame, columns=columns)
+                stage.rows = len(df) if df is not None else 0
+            timings[f"{name}_{attempt}_s"] = stage.record["wall_s"]
+    path, columns = SECTION_LOADS["churn"]
+    df_churn = cache.get(path, _load_section_frame, columns=columns)
+    if df_churn is not None:
+        with track_stage("dashboard", "churn_explorer", rows=len(df_churn)) as stage:
+            explorer = ChurnExplorer(df_churn)
+            page = explorer.query(explorer.risk_categories[:1], 0.5, 1.0).page(1)
+        timings["churn_explorer_s"] = stage.record["wall_s"]
+        # ميزات العميل تُربط من ملف العملاء الأصلي للصفحة المعروضة فقط
+        with track_stage("dashboard", "customer_features") as stage:
+            customer_features = index_customer_features(
+                load_table(RAW_DATA_PATH, columns=["customerID", *CUSTOMER_FEATURE_COLUMNS]))
+            stage.rows = len(customer_features)
+        timings["customer_features_s"] = stage.record["wall_s"]
+        with track_stage("dashboard", "customer_features_join", rows=len(page)) as stage:
+            with_customer_features(page, customer_features)
+        timings["customer_features_join_s"] = stage.record["wall_s"]
+    with track_stage("dashboard", "weather_history") as stage:
+        stage.rows = len(timeseries_store.read_range("weather", *history_range, columns=["temperature_celsius"]))
+    timings["weather_history_s"] = stage.record["wall_s"]
+    return timings
+
+
+def run_scale(scale, rows, selected, seed, n_workers, verbose):
+    results = []
+    stages = {}
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench-{scale}-") as workdir:
+        os.chdir(workdir)
+        try:
+            # مخرجات الـ pipelines (الرسائل) تُخفى إلا مع --verbose
+            quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                history_range = prepare_inputs(rows, seed)
+            benchmarks = {
+                "churn_train": lambda: run_churn_pipeline(),
+                "churn_score": lambda: run_churn_scoring_pipeline(),
+                "sentiment": lambda: run_sentiment_analysis_pipeline(n_workers=n_workers),
+                "pricing": lambda: bench_pricing(rows),
+                "demand": lambda: run_demand_forecast_pipeline(n_workers=n_workers),
+                "dashboard_loads": lambda: bench_dashboard_loads(history_range),
+            }
+            for name in selected:
+                quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+                with quiet, track_stage("benchmark", name, rows=rows) as stage:
+                    details = benchmarks[name]()
+                record = {"scale": scale, "rows": rows, "benchmark": name, **{
+                    key: stage.record[key] for key in ("wall_s", "cpu_s", "peak_rss_mb")
+                }}
+                record["rows_per_s"] = round(rows / record["wall_s"]) if record["wall_s"] else None
+                if isinstance(details, dict):
+                    record["details"] = details
+                results.append(record)
+                print(f"✅ [{scale}] {name}: {record['wall_s']:.2f}s, peak RSS {record['peak_rss_mb']:.0f} MB")
+
+            # تفصيل كل مرحلة كما سجلها الـ pipeline نفسه (instrumentation)
+            metrics = load_stage_metrics()
+            metrics = metrics[~metrics["pipeline"].isin(["benchmark", "dashboard"])]
+            for (pipeline, stage_name), wall in metrics.groupby(["pipeline", "stage"])["wall_s"].sum().items():
+                stages.setdefault(pipeline, {})[stage_name] = round(float(wall), 4)
+        finally:
+            os.chdir(previous_cwd)
+    return results, stages
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["scale"], r["benchmark"]): r for r in baseline["results"]}
+    print(f"\nComparison with {baseline.get('label')} ({baseline_path}):")
+    print(f"{'scale':>6} {'benchmark':<16} {'before_s':>10} {'after_s':>10} {'ratio':>7}")
+    for record in current:
+        old = previous.get((record["scale"], record["benchmark"]))
+        if old is None:
+            continue
+        ratio = record["wall_s"] / old["wall_s"] if old["wall_s"] else float("nan")
+        flag = "  ⚠️ slower" if ratio > 1.2 else ""
+        print(f"{record['scale']:>6} {record['benchmark']:<16} {old['wall_s']:>10.3f} {record['wall_s']:>10.3f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline and the dashboard loaders on synthetic data")
+    parser.add_argument("--scales", nargs="+", default=["10k", "100k"], help=f"row counts, e.g. {' '.join(SCALES)}")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--workers", type=int, default=None, help="sentiment / demand worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default=None, help="results file name (default: current git commit)")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the pipelines' own output")
+    args = parser.parse_args()
+
+    # churn_score يحتاج الموديل الذي يدربه churn_train في نفس المجلد المؤقت (وإلا يدرب واحداً بنفسه)
+    selected = [name for name in BENCHMARKS if name in args.only]
+    commit = git_label()
+    label = args.label or commit or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    results, stages = [], {}
+    for scale in args.scales:
+        scale_results, scale_stages = run_scale(scale, parse_rows(scale), selected, args.seed, args.workers, args.verbose)
+        results += scale_results
+        stages[scale] = scale_stages
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "label": label,
+            "git_commit": commit,
+            "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "results": results,
+            "stages": stages,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"✅ Benchmark results saved to {output_path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import contextlib
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# ذاكرة مؤقتة للرسوم البيانية بعد رسمها (صور PNG)
+# Streamlit يعيد تشغيل السكربت كاملاً مع كل تفاعل؛ بدلاً من إعادة رسم كل رسم seaborn من البيانات الخام
+# نعيد استخدام الصورة المرسومة طالما لم يتغير وصف الرسم (spec) ولا بصمة البيانات المصدر
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+RENDER_DPI = 150
+
+
+def data_fingerprint(*frames):
+    """Fingerprint of the source frames: ``df.attrs['fingerprint']`` when set, else a hash of the values."""
+    parts = []
+    for df in frames:
+        fingerprint = df.attrs.get('fingerprint')
+        if fingerprint is None:
+            # جداول صغيرة غير قادمة من FrameCache (مثل السلاسل الزمنية المخفّضة): نحسب بصمة محتواها
+            fingerprint = f"{len(df)}-{int(pd.util.hash_pandas_object(df, index=False).sum())}" if len(df) else "empty"
+        parts.append(str(fingerprint))
+    return "|".join(parts)
+
+
+def figure_to_png(fig, dpi=RENDER_DPI):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+class ChartCache:
+    """Thread-safe LRU cache of rendered chart images keyed on (chart spec, data fingerprint)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(spec, fingerprint):
+        return hashlib.sha1(repr((spec, fingerprint)).encode('utf-8')).hexdigest()
+
+    def get_or_render(self, spec, fingerprint, draw, context=contextlib.nullcontext):
+        """Return PNG bytes for ``spec``; on a miss ``draw()`` must return a matplotlib Figure.
+
+        ``context`` is entered around drawing and saving (e.g. an rc style), only on a miss.
+        """
+        key = self.make_key(spec, fingerprint)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        # matplotlib يُستورد عند أول رسم فعلي فقط، لا عند استيراد هذه الوحدة
+        import matplotlib.pyplot as plt
+        with context():
+            fig = draw()
+            try:
+                png = figure_to_png(fig)
+            finally:
+                plt.close(fig)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = png
+                self._bytes += len(png)
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return png
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
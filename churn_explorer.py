@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# طبقة استعلام فوق توقعات المغادرة للوحة التحكم
+# الترتيب حسب الاحتمالية يُحسب مرة واحدة عند بناء الفهرس؛ بعدها كل فلتر (فئة المخاطرة + نطاق الاحتمالية)
+# هو بحث ثنائي + قناع منطقي على الجزء المطابق فقط، وكل صفحة تقرأ صفوفها فقط بدلاً من إعادة ترتيب الجدول
+
+EXPLORER_COLUMNS = ('customerID', 'Churn_Probability', 'Predicted_Churn', 'Risk_Category')
+# ميزات العميل المعروضة بجانب التوقعات: ليست في ملف التوقعات، بل تُربط من ملف العملاء الأصلي بـ customerID
+# للصفوف المعروضة فقط (صفحة واحدة)
+CUSTOMER_FEATURE_COLUMNS = ('tenure', 'MonthlyCharges', 'TotalCharges')
+DEFAULT_PAGE_SIZE = 50
+
+
+def index_customer_features(df_customers, columns=CUSTOMER_FEATURE_COLUMNS):
+    """Numeric ``columns`` of the source customer table, indexed by customerID for page joins."""
+    features = df_customers.drop_duplicates('customerID').set_index('customerID')
+    # TotalCharges في الملف الأصلي نص (وفارغ للعملاء الجدد)
+    return features[[col for col in columns if col in features.columns]].apply(pd.to_numeric, errors='coerce')
+
+
+def with_customer_features(rows, customer_features):
+    """Join the indexed customer features onto a page of prediction rows, right after customerID."""
+    if customer_features is None or 'customerID' not in rows.columns:
+        return rows
+    features = customer_features.reindex(rows['customerID'].to_numpy())
+    rows = rows.reset_index(drop=True)
+    return pd.concat([rows[['customerID']], features.reset_index(drop=True), rows.drop(columns='customerID')], axis=1)
+
+
+class ChurnQueryResult:
+    """Matching rows of a query, as positions into the explorer's probability-sorted order."""
+
+    def __init__(self, explorer, ranks):
+        self._explorer = explorer
+        self._ranks = ranks
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def page_count(self, page_size=DEFAULT_PAGE_SIZE):
+        return max(1, -(-len(self._ranks) // page_size))
+
+    def page(self, page_number, page_size=DEFAULT_PAGE_SIZE):
+        """Rows of page ``page_number`` (1-based), in the query's sort order."""
+        start = (page_number - 1) * page_size
+        return self._explorer.rows(self._ranks[start:start + page_size])
+
+    def head(self, k):
+        return self._explorer.rows(self._ranks[:k])
+
+
+class ChurnExplorer:
+    """Read-only index over churn predictions, sorted once by Churn_Probability (highest first)."""
+
+    def __init__(self, df):
+        self._df = df
+        probabilities = df['Churn_Probability'].to_numpy(dtype=np.float64)
+        # ترتيب ثابت (stable) حتى تبقى الصفحات متسقة عند تساوي الاحتمالات
+        self._order = np.argsort(-probabilities, kind='stable')
+        self._sorted_negative_proba = -probabilities[self._order]
+        if 'Risk_Category' in df.columns:
+            # عمود فئوي (categorical) من ملف Parquet يحتفظ بترتيب الفئات (منخفضة ← عالية)
+            risk = df['Risk_Category'].array if isinstance(df['Risk_Category'].dtype, pd.CategoricalDtype) \
+                else pd.Categorical(df['Risk_Category'].astype(str))
+            self.risk_categories = list(risk.categories)
+            self._sorted_risk_codes = risk.codes[self._order]
+        else:
+            self.risk_categories = []
+            self._sorted_risk_codes = None
+
+    def __len__(self):
+        return len(self._order)
+
+    def query(self, risk_categories=None, min_probability=0.0, max_probability=1.0, ascending=False):
+        """Customers with ``min_probability <= Churn_Probability <= max_probability`` in ``risk_categories``."""
+        # المصفوفة مرتبة تصاعدياً بالسالب، فنطاق الاحتمالية = شريحة متصلة نجدها ببحث ثنائي
+        lo = np.searchsorted(self._sorted_negative_proba, -max_probability, side='left')
+        hi = np.searchsorted(self._sorted_negative_proba, -min_probability, side='right')
+        ranks = np.arange(lo, hi)
+        if risk_categories is not None and self._sorted_risk_codes is not None:
+            wanted = [self.risk_categories.index(c) for c in risk_categories if c in self.risk_categories]
+            ranks = ranks[np.isin(self._sorted_risk_codes[lo:hi], wanted)]
+        if ascending:
+            ranks = ranks[::-1]
+        return ChurnQueryResult(self, ranks)
+
+    def top_k(self, k, risk_categories=None):
+        """The ``k`` customers most likely to churn (optionally within ``risk_categories``)."""
+        return self.query(risk_categories).head(k)
+
+    def rows(self, ranks):
+        return self._df.iloc[self._order[ranks]]
@@ -1,98 +1,353 @@
 import pandas as pd
 import numpy as np
 import joblib
+import json
+import argparse
 import os # أضفنا هذا الاستيراد للتعامل مع المسارات
+from scipy import sparse
 from sklearn.model_selection import train_test_split
+from sklearn import config_context
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, roc_auc_score
 from imblearn.over_sampling import SMOTE
+from data_storage import save_table, ChunkedTableWriter
+from aggregates import RISK_CATEGORY_ORDER, refresh_aggregates
+from feature_cache import code_version, file_content_hash, load_cached, make_cache_key, save_cached
+from instrumentation import track_stage
+import model_registry
 
-def run_churn_pipeline():
-    print("--- Starting Churn Model Pipeline ---")
+# Define paths (مشتركة بين وضع التدريب ووضع التقييم)
+RAW_DATA_PATH = 'data/raw/WA_Fn-UseC_-Telco-Customer-Churn.csv'
+MODEL_SAVE_PATH = 'models/churn_classifier_model.joblib'
+FEATURE_SCHEMA_PATH = 'models/churn_feature_schema.json'
+# اسم الموديل في سجل الموديلات (models/registry/churn_classifier)؛ الملفات أعلاه تُقرأ فقط إذا كان السجل فارغاً
+CHURN_MODEL_NAME = "churn_classifier"
+PREDICTIONS_OUTPUT_DIR = "data/predictions"
+PREDICTIONS_OUTPUT_FILE = os.path.join(PREDICTIONS_OUTPUT_DIR, "churn_predictions.csv")
 
-    # Define paths
-    file_path = 'data/raw/WA_Fn-UseC_-Telco-Customer-Churn.csv'
-    model_save_path = 'models/churn_classifier_model.joblib'
-    
-    # تعريف مسار ملف التنبؤات الناتج
-    predictions_output_dir = "data/predictions"
-    predictions_output_file = os.path.join(predictions_output_dir, "churn_predictions.csv")
-    
-    # التأكد من وجود مجلد المخرجات
-    os.makedirs(predictions_output_dir, exist_ok=True)
+# عدد العملاء الذين يتم تقييمهم في كل دفعة أثناء التقييم الكامل
+SCORING_CHUNKSIZE = 100_000
 
+# حد ذاكرة العمل (MB) لبحث الجيران داخل SMOTE في المسار المتفرق؛ القيمة الافتراضية في scikit-learn هي 1024
+SPARSE_WORKING_MEMORY_MB = 16
 
-    # --- Step 1: Load the Dataset ---
+# اسم مجموعة النسخ المخزنة لمصفوفة الميزات المعالجة (داخل data/cache/features)
+FEATURE_CACHE_NAMESPACE = "churn"
+
+
+# حدود فئات المخاطرة حسب احتمالية المغادرة (منخفضة < 0.4 ≤ متوسطة < 0.7 ≤ عالية)
+# يمكنك تعديل هذه العتبات بناءً على تحليلك للموديل، أو عبر --risk-thresholds
+RISK_THRESHOLDS = (0.4, 0.7)
+
+
+def risk_categories(probabilities, thresholds=RISK_THRESHOLDS):
+    """Bucket churn probabilities into ``RISK_CATEGORY_ORDER`` with one vectorized ``pd.cut``.
+
+    A probability equal to a threshold falls into the higher category.
+    """
+    return pd.cut(np.asarray(probabilities), bins=[-np.inf, *thresholds, np.inf], labels=RISK_CATEGORY_ORDER, right=False)
+
+
+def build_prediction_frame(customer_ids, probabilities, predictions, actual=None, risk_thresholds=RISK_THRESHOLDS):
+    """Compact, customer-keyed prediction rows (plus ``Actual_Churn`` when the labels are known).
+
+    Feature columns are not copied; they are joined back from the raw customer
+    file on ``customerID`` when needed.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    results_df = pd.DataFrame({
+        'customerID': np.asarray(customer_ids),
+        'Churn_Probability': probabilities,
+        'Predicted_Churn': np.asarray(predictions).astype(np.int8),
+        'Risk_Category': risk_categories(probabilities, risk_thresholds),
+    })
+    if actual is not None:
+        results_df['Actual_Churn'] = np.asarray(actual).astype(np.int8)
+    return results_df
+
+
+def clean_raw_churn_data(df):
+    """Coerce ``TotalCharges`` and encode the ``Churn`` target as 0/1 (when present)."""
+    df = df.copy()
+    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce').fillna(0)
+    if 'Churn' in df.columns:
+        df['Churn'] = (df['Churn'] == 'Yes').astype(int)
+    return df
+
+
+def build_feature_matrix(df, feature_schema):
+    """One-hot encode a cleaned chunk and align it to the saved training column layout.
+
+    Dummies are built without ``drop_first`` and then reindexed, so a chunk that is
+    missing some category values still produces exactly the training columns.
+    """
+    features = df.drop(columns=['customerID', 'Churn'], errors='ignore')
+    numeric_columns = [col for col in features.columns if col not in feature_schema['categorical_columns']]
+    features = pd.get_dummies(features, columns=feature_schema['categorical_columns'])
+    features = features.reindex(columns=feature_schema['feature_columns'], fill_value=False)
+    # الأعمدة الوهمية المضافة بالـ reindex يجب أن تبقى bool حتى يتطابق نوعها بين الدفعات
+    dummy_columns = [col for col in features.columns if col not in numeric_columns]
+    features[dummy_columns] = features[dummy_columns].astype(bool)
+    return features
+
+
+def build_sparse_training_matrix(df):
+    """Sparse equivalent of ``get_dummies(drop_first=True)`` on cleaned training data.
+
+    Returns a float32 CSR matrix with the same column layout as the dense path
+    (numeric columns first, then the one-hot blocks), the target as uint8, the
+    feature names and the categorical columns.
+    """
+    features = df.drop(columns=['customerID', 'Churn'], errors='ignore')
+    categorical_cols = list(features.select_dtypes(include=['object', 'string']).columns)
+    numeric_cols = [col for col in features.columns if col not in categorical_cols]
+
+    # كل عمود فئوي يضيف قيمة واحدة على الأكثر لكل صف، لذلك نبني مواقع القيم مباشرة من رموز الفئات
+    rows, cols, dummy_names = [], [], []
+    offset = 0
+    for col in categorical_cols:
+        categorical = pd.Categorical(features[col])
+        codes = categorical.codes
+        # الفئة الأولى (بالترتيب الأبجدي) محذوفة كما في drop_first=True
+        present = np.flatnonzero(codes > 0)
+        rows.append(present)
+        cols.append(offset + codes[present].astype(np.int64) - 1)
+        dummy_names += [f"{col}_{value}" for value in categorical.categories[1:]]
+        offset += len(categorical.categories) - 1
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    encoded = sparse.csr_matrix((np.ones(len(rows), dtype=np.uint8), (rows, cols)), shape=(len(features), offset))
+    numeric = sparse.csr_matrix(features[numeric_cols].to_numpy(dtype=np.float32))
+    X = sparse.hstack([numeric, encoded], format='csr', dtype=np.float32)
+
+    y = df['Churn'].to_numpy(dtype=np.uint8)
+    return X, y, numeric_cols + dummy_names, categorical_cols
+
+
+def build_feature_schema(feature_columns, categorical_columns):
+    return {
+        "feature_columns": list(feature_columns),
+        "categorical_columns": list(categorical_columns),
+    }
+
+
+def load_feature_schema(path=FEATURE_SCHEMA_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def register_churn_model(model, feature_columns, categorical_columns, metrics, params=None):
+    """Store a trained churn model as a new registry version and make it the active one."""
+    return model_registry.register_model(
+        CHURN_MODEL_NAME, model, feature_schema=build_feature_schema(feature_columns, categorical_columns),
+        metrics=metrics, params=params,
+    )
+
+
+def load_scoring_model():
+    """Return ``(model, feature_schema, version)`` used for scoring.
+
+    The registry's active version is preferred; without a registered model the
+    legacy files under models/ are used.
+    """
+    version = model_registry.active_version(CHURN_MODEL_NAME)
+    if version is None:
+        return joblib.load(MODEL_SAVE_PATH), load_feature_schema(), "legacy"
     try:
-        df = pd.read_csv(file_path)
-        print(f"✅ Dataset loaded successfully from {file_path}! Shape: {df.shape}")
+        model = model_registry.load_artifact(CHURN_MODEL_NAME, version)
+        return model, model_registry.load_feature_schema(CHURN_MODEL_NAME, version), version
+    except Exception as e:
+        # ملفات الموديلات محفوظة عبر Git LFS؛ بدون `git lfs pull` تكون مجرد ملفات مؤشرات
+        print(f"❌ Error: Churn model {version} could not be loaded from the registry ({type(e).__name__}: {e}). "
+              f"Falling back to {MODEL_SAVE_PATH}.")
+        return joblib.load(MODEL_SAVE_PATH), load_feature_schema(), "legacy"
+
+
+def prepare_churn_training_data(use_sparse=False):
+    """Load, clean, encode and split the raw churn data, or reuse the cached result.
+
+    The cache key covers the raw file's content hash and the source of the
+    preprocessing functions, so editing either one invalidates old entries.
+    """
+    try:
+        raw_hash = file_content_hash(RAW_DATA_PATH)
     except FileNotFoundError:
-        print(f"❌ Error: Dataset not found at {file_path}. Please ensure the file is in the correct path.")
-        return # Stop execution if file not found
-
-    # --- Step 2: Handle Missing Values and Data Types ---
-    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
-    df['TotalCharges'].fillna(0, inplace=True)
-    df_processed = df.drop('customerID', axis=1)
-    df_processed['Churn'] = df_processed['Churn'].apply(lambda x: 1 if x == 'Yes' else 0)
-    categorical_cols = df_processed.select_dtypes(include='object').columns
-    df_processed = pd.get_dummies(df_processed, columns=categorical_cols, drop_first=True)
-    print(f"✅ Data preprocessing completed. New shape: {df_processed.shape}")
-
-    # --- Step 3: Separate Features (X) and Target (y) ---
-    X = df_processed.drop('Churn', axis=1)
-    y = df_processed['Churn']
+        print(f"❌ Error: Dataset not found at {RAW_DATA_PATH}. Please ensure the file is in the correct path.")
+        return None
+    # بصمة كود المعالجة المسبقة: تعديل أي من هذه الدوال يبطل النسخ المخزنة
+    preprocessing_version = code_version(clean_raw_churn_data, build_sparse_training_matrix, prepare_churn_training_data)
+    key = make_cache_key(raw_hash, preprocessing_version, "sparse" if use_sparse else "dense")
+    prepared = load_cached(FEATURE_CACHE_NAMESPACE, key)
+    if prepared is not None:
+        print(f"✅ Reusing cached preprocessed features ({prepared['X_train'].shape[0]} train / {prepared['X_test'].shape[0]} test samples).")
+        return prepared
+
+    # --- Step 1: Load the Dataset ---
+    df = pd.read_csv(RAW_DATA_PATH)
+    print(f"✅ Dataset loaded successfully from {RAW_DATA_PATH}! Shape: {df.shape}")
+
+    # --- Step 2 & 3: Handle Missing Values, Encode Categoricals and Separate X / y ---
+    df_clean = clean_raw_churn_data(df)
+    # معرفات العملاء تُقسَّم مع البيانات، حتى تبقى توقعات بيانات الاختبار مرتبطة بعملائها
+    customer_ids = df_clean['customerID'].to_numpy()
+    if use_sparse:
+        # مصفوفة متفرقة (sparse) تبقى متفرقة خلال التقسيم وSMOTE والتدريب لتقليل استهلاك الذاكرة
+        X, y, feature_names, categorical_cols = build_sparse_training_matrix(df_clean)
+        print(f"✅ Sparse preprocessing completed. Shape: {X.shape}, non-zeros: {X.nnz}")
+    else:
+        df_processed = df_clean.drop('customerID', axis=1)
+        categorical_cols = list(df_processed.select_dtypes(include=['object', 'string']).columns)
+        df_processed = pd.get_dummies(df_processed, columns=categorical_cols, drop_first=True)
+        print(f"✅ Data preprocessing completed. New shape: {df_processed.shape}")
+
+        X = df_processed.drop('Churn', axis=1)
+        y = df_processed['Churn']
+        feature_names = list(X.columns)
     print("✅ Features and Target separated.")
 
     # --- Step 4: Split Data into Training and Testing Sets ---
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test, _, ids_test = train_test_split(
+        X, y, customer_ids, test_size=0.2, random_state=42, stratify=y)
     print(f"✅ Data split into training ({X_train.shape[0]} samples) and testing ({X_test.shape[0]} samples).")
 
+    prepared = {
+        "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test, "ids_test": ids_test,
+        "feature_names": feature_names, "categorical_cols": categorical_cols,
+    }
+    save_cached(FEATURE_CACHE_NAMESPACE, key, prepared)
+    return prepared
+
+
+@track_stage("churn_train", "total")
+def run_churn_pipeline(use_sparse=False, risk_thresholds=RISK_THRESHOLDS):
+    print("--- Starting Churn Model Pipeline ---")
+
+    # التأكد من وجود مجلدات المخرجات
+    os.makedirs(PREDICTIONS_OUTPUT_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(MODEL_SAVE_PATH), exist_ok=True)
+
+
+    # --- Steps 1-4: Load, Preprocess and Split (reused from the cache when the raw file is unchanged) ---
+    with track_stage("churn_train", "prepare") as stage:
+        prepared = prepare_churn_training_data(use_sparse)
+        stage.rows = prepared['X_train'].shape[0] + prepared['X_test'].shape[0] if prepared else 0
+    if prepared is None:
+        return False # Stop execution if file not found
+    X_train, X_test, y_train, y_test = prepared['X_train'], prepared['X_test'], prepared['y_train'], prepared['y_test']
+    feature_names, categorical_cols = prepared['feature_names'], prepared['categorical_cols']
+
     # --- Step 5: Handle Class Imbalance using SMOTE ---
     print("Applying SMOTE to balance training data...")
     smote = SMOTE(random_state=42)
-    X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+    # مع المصفوفات المتفرقة يستخدم SMOTE بحثاً شاملاً عن الجيران يحجز ذاكرة عمل كبيرة لكل دفعة مسافات
+    with track_stage("churn_train", "smote") as stage, \
+            config_context(working_memory=SPARSE_WORKING_MEMORY_MB if use_sparse else None):
+        X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+        stage.rows = X_train_resampled.shape[0]
     print(f"✅ Training data resampled.")
 
     # --- Step 6: Train the Random Forest Classifier ---
     print("Training the Random Forest Classifier on resampled data...")
     rf_smote_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1, class_weight='balanced')
-    rf_smote_model.fit(X_train_resampled, y_train_resampled)
+    with track_stage("churn_train", "rf_fit", rows=X_train_resampled.shape[0]):
+        rf_smote_model.fit(X_train_resampled, y_train_resampled)
     print("✅ Model trained successfully!")
 
-    # --- Step 7: Save the Trained Model ---
-    joblib.dump(rf_smote_model, model_save_path)
-    print(f"✅ Churn model saved successfully to {model_save_path}!")
-
-    # --- Step 8: Make Predictions and Save Results to CSV ---
-    print(f"Making predictions on test data and saving to {predictions_output_file}...")
-    y_pred = rf_smote_model.predict(X_test)
-    y_proba = rf_smote_model.predict_proba(X_test)[:, 1] # احتمالية الخروج
-
-    # إنشاء DataFrame لنتائج التنبؤات
-    results_df = X_test.copy()
-    results_df['Actual_Churn'] = y_test
-    results_df['Predicted_Churn'] = y_pred
-    results_df['Churn_Probability'] = y_proba
-    
-    # إضافة عمود 'Risk_Category' بناءً على احتمالية الخروج
-    # يمكنك تعديل هذه العتبات بناءً على تحليلك للموديل
-    def get_risk_category(prob):
-        if prob >= 0.7:
-            return "High Risk (Action Needed)"
-        elif prob >= 0.4:
-            return "Medium Risk (Monitor)"
-        else:
-            return "Low Risk (Stable)"
-            
-    results_df['Risk_Category'] = results_df['Churn_Probability'].apply(get_risk_category)
-
-    # حفظ النتائج في ملف CSV
-    results_df.to_csv(predictions_output_file, index=False)
-    print(f"✅ Churn predictions saved successfully to {predictions_output_file}!")
+    # --- Step 7: Evaluate on the Test Split ---
+    with track_stage("churn_train", "predict", rows=X_test.shape[0]):
+        y_pred = rf_smote_model.predict(X_test)
+        y_proba = rf_smote_model.predict_proba(X_test)[:, 1] # احتمالية الخروج
+    metrics = {"test_accuracy": accuracy_score(y_test, y_pred), "test_roc_auc": roc_auc_score(y_test, y_proba)}
+    print(f"✅ Test ROC AUC: {metrics['test_roc_auc']:.4f}, accuracy: {metrics['test_accuracy']:.4f}")
 
+    # --- Step 8: Register the Trained Model with its Feature Schema and Metrics ---
+    with track_stage("churn_train", "save_model"):
+        # ترتيب أعمدة get_dummies مطلوب لتقييم بيانات جديدة بنفس تخطيط التدريب
+        version = register_churn_model(rf_smote_model, feature_names, categorical_cols, metrics,
+                                       params={"n_estimators": 100, "class_weight": "balanced", "sparse": use_sparse})
+    print(f"✅ Churn model saved successfully as {CHURN_MODEL_NAME} {version}!")
+
+    # --- Step 9: Save the Test Predictions ---
+    print(f"Saving test predictions to {PREDICTIONS_OUTPUT_FILE}...")
+
+    # نتائج التنبؤات: معرف العميل + الاحتمالية + التصنيف + فئة المخاطرة (بدون أعمدة الميزات)
+    results_df = build_prediction_frame(prepared['ids_test'], y_proba, y_pred, actual=y_test, risk_thresholds=risk_thresholds)
+
+    # حفظ النتائج في ملف CSV وملف Parquet بجانبه
+    with track_stage("churn_train", "save_predictions", rows=len(results_df)):
+        save_table(results_df, PREDICTIONS_OUTPUT_FILE)
+    print(f"✅ Churn predictions saved successfully to {PREDICTIONS_OUTPUT_FILE}!")
+    refresh_aggregates("churn")
 
     print("--- Churn Model Pipeline Completed ---")
 
+
+@track_stage("churn_score", "total")
+def run_churn_scoring_pipeline(chunksize=SCORING_CHUNKSIZE, risk_thresholds=RISK_THRESHOLDS):
+    """Score the full customer base with the saved model, one chunk at a time."""
+    print("--- Starting Churn Scoring Pipeline ---")
+
+    # --- Step 1: Load the Trained Model and Feature Schema ---
+    if model_registry.active_version(CHURN_MODEL_NAME) is None and not (
+            os.path.exists(MODEL_SAVE_PATH) and os.path.exists(FEATURE_SCHEMA_PATH)):
+        # التقييم لا يدرّب موديلاً بنفسه: التدريب يتم في weekly_retrain.yml (أو --mode train) ويُحفظ في السجل
+        print(f"❌ Error: No trained churn model found in {model_registry.REGISTRY_ROOT} or {MODEL_SAVE_PATH}. "
+              "Run `python churn_model_pipeline.py --mode train` (or the weekly retrain workflow) first.")
+        return False
+    try:
+        with track_stage("churn_score", "load_model"):
+            model, feature_schema, version = load_scoring_model()
+    except Exception as e:
+        print(f"❌ Error: Could not load churn model or feature schema: {e}")
+        return False
+    print(f"✅ Churn model {version} and feature schema loaded ({len(feature_schema['feature_columns'])} features).")
+
+    # --- Step 2: Stream, Score and Append Each Chunk ---
+    if not os.path.exists(RAW_DATA_PATH):
+        print(f"❌ Error: Dataset not found at {RAW_DATA_PATH}.")
+        return False
+
+    positive_index = list(model.classes_).index(1)
+    with ChunkedTableWriter(PREDICTIONS_OUTPUT_FILE) as writer:
+        for chunk in pd.read_csv(RAW_DATA_PATH, chunksize=chunksize):
+            with track_stage("churn_score", "features", rows=len(chunk)):
+                chunk = clean_raw_churn_data(chunk)
+                X_chunk = build_feature_matrix(chunk, feature_schema)
+
+            # استدعاء واحد لـ predict_proba لكل دفعة، والتصنيف مشتق منه
+            with track_stage("churn_score", "predict_proba", rows=len(chunk)):
+                proba = model.predict_proba(X_chunk)
+            results_df = build_prediction_frame(
+                chunk['customerID'], proba[:, positive_index], model.classes_[proba.argmax(axis=1)],
+                actual=chunk['Churn'] if 'Churn' in chunk.columns else None, risk_thresholds=risk_thresholds,
+            )
+
+            with track_stage("churn_score", "write_chunk", rows=len(results_df)):
+                writer.write(results_df)
+            print(f"✅ Scored {writer.rows_written} customers so far...")
+
+    print(f"✅ Churn predictions for {writer.rows_written} customers saved to {PREDICTIONS_OUTPUT_FILE}!")
+    refresh_aggregates("churn")
+    print("--- Churn Scoring Pipeline Completed ---")
+
+
 if __name__ == "__main__":
-    run_churn_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Churn model pipeline")
+    parser.add_argument("--mode", choices=["train", "score", "tune"], default="train",
+                        help="train: retrain and evaluate on the test split; score: score the full customer base with the saved model; "
+                             "tune: successive-halving search (see churn_tuning.py)")
+    parser.add_argument("--chunksize", type=int, default=SCORING_CHUNKSIZE)
+    parser.add_argument("--sparse", action="store_true",
+                        help="train mode: keep features sparse through the split, SMOTE and the forest fit")
+    parser.add_argument("--risk-thresholds", type=float, nargs=2, default=RISK_THRESHOLDS, metavar=("MEDIUM", "HIGH"),
+                        help="churn probabilities where the medium and high risk categories start")
+    args = parser.parse_args()
+
+    if args.mode == "score":
+        run_churn_scoring_pipeline(chunksize=args.chunksize, risk_thresholds=tuple(args.risk_thresholds))
+    elif args.mode == "tune":
+        from churn_tuning import run_churn_tuning_pipeline
+        run_churn_tuning_pipeline()
+    else:
+        run_churn_pipeline(use_sparse=args.sparse, risk_thresholds=tuple(args.risk_thresholds))
@@ -0,0 +1,196 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from imblearn.over_sampling import SMOTE
+from xgboost import XGBClassifier
+from churn_model_pipeline import CHURN_MODEL_NAME, prepare_churn_training_data, register_churn_model
+from data_storage import save_table
+from feature_cache import cache_entry_path, has_cached, make_cache_key, save_cached
+from instrumentation import track_stage
+
+# ضبط المعاملات (hyperparameters) لموديل مغادرة العملاء بطريقة Successive Halving
+# كل المرشحين يبدأون بعدد قليل من الأشجار، وفي كل جولة يبقى أفضل ثلثهم فقط مع مضاعفة عدد الأشجار
+# الطيات (CV folds) مع SMOTE تُحسب مرة واحدة وتُشارك بين العمليات عبر ملف memory-mapped
+
+TUNING_OUTPUT_DIR = "data/tuning"
+LEADERBOARD_PATH = os.path.join(TUNING_OUTPUT_DIR, "churn_leaderboard.csv")
+FOLDS_CACHE_NAMESPACE = "churn_tuning_folds"
+
+SEARCH_SPACE = {
+    "random_forest": {
+        "max_depth": [None, 12, 20],
+        "min_samples_leaf": [1, 3, 5],
+        "max_features": ["sqrt", 0.5],
+    },
+    "xgboost": {
+        "max_depth": [4, 6, 8],
+        "learning_rate": [0.05, 0.1, 0.2],
+        "subsample": [0.8, 1.0],
+    },
+}
+MIN_ESTIMATORS = 25
+MAX_ESTIMATORS = 400
+HALVING_FACTOR = 3
+N_SPLITS = 3
+
+# الطيات المحملة داخل كل عملية عاملة (worker)
+_FOLDS = None
+
+
+def build_model(family, params, n_estimators):
+    # n_jobs=1 لأن التوازي يتم على مستوى المرشحين في ProcessPoolExecutor
+    if family == "random_forest":
+        return RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=1, class_weight='balanced', **params)
+    if family == "xgboost":
+        return XGBClassifier(n_estimators=n_estimators, tree_method='hist', random_state=42, n_jobs=1, eval_metric='logloss', **params)
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def build_cv_folds(X_train, y_train, n_splits=N_SPLITS):
+    """Stratified folds with SMOTE applied to each training part, as float32 arrays."""
+    X = np.asarray(X_train, dtype=np.float32)
+    y = np.asarray(y_train)
+    folds = []
+    for train_idx, val_idx in StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(X, y):
+        X_resampled, y_resampled = SMOTE(random_state=42).fit_resample(X[train_idx], y[train_idx])
+        folds.append({
+            "X_train": np.ascontiguousarray(X_resampled, dtype=np.float32),
+            "y_train": np.asarray(y_resampled),
+            "X_val": X[val_idx],
+            "y_val": y[val_idx],
+        })
+    return folds
+
+
+def get_cv_folds_path(X_train, y_train, n_splits=N_SPLITS):
+    """Return the on-disk path of the cached folds, building them on a miss."""
+    key = make_cache_key(joblib.hash((X_train, y_train)), n_splits)
+    path = cache_entry_path(FOLDS_CACHE_NAMESPACE, key)
+    # فحص وجود الملف فقط؛ العمال يقرؤون الـ folds من المسار مباشرة (mmap)
+    if not has_cached(FOLDS_CACHE_NAMESPACE, key):
+        print(f"Building {n_splits} cross-validation folds with SMOTE...")
+        save_cached(FOLDS_CACHE_NAMESPACE, key, build_cv_folds(X_train, y_train, n_splits))
+    else:
+        print("✅ Reusing cached cross-validation folds.")
+    return path
+
+
+def _init_worker(folds_path):
+    global _FOLDS
+    # mmap_mode='r': كل العمليات تقرأ نفس صفحات الذاكرة بدلاً من نسخة لكل عملية
+    _FOLDS = joblib.load(folds_path, mmap_mode='r')
+
+
+def _evaluate_candidate(task):
+    candidate_id, family, params, n_estimators = task
+    scores = []
+    start = time.perf_counter()
+    for fold in _FOLDS:
+        model = build_model(family, params, n_estimators)
+        model.fit(fold["X_train"], fold["y_train"])
+        scores.append(roc_auc_score(fold["y_val"], model.predict_proba(fold["X_val"])[:, 1]))
+    return {
+        "candidate_id": candidate_id,
+        "family": family,
+        "params": params,
+        "n_estimators": n_estimators,
+        "cv_roc_auc": float(np.mean(scores)),
+        "cv_roc_auc_std": float(np.std(scores)),
+        "fit_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def successive_halving(pool, candidates, time_budget_s=None):
+    """Run the halving rounds and return (leaderboard rows, best result)."""
+    leaderboard = []
+    survivors = list(enumerate(candidates))
+    n_estimators = MIN_ESTIMATORS
+    start = time.perf_counter()
+    round_number = 0
+
+    while True:
+        tasks = [(candidate_id, family, params, n_estimators) for candidate_id, (family, params) in survivors]
+        results = sorted(pool.map(_evaluate_candidate, tasks), key=lambda r: r["cv_roc_auc"], reverse=True)
+        for result in results:
+            leaderboard.append({"round": round_number, **result})
+        elapsed = time.perf_counter() - start
+        print(f"✅ Round {round_number}: {len(results)} candidates at {n_estimators} estimators, "
+              f"best ROC AUC {results[0]['cv_roc_auc']:.4f} ({elapsed:.1f}s elapsed)")
+
+        keep = max(1, math.ceil(len(results) / HALVING_FACTOR))
+        if len(results) == 1 or n_estimators >= MAX_ESTIMATORS:
+            return leaderboard, results[0]
+        if time_budget_s is not None and elapsed >= time_budget_s:
+            print("⚠️ Tuning time budget reached; stopping with the current best candidate.")
+            return leaderboard, results[0]
+        survivors = [(r["candidate_id"], (r["family"], r["params"])) for r in results[:keep]]
+        n_estimators = min(n_estimators * HALVING_FACTOR, MAX_ESTIMATORS)
+        round_number += 1
+
+
+@track_stage("churn_tune", "total")
+def run_churn_tuning_pipeline(n_workers=None, time_budget_s=None):
+    print("--- Starting Churn Model Tuning Pipeline ---")
+
+    # --- Step 1: Preprocessed Data and Shared CV Folds ---
+    prepared = prepare_churn_training_data(use_sparse=False)
+    if prepared is None:
+        return
+    folds_path = get_cv_folds_path(prepared['X_train'], prepared['y_train'])
+
+    # --- Step 2: Successive Halving over RandomForest and XGBoost ---
+    candidates = [(family, params) for family, grid in SEARCH_SPACE.items() for params in ParameterGrid(grid)]
+    print(f"Searching {len(candidates)} candidates with {n_workers or os.cpu_count()} worker processes...")
+    with track_stage("churn_tune", "successive_halving", rows=len(candidates)), \
+            ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(folds_path,)) as pool:
+        leaderboard, best = successive_halving(pool, candidates, time_budget_s)
+    print(f"✅ Best candidate: {best['family']} {best['params']} with {best['n_estimators']} estimators "
+          f"(CV ROC AUC {best['cv_roc_auc']:.4f})")
+
+    # --- Step 3: Refit the Best Candidate on the Full Resampled Training Set ---
+    X_train = prepared['X_train'].astype(np.float32)
+    X_test = prepared['X_test'].astype(np.float32)
+    with track_stage("churn_tune", "smote") as stage:
+        X_resampled, y_resampled = SMOTE(random_state=42).fit_resample(X_train, prepared['y_train'])
+        stage.rows = X_resampled.shape[0]
+    best_model = build_model(best['family'], best['params'], best['n_estimators'])
+    best_model.set_params(n_jobs=-1)
+    with track_stage("churn_tune", "refit", rows=X_resampled.shape[0]):
+        best_model.fit(X_resampled, y_resampled)
+    test_proba = best_model.predict_proba(X_test)[:, 1]
+    test_auc = roc_auc_score(prepared['y_test'], test_proba)
+    test_accuracy = accuracy_score(prepared['y_test'], best_model.predict(X_test))
+    print(f"✅ Test ROC AUC: {test_auc:.4f}, accuracy: {test_accuracy:.4f}")
+
+    # --- Step 4: Register the Best Model and Save the Leaderboard ---
+    version = register_churn_model(
+        best_model, prepared['feature_names'], prepared['categorical_cols'],
+        metrics={"test_accuracy": test_accuracy, "test_roc_auc": test_auc, "cv_roc_auc": best['cv_roc_auc']},
+        params={"family": best['family'], "n_estimators": best['n_estimators'], **best['params']},
+    )
+    print(f"✅ Best churn model saved as {CHURN_MODEL_NAME} {version}!")
+
+    df_leaderboard = pd.DataFrame(leaderboard)
+    df_leaderboard['params'] = df_leaderboard['params'].astype(str)
+    df_leaderboard = df_leaderboard.sort_values(['round', 'cv_roc_auc'], ascending=[False, False])
+    save_table(df_leaderboard, LEADERBOARD_PATH)
+    print(f"✅ Tuning leaderboard saved to {LEADERBOARD_PATH}")
+    print("--- Churn Model Tuning Pipeline Completed ---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving search for the churn model")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--time-budget-minutes", type=float, default=None,
+                        help="stop halving after this many minutes and keep the best candidate so far")
+    args = parser.parse_args()
+    budget = args.time_budget_minutes * 60 if args.time_budget_minutes is not None else None
+    run_churn_tuning_pipeline(n_workers=args.workers, time_budget_s=budget)
@@ -1,82 +1,113 @@
 import datetime
 import pandas as pd
 import os
-import requests # أضفنا هذا الاستيراد لإجراء طلبات الـ API
+from data_storage import save_table
+from weather_fetcher import fetch_weather
+from instrumentation import track_stage
+import timeseries_store
 
+# قائمة المدن (مفصولة بفواصل) يمكن تعديلها عبر متغير البيئة WEATHER_LOCATIONS
+DEFAULT_WEATHER_LOCATIONS = "Jeddah"
+
+OUTPUT_DIR = "data/forecast_results"
+OUTPUT_FILE_PATH = os.path.join(OUTPUT_DIR, "weather_forecast.csv")
+HOURLY_FORECAST_FILE_PATH = os.path.join(OUTPUT_DIR, "weather_forecast_hourly.csv")
+# أسماء مجموعات البيانات في مخزن السلاسل الزمنية (data/timeseries)
+WEATHER_HISTORY_DATASET = "weather"
+WEATHER_FORECAST_DATASET = "weather_forecast"
+
+
+def get_weather_locations():
+    locations = os.environ.get("WEATHER_LOCATIONS", DEFAULT_WEATHER_LOCATIONS)
+    return [location.strip() for location in locations.split(",") if location.strip()]
+
+
+def parse_weather_results(results, fetched_at):
+    """Turn fetcher results into (current rows, hourly forecast rows, errors)."""
+    current_rows, forecast_rows, errors = [], [], []
+    for result in results:
+        location = result["location"]
+        if "error" in result:
+            errors.append(f"{location}: {result['error']}")
+            continue
+        try:
+            current = result["weather"]
+            current_rows.append({
+                "timestamp": fetched_at,
+                "location": location,
+                "temperature_celsius": current['main']['temp'],
+                "condition": current['weather'][0]['description'],
+            })
+            for item in result.get("forecast", {}).get("list", []):
+                forecast_rows.append({
+                    "forecast_time": datetime.datetime.fromtimestamp(item['dt'], tz=datetime.timezone.utc).replace(tzinfo=None),
+                    "location": location,
+                    "temperature_celsius": item['main']['temp'],
+                    "condition": item['weather'][0]['description'],
+                    "fetched_at": fetched_at,
+                })
+        except (KeyError, IndexError, TypeError) as e:
+            errors.append(f"{location}: missing key {e} in API response")
+    return current_rows, forecast_rows, errors
+
+
+@track_stage("weather", "total")
 def run_weather_model_pipeline():
     print("--- Starting Weather Model Pipeline ---")
 
-    # Define API key and city
+    # Define API key and cities
     api_key = os.environ.get("OPENWEATHER_API_KEY") # قراءة مفتاح API من متغيرات البيئة
-    city_name = "Jeddah"
-    
+    locations = get_weather_locations()
+    # نفس أساس الوقت لتوقعات الـ API (UTC)، حتى لا يختلط التوقيتان في مخزن السلاسل الزمنية
+    current_time = timeseries_store.utc_now()
+    os.makedirs(OUTPUT_DIR, exist_ok=True) # Ensure the output directory exists
+
     if not api_key:
+        # لا نكتب بيانات وهمية كأنها توقعات حقيقية؛ يبقى آخر ملف صحيح كما هو
         print("❌ Error: OPENWEATHER_API_KEY environment variable not set. Cannot fetch real weather data.")
-        print("Using dummy weather data for now.")
-        # Fallback to dummy data if API key is not set (for local testing without API key)
-        current_time = datetime.datetime.now()
-        weather_data = {
-            "timestamp": [current_time],
-            "location": [city_name],
-            "temperature_celsius": [25.0], # Fallback value
-            "condition": ["Unknown"]
-        }
-    else:
-        # Construct API URL for current weather data
-        # Using 'weather' endpoint for current data, or 'forecast' for future
-        # For simplicity, we'll use current weather for a daily snapshot
-        api_url = f"http://api.openweathermap.org/data/2.5/weather?q={city_name}&appid={api_key}&units=metric"
-        
-        print(f"Fetching weather data for {city_name} from OpenWeatherMap API...")
-        try:
-            response = requests.get(api_url)
-            response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-            weather_json = response.json()
-
-            current_time = datetime.datetime.now()
-            temperature = weather_json['main']['temp']
-            condition = weather_json['weather'][0]['description']
-            
-            weather_data = {
-                "timestamp": [current_time],
-                "location": [city_name],
-                "temperature_celsius": [temperature],
-                "condition": [condition]
-            }
-            print("✅ Weather data fetched successfully from OpenWeatherMap API!")
+        print("❌ Keeping the previous weather forecast file.")
+        print("--- Weather Model Pipeline Completed ---")
+        return False
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching weather data from API: {e}")
-            print("Using dummy weather data as a fallback due to API error.")
-            current_time = datetime.datetime.now()
-            weather_data = {
-                "timestamp": [current_time],
-                "location": [city_name],
-                "temperature_celsius": [25.0], # Fallback value
-                "condition": ["API Error / Unknown"]
-            }
-        except KeyError as e:
-            print(f"❌ Error parsing API response: Missing key {e}. Response: {weather_json}")
-            print("Using dummy weather data as a fallback due to parsing error.")
-            current_time = datetime.datetime.now()
-            weather_data = {
-                "timestamp": [current_time],
-                "location": [city_name],
-                "temperature_celsius": [25.0], # Fallback value
-                "condition": ["Parsing Error / Unknown"]
-            }
+    # جلب الطقس الحالي والتوقعات لكل المدن بالتوازي (مع إعادة المحاولة والذاكرة المؤقتة)
+    print(f"Fetching current weather and forecasts for {len(locations)} locations from OpenWeatherMap API...")
+    with track_stage("weather", "fetch", rows=len(locations)):
+        results = fetch_weather(locations, api_key)
+    cached = sum(1 for result in results if result.get("from_cache"))
+    current_rows, forecast_rows, errors = parse_weather_results(results, current_time)
+    for error in errors:
+        print(f"❌ Error fetching weather data: {error}")
 
-    # Define output directory and file path
-    output_dir = "data/forecast_results"
-    output_file_path = os.path.join(output_dir, "weather_forecast.csv")
-    os.makedirs(output_dir, exist_ok=True) # Ensure the output directory exists
+    if not current_rows:
+        # لا نكتب بيانات وهمية عند فشل الـ API؛ يبقى آخر ملف صحيح كما هو
+        print("❌ No weather data could be fetched; keeping the previous weather forecast file.")
+        print("--- Weather Model Pipeline Completed ---")
+        return False
+    print(f"✅ Weather data fetched for {len(current_rows)}/{len(locations)} locations ({cached} served from cache).")
 
-    # Create DataFrame and save to CSV
-    df_weather = pd.DataFrame(weather_data)
-    df_weather.to_csv(output_file_path, index=False)
+    # Create DataFrames and save to CSV + Parquet
+    with track_stage("weather", "save", rows=len(current_rows) + len(forecast_rows)):
+        save_table(pd.DataFrame(current_rows), OUTPUT_FILE_PATH)
+        if forecast_rows:
+            save_table(pd.DataFrame(forecast_rows), HOURLY_FORECAST_FILE_PATH)
+    print(f"✅ Weather forecast saved to: {OUTPUT_FILE_PATH}")
+    if forecast_rows:
+        print(f"✅ Hourly forecast ({len(forecast_rows)} rows) saved to: {HOURLY_FORECAST_FILE_PATH}")
 
-    print(f"✅ Weather forecast saved to: {output_file_path}")
+    # إضافة القراءات إلى السجل التاريخي بدلاً من استبداله، حتى يعرض الرسم البياني تاريخاً كاملاً
+    with track_stage("weather", "timeseries_append") as stage:
+        appended = timeseries_store.append_points(WEATHER_HISTORY_DATASET, pd.DataFrame(current_rows))
+        if forecast_rows:
+            df_forecast = pd.DataFrame(forecast_rows).rename(columns={"forecast_time": timeseries_store.TIME_COLUMN})
+            appended += timeseries_store.append_points(WEATHER_FORECAST_DATASET, df_forecast)
+        stage.rows = appended
+    for dataset in (WEATHER_HISTORY_DATASET, WEATHER_FORECAST_DATASET):
+        with track_stage("weather", f"maintain_{dataset}"):
+            removed, merged = timeseries_store.maintain(dataset)
+        if removed or merged:
+            print(f"✅ Time-series '{dataset}': {removed} expired partitions removed, {merged} daily partitions compacted.")
+    print(f"✅ {appended} weather points appended to {timeseries_store.TIMESERIES_ROOT}")
     print("--- Weather Model Pipeline Completed ---")
 
 if __name__ == "__main__":
-    run_weather_model_pipeline()
\ No newline at end of file
+    run_weather_model_pipeline()
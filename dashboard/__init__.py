@@ -0,0 +1,17 @@
+import importlib
+
+# أقسام لوحة التحكم: العنوان الظاهر في القائمة -> الوحدة (module) داخل الحزمة dashboard
+# كل قسم يُستورد فقط عند اختياره لأول مرة، فلا يدفع المستخدم زمن استيراد أقسام (ومكتبات) لا يفتحها
+SECTIONS = {
+    "لوحة البيانات العامة للمديرين": "overview",
+    "توقع الطلب": "demand",
+    "محرك التسعير الديناميكي": "pricing",
+    "تحليل رضا العملاء والمشاعر": "sentiment",
+    "توقع مغادرة العملاء": "churn",
+    "أداء الـ Pipelines": "performance",
+}
+
+
+def render_section(title):
+    """Import the section module for ``title`` (once per process) and render it."""
+    importlib.import_module(f"{__name__}.{SECTIONS[title]}").render()
@@ -0,0 +1,108 @@
+import streamlit as st
+from aggregates import RISK_CATEGORY_ORDER, churn_aggregates
+from churn_explorer import (
+    CUSTOMER_FEATURE_COLUMNS, DEFAULT_PAGE_SIZE, EXPLORER_COLUMNS, ChurnExplorer, index_customer_features,
+    with_customer_features,
+)
+from dashboard.loaders import counts_frame, get_frame_cache, load_csv, load_section_aggregates, show_chart
+from data_storage import load_table
+from dashboard.plotting import bar_chart, pyplot
+from model_registry import active_meta
+
+# قسم 5 - توقع مغادرة العملاء
+
+# ملف العملاء الأصلي: مصدر ميزات العميل المعروضة بجانب التوقعات
+CUSTOMERS_PATH = "data/raw/WA_Fn-UseC_-Telco-Customer-Churn.csv"
+
+@st.cache_resource(max_entries=2)
+def get_churn_explorer(fingerprint, _df):
+    # الفهرس (الترتيب حسب الاحتمالية) يُبنى مرة واحدة لكل نسخة من ملف التوقعات، ومشترك بين الجلسات
+    return ChurnExplorer(_df)
+
+
+def _read_customer_features(path, columns):
+    return index_customer_features(load_table(path, columns=list(columns)))
+
+
+def load_customer_features():
+    # الفهرس (customerID -> الميزات) مشترك بين الجلسات ويُعاد بناؤه فقط إذا تغير ملف العملاء
+    try:
+        return get_frame_cache().get(CUSTOMERS_PATH, _read_customer_features,
+                                     columns=("customerID",) + CUSTOMER_FEATURE_COLUMNS)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def render():
+    st.header("🚪 العملاء المتوقع مغادرتهم")
+    # الإصدار النشط من موديل المغادرة في سجل الموديلات (models/registry/churn_classifier)
+    model_meta = active_meta("churn_classifier")
+    if model_meta:
+        auc = model_meta["metrics"].get("test_roc_auc")
+        st.caption(f"🧠 إصدار الموديل: {model_meta['version']} (تدريب {model_meta['created_at']})"
+                   + (f" — ROC AUC: {auc:.3f}" if auc is not None else ""))
+    df_churn = load_csv("data/predictions/churn_predictions.csv", columns=EXPLORER_COLUMNS)
+
+    if df_churn.empty:
+        st.warning("لا توجد بيانات حالياً عن مغادرة العملاء.")
+    else:
+        explorer = get_churn_explorer(df_churn.attrs.get('fingerprint'), df_churn)
+        customer_features = load_customer_features()
+
+        # --- مستكشف العملاء: فلترة وترتيب وتصفح صفحة بصفحة (المتصفح يستقبل صفحة واحدة فقط) ---
+        st.subheader("🔎 مستكشف العملاء")
+        col_filter1, col_filter2, col_filter3 = st.columns([2, 2, 1])
+        with col_filter1:
+            selected_risks = st.multiselect("فئة المخاطرة", explorer.risk_categories, default=explorer.risk_categories)
+        with col_filter2:
+            prob_range = st.slider("نطاق احتمالية المغادرة", 0.0, 1.0, (0.0, 1.0), step=0.01)
+        with col_filter3:
+            ascending = st.radio("الترتيب", ["الأعلى أولاً", "الأقل أولاً"]) == "الأقل أولاً"
+
+        result = explorer.query(selected_risks, prob_range[0], prob_range[1], ascending=ascending)
+        col_page1, col_page2 = st.columns(2)
+        with col_page1:
+            page_size = st.selectbox("عدد العملاء في الصفحة", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1)
+        with col_page2:
+            page_number = st.number_input(f"الصفحة (من {result.page_count(page_size)})", min_value=1,
+                                          max_value=result.page_count(page_size), value=1, step=1)
+        st.caption(f"{len(result):,} عميل مطابق من أصل {len(explorer):,}")
+        st.dataframe(with_customer_features(result.page(page_number, page_size), customer_features), hide_index=True)
+
+        with st.expander("🚨 العملاء الأكثر عرضة للمغادرة (Top-K)"):
+            top_k = st.number_input("عدد العملاء", min_value=1, max_value=1000, value=20, step=10)
+            st.dataframe(with_customer_features(explorer.top_k(top_k), customer_features), hide_index=True)
+
+        churn_agg = load_section_aggregates("churn")
+        if churn_agg is None:
+            # لا يوجد ملخص صالح؛ يُحسب من جدول التوقعات المحمّل أعلاه
+            churn_agg = churn_aggregates(df_churn)
+        churn_counts = churn_agg["predicted_churn_counts"]
+        st.info(f"📌 عدد العملاء المتوقع مغادرتهم: **{churn_counts['1']}**")
+
+        st.subheader("رسم بياني: توقعات المغادرة")
+        df_churn_counts = counts_frame(churn_counts, "Predicted_Churn")
+        def draw_churn_pie():
+            plt = pyplot()
+            fig_churn_pred, ax_churn_pred = plt.subplots(figsize=(8, 6))
+            ax_churn_pred.pie(df_churn_counts['count'], labels=['مستقر', 'مغادر متوقع'], autopct='%1.1f%%', startangle=90, colors=['lightgreen', 'salmon'])
+            ax_churn_pred.set_title('توزيع العملاء حسب توقع المغادرة')
+            return fig_churn_pred
+        show_chart("churn_pie", draw_churn_pie, df_churn_counts)
+        
+        st.subheader("رسم بياني: توزيع العملاء حسب فئة المخاطرة")
+        if churn_agg["risk_category_counts"]:
+            df_risk_counts = counts_frame(churn_agg["risk_category_counts"], "Risk_Category")
+            def draw_risk_categories():
+                plt = pyplot()
+                fig_risk, ax_risk = plt.subplots(figsize=(10, 6))
+                risk_counts = df_risk_counts.set_index('Risk_Category')['count'].reindex(RISK_CATEGORY_ORDER, fill_value=0)
+                bar_chart(ax_risk, risk_counts.index, risk_counts.to_numpy(), 'coolwarm')
+                ax_risk.set_title('توزيع العملاء حسب فئة المخاطرة')
+                ax_risk.set_xlabel('فئة المخاطرة')
+                ax_risk.set_ylabel('العدد')
+                plt.xticks(rotation=45, ha='right')
+                return fig_risk
+            show_chart("churn_risk_counts", draw_risk_categories, df_risk_counts)
+        else:
+            st.warning("عمود 'فئة المخاطرة' غير موجود في بيانات توقعات المغادرة.")
@@ -0,0 +1,114 @@
+import streamlit as st
+import pandas as pd
+import timeseries_store
+from dashboard.loaders import load_csv, show_chart
+from dashboard.plotting import pyplot
+
+# قسم 2 - توقع الطلب (الطقس + توقع الحجوزات لكل فرع)
+
+DEMAND_FORECAST_COLUMNS = ("date", "rental_branch", "car_category", "actual_bookings", "forecast_bookings", "is_forecast")
+ALL_CATEGORIES = "كل الفئات"
+
+@st.cache_data(ttl=300)
+def load_timeseries(dataset, start, end, max_points=timeseries_store.DEFAULT_MAX_POINTS):
+    # القراءة من مخزن السلاسل الزمنية مخفّضة مسبقاً إلى دقة الرسم، فلا يتم تحميل نقاط لا يمكن عرضها
+    return timeseries_store.read_range(dataset, start, end, columns=["temperature_celsius"], max_points=max_points)
+
+
+def demand_by_date(df_demand, branch, category):
+    """Actual and forecast bookings per day of one branch (one category, or all categories summed)."""
+    rows = df_demand[df_demand['rental_branch'] == branch]
+    if category != ALL_CATEGORIES:
+        rows = rows[rows['car_category'] == category]
+    daily = rows.groupby('date').agg(
+        actual_bookings=('actual_bookings', lambda values: values.sum(min_count=1)),
+        forecast_bookings=('forecast_bookings', 'sum'), is_forecast=('is_forecast', 'all'),
+    )
+    return daily.reset_index()
+
+
+def render_demand_forecast():
+    st.subheader("📈 توقع الحجوزات لكل فرع مقابل الفعلي")
+    df_demand = load_csv("data/forecast_results/demand_forecast.csv", columns=DEMAND_FORECAST_COLUMNS)
+    if df_demand.empty:
+        st.info("لا توجد توقعات للطلب بعد (demand_forecast_pipeline.py).")
+        return
+
+    col_branch, col_category = st.columns(2)
+    with col_branch:
+        branch = st.selectbox("الفرع", list(df_demand['rental_branch'].unique()))
+    with col_category:
+        category = st.selectbox("فئة السيارة", [ALL_CATEGORIES] + list(df_demand['car_category'].unique()))
+    df_daily = demand_by_date(df_demand, branch, category)
+    df_daily['date'] = pd.to_datetime(df_daily['date'])
+    past = df_daily[~df_daily['is_forecast']]
+    upcoming = df_daily[df_daily['is_forecast']]
+    error = (past['actual_bookings'] - past['forecast_bookings']).abs().mean()
+    st.caption(f"متوسط الخطأ المطلق في آخر {len(past)} يوماً: {error:.1f} حجز يومياً — "
+               f"إجمالي المتوقع للأيام الـ {len(upcoming)} القادمة: {upcoming['forecast_bookings'].sum():,.0f} حجز")
+
+    def draw_demand_forecast():
+        plt = pyplot()
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.plot(past['date'], past['actual_bookings'], color='black', label='الفعلي')
+        ax.plot(past['date'], past['forecast_bookings'], color='tab:blue', linestyle='--', label='توقع الموديل')
+        ax.plot(upcoming['date'], upcoming['forecast_bookings'], color='tab:orange', marker='o', linestyle='--', label='التوقع القادم')
+        if not upcoming.empty:
+            ax.axvline(upcoming['date'].iloc[0], color='gray', linestyle=':')
+        ax.legend(loc='upper left', fontsize=8)
+        ax.set_title(f'الحجوزات اليومية: {branch} ({category})')
+        ax.set_xlabel('التاريخ')
+        ax.set_ylabel('عدد الحجوزات')
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        return fig
+    show_chart(("demand_forecast", branch, category), draw_demand_forecast, df_daily)
+
+
+def render():
+    st.header("🌤️ توقعات الطقس وتأثيرها على الطلب")
+
+    df_weather = load_csv("data/forecast_results/weather_forecast.csv")
+
+    if df_weather.empty:
+        st.warning("لم يتم العثور على بيانات الطقس.")
+    else:
+        st.dataframe(df_weather)
+        latest = df_weather.iloc[-1]
+        st.success(f"""آخر تحديث:
+        - الموقع: **{latest['location']}**
+        - التاريخ: **{latest['timestamp']} UTC**
+        - درجة الحرارة: **{latest['temperature_celsius']}°C**
+        - الحالة: **{latest['condition']}**
+        """)
+        
+        st.subheader("رسم بياني: درجات الحرارة المتوقعة")
+        ranges = {"آخر 7 أيام": 7, "آخر 30 يوماً": 30, "آخر سنة": 365}
+        range_label = st.radio("الفترة الزمنية", list(ranges.keys()), horizontal=True)
+        # تقريب الوقت إلى الساعة حتى تستفيد القراءات المتتالية من الذاكرة المؤقتة
+        # أوقات مخزن السلاسل الزمنية بتوقيت UTC
+        now = pd.Timestamp(timeseries_store.utc_now()).floor("h")
+        df_history = load_timeseries("weather", now - pd.Timedelta(days=ranges[range_label]), now + pd.Timedelta(hours=1))
+        df_upcoming = load_timeseries("weather_forecast", now, now + pd.Timedelta(days=6))
+
+        def draw_temperatures():
+            plt = pyplot()
+            fig, ax = plt.subplots(figsize=(10, 5))
+            if df_history.empty and df_upcoming.empty:
+                # لا يوجد سجل تاريخي بعد: عرض آخر ملف كما هو
+                ax.plot(df_weather['timestamp'], df_weather['temperature_celsius'], marker='o', linestyle='-', color='skyblue')
+            else:
+                for location, points in df_history.groupby('location'):
+                    ax.plot(points['timestamp'], points['temperature_celsius'], linestyle='-', label=f"{location}")
+                for location, points in df_upcoming.groupby('location'):
+                    ax.plot(points['timestamp'], points['temperature_celsius'], linestyle='--', label=f"{location} (توقع)")
+                ax.legend(loc='upper left', fontsize=8)
+            ax.set_title('توقع درجات الحرارة عبر الوقت')
+            ax.set_xlabel('التاريخ والوقت (UTC)')
+            ax.set_ylabel('درجة الحرارة (°C)')
+            plt.xticks(rotation=45, ha='right')
+            plt.tight_layout()
+            return fig
+        show_chart(("temperature_history", range_label), draw_temperatures, df_weather, df_history, df_upcoming)
+
+    render_demand_forecast()
@@ -0,0 +1,64 @@
+import streamlit as st
+import pandas as pd
+from aggregates import AGGREGATE_SOURCES, load_aggregates
+from chart_cache import ChartCache, data_fingerprint
+from dashboard_cache import FrameCache
+from data_storage import load_table
+from dashboard.plotting import chart_theme
+
+# القراءات والذاكرات المؤقتة المشتركة بين أقسام لوحة التحكم
+# (القراءات الخاصة بقسم واحد موجودة في وحدة ذلك القسم)
+
+
+@st.cache_resource
+def get_frame_cache():
+    # ذاكرة مؤقتة واحدة مشتركة بين كل الجلسات؛ تعيد تحميل أي ملف تغيّر على القرص تلقائياً
+    return FrameCache()
+
+def _read_frame(path, columns):
+    df = load_table(path, columns=list(columns) if columns is not None else None)
+    # محاولة تحويل عمود التاريخ إذا كان موجودًا
+    if 'timestamp' in df.columns:
+        try:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        except Exception as e:
+            st.warning(f"تحذير: لا يمكن تحويل عمود 'timestamp' إلى تاريخ: {e}")
+    return df
+
+def load_csv(path, columns=None):
+    # columns: مجموعة (tuple) الأعمدة المطلوبة فقط، تُقرأ من ملف Parquet المرافق إن وُجد
+    # الجدول المُرجع مشترك بين الجلسات: يجب عدم تعديله (استخدم .copy() عند الحاجة)
+    try:
+        df = get_frame_cache().get(path, _read_frame, columns=columns)
+    except Exception as e:
+        st.error(f"❌ خطأ في تحميل ملف البيانات من {path}: {e}", icon="❌")
+        return pd.DataFrame()
+    if df is None:
+        st.warning(f"⚠️ ملف البيانات غير موجود: {path}", icon="⚠️")
+        return pd.DataFrame() # إرجاع DataFrame فارغ إذا لم يتم العثور على الملف
+    return df
+
+def load_section_aggregates(name):
+    # الملخص الذي كتبه الـ pipeline (عدد المجموعات فقط)؛ إن لم يوجد بعد يُحسب من الملف المصدر
+    aggregates = load_aggregates(name)
+    if aggregates is None:
+        source_path, columns, summarize = AGGREGATE_SOURCES[name]
+        df = load_csv(source_path, columns=tuple(columns))
+        if df.empty:
+            return None
+        aggregates = summarize(df)
+    return aggregates
+
+def counts_frame(counts, label_col, value_col="count"):
+    return pd.DataFrame({label_col: list(counts.keys()), value_col: list(counts.values())})
+
+@st.cache_resource
+def get_chart_cache():
+    # صور الرسوم البيانية مشتركة بين الجلسات وإعادات التشغيل؛ تُرسم من جديد فقط إذا تغيرت البيانات
+    return ChartCache()
+
+def show_chart(spec, draw, *frames):
+    # spec: وصف الرسم (الاسم + أي خيارات تؤثر عليه)، draw: دالة ترجع Figure ولا تُستدعى إلا عند عدم وجود صورة محفوظة
+    # (matplotlib و seaborn يُستوردان داخل draw فقط، أي عند الرسم الفعلي)
+    png = get_chart_cache().get_or_render(spec, data_fingerprint(*frames), draw, context=chart_theme)
+    st.image(png, width="stretch")
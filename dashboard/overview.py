@@ -0,0 +1,71 @@
+import streamlit as st
+from aggregates import kpi_delta
+from dashboard.loaders import counts_frame, load_section_aggregates, show_chart
+from dashboard.plotting import bar_chart, pyplot
+
+# قسم 1 - لوحة المدير العامة (إضافة رسوم بيانية ملخصة إذا توفرت البيانات)
+
+
+def render():
+    st.title("📊 لوحة تحكم حلول الذكاء الاصطناعي المتكاملة")
+    st.markdown("مرحبًا بك في لوحة تحكم الذكاء الاصطناعي المتكاملة لتأجير السيارات.")
+
+    col1, col2, col3, col4 = st.columns(4)
+    churn_agg = load_section_aggregates("churn")
+    sentiment_agg = load_section_aggregates("sentiment")
+    pricing_agg = load_section_aggregates("pricing")
+
+    # مؤشرات حقيقية من آخر تشغيل لكل pipeline، والفرق (delta) مقارنة بالتشغيل السابق
+    def show_kpi(column, label, aggregates, key, fmt, delta_fmt, delta_color="normal"):
+        if aggregates is None:
+            column.metric(label, "—")
+            return
+        delta = kpi_delta(aggregates, key)
+        column.metric(label, fmt(aggregates["kpis"][key]), None if delta is None else delta_fmt(delta), delta_color=delta_color)
+
+    show_kpi(col1, "معدل مغادرة العملاء المتوقع", churn_agg, "predicted_churn_rate",
+             lambda v: f"{v:.1%}", lambda d: f"{d * 100:+.1f} نقطة", delta_color="inverse")
+    show_kpi(col2, "عملاء عالي المخاطرة", churn_agg, "high_risk_customers",
+             lambda v: f"{v:,}", lambda d: f"{d:+,}", delta_color="inverse")
+    show_kpi(col3, "نسبة التعليقات الإيجابية", sentiment_agg, "positive_share",
+             lambda v: f"{v:.1%}", lambda d: f"{d * 100:+.1f} نقطة")
+    show_kpi(col4, "متوسط السعر المقترح", pricing_agg, "mean_suggested_price",
+             lambda v: f"{v:,.0f} ريال", lambda d: f"{d:+,.1f} ريال")
+
+    st.markdown("### نظرة عامة على أقسام الحلول الذكية:")
+    st.markdown("""
+    1. **قسم "توقع الطلب"**: يعرض التوقعات اليومية للطقس ومدى تأثيرها على الطلب.
+    2. **قسم "محرك التسعير الديناميكي"**: يقترح أسعار مثالية حسب الفروع والأيام.
+    3. **قسم "تحليل المشاعر"**: يستعرض نتائج تحليل تعليقات العملاء (إيجابية/سلبية).
+    4. **قسم "توقع مغادرة العملاء"**: يعرض العملاء المتوقع مغادرتهم قريبًا.
+    """)
+
+    # --- رسوم بيانية ملخصة عامة (من ملفات الملخصات data/aggregates) ---
+    st.subheader("ملخص أداء الموديلات")
+
+    # توزيع توقعات مغادرة العملاء
+    if churn_agg is not None:
+        df_churn_counts = counts_frame(churn_agg["predicted_churn_counts"], "Predicted_Churn")
+        df_churn_counts['Predicted_Churn'] = df_churn_counts['Predicted_Churn'].map({"0": 'مستقر', "1": 'مغادر متوقع'})
+        def draw_churn_overview():
+            plt = pyplot()
+            fig1, ax1 = plt.subplots(figsize=(6, 4))
+            bar_chart(ax1, df_churn_counts['Predicted_Churn'], df_churn_counts['count'], 'viridis')
+            ax1.set_title('توزيع توقعات مغادرة العملاء')
+            ax1.set_xlabel('توقع المغادرة')
+            ax1.set_ylabel('عدد العملاء')
+            return fig1
+        show_chart("overview_churn_counts", draw_churn_overview, df_churn_counts)
+
+    # توزيع مشاعر العملاء
+    if sentiment_agg is not None:
+        df_sentiment_counts = counts_frame(sentiment_agg["sentiment_counts"], "sentiment")
+        def draw_sentiment_overview():
+            plt = pyplot()
+            fig2, ax2 = plt.subplots(figsize=(6, 4))
+            bar_chart(ax2, df_sentiment_counts['sentiment'], df_sentiment_counts['count'], 'coolwarm')
+            ax2.set_title('توزيع مشاعر العملاء')
+            ax2.set_xlabel('المشاعر')
+            ax2.set_ylabel('عدد التعليقات')
+            return fig2
+        show_chart("overview_sentiment_counts", draw_sentiment_overview, df_sentiment_counts)
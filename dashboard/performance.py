@@ -0,0 +1,73 @@
+import streamlit as st
+from instrumentation import METRICS_LOG_PATH, find_regressions, load_stage_metrics, summarize_runs
+from dashboard.loaders import get_frame_cache, show_chart
+from dashboard.plotting import pyplot, seaborn
+
+# قسم 6 - أداء الـ pipelines (زمن وذاكرة كل مرحلة عبر التشغيلات)
+
+def load_stage_metrics_frame():
+    # سجل قياسات المراحل (JSONL) عبر نفس الذاكرة المؤقتة، فيُعاد قراءته فقط عندما يضيف تشغيل جديد أسطراً
+    return get_frame_cache().get(METRICS_LOG_PATH, lambda path, columns: load_stage_metrics(path))
+
+
+def render():
+    st.header("⏱️ أداء الـ Pipelines")
+    df_metrics = load_stage_metrics_frame()
+
+    if df_metrics is None or df_metrics.empty:
+        st.warning(f"لا توجد قياسات بعد. تُسجَّل تلقائياً في {METRICS_LOG_PATH} عند تشغيل أي pipeline.")
+    else:
+        col_p1, col_p2 = st.columns([2, 1])
+        with col_p1:
+            pipeline = st.selectbox("الـ pipeline", sorted(df_metrics['pipeline'].unique()))
+        runs = summarize_runs(df_metrics, pipeline)
+        run_count = runs['run_id'].nunique()
+        with col_p2:
+            last_runs = st.number_input("آخر عدد من التشغيلات", min_value=1, max_value=max(run_count, 1),
+                                        value=min(run_count, 30), step=1)
+        recent_run_ids = runs.drop_duplicates('run_id')['run_id'].iloc[-last_runs:]
+        runs = runs[runs['run_id'].isin(recent_run_ids)]
+
+        # تنبيه عند تباطؤ مرحلة في آخر تشغيل مقارنة بوسيطها في التشغيلات السابقة
+        regressions = find_regressions(runs)
+        for row in regressions.itertuples():
+            st.warning(f"⚠️ المرحلة **{row.stage}** استغرقت {row.wall_s:.2f}s في آخر تشغيل "
+                       f"مقابل {row.median_wall_s:.2f}s في المعتاد.")
+
+        latest = runs[runs['run_id'] == recent_run_ids.iloc[-1]]
+        total = latest[latest['stage'] == 'total']
+        col_m1, col_m2, col_m3 = st.columns(3)
+        col_m1.metric("آخر تشغيل", str(latest['run_started_at'].iloc[0]))
+        col_m2.metric("الزمن الكلي (ثانية)", f"{total['wall_s'].iloc[0]:.2f}" if len(total) else "—")
+        col_m3.metric("أعلى ذاكرة (MB)", f"{latest['peak_rss_mb'].max():.0f}")
+
+        stages = runs[runs['stage'] != 'total']
+        st.subheader("رسم بياني: زمن كل مرحلة عبر التشغيلات")
+        def draw_stage_durations():
+            plt = pyplot()
+            sns = seaborn()
+            fig_stages, ax_stages = plt.subplots(figsize=(12, 6))
+            sns.lineplot(x='run_started_at', y='wall_s', hue='stage', data=stages, marker='o', ax=ax_stages)
+            ax_stages.set_title(f'زمن مراحل {pipeline} (ثانية)')
+            ax_stages.set_xlabel('وقت التشغيل')
+            ax_stages.set_ylabel('الزمن (ثانية)')
+            plt.xticks(rotation=45, ha='right')
+            return fig_stages
+        show_chart(("stage_durations", pipeline, int(last_runs)), draw_stage_durations, stages)
+
+        st.subheader("رسم بياني: أعلى استهلاك للذاكرة في كل تشغيل")
+        def draw_peak_memory():
+            plt = pyplot()
+            sns = seaborn()
+            fig_memory, ax_memory = plt.subplots(figsize=(12, 4))
+            sns.lineplot(x='run_started_at', y='peak_rss_mb', hue='stage', data=stages, marker='o', ax=ax_memory)
+            ax_memory.set_xlabel('وقت التشغيل')
+            ax_memory.set_ylabel('الذاكرة (MB)')
+            plt.xticks(rotation=45, ha='right')
+            return fig_memory
+        show_chart(("stage_memory", pipeline, int(last_runs)), draw_peak_memory, stages)
+
+        st.subheader("تفاصيل آخر تشغيل")
+        latest_table = latest[['stage', 'wall_s', 'cpu_s', 'peak_rss_mb', 'rows', 'calls', 'errors']].copy()
+        latest_table['rows_per_s'] = (latest_table['rows'] / latest_table['wall_s']).where(latest_table['rows'] > 0).round(0)
+        st.dataframe(latest_table, hide_index=True)
@@ -0,0 +1,39 @@
+import contextlib
+import functools
+
+# matplotlib و seaborn أثقل المكتبات في لوحة التحكم (أكثر من ثانيتين عند الاستيراد)،
+# لذلك لا تُستورد إلا داخل دوال الرسم، وهذه لا تُستدعى إلا عندما لا توجد صورة محفوظة للرسم في ChartCache
+
+
+def pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def seaborn():
+    import seaborn as sns
+    return sns
+
+
+@functools.lru_cache(maxsize=None)
+def _apply_theme():
+    # يُطبق مرة واحدة لكل عملية، عند أول رسم فعلي (نفس إعدادات اللوحة قبل تقسيمها إلى أقسام)
+    seaborn().set_theme(style="whitegrid")
+    pyplot().rcParams.update({'font.size': 10, 'axes.labelsize': 10, 'xtick.labelsize': 8, 'ytick.labelsize': 8})
+
+
+@contextlib.contextmanager
+def chart_theme():
+    """Apply the dashboard's chart style (seaborn whitegrid) before a figure is drawn and saved."""
+    _apply_theme()
+    yield
+
+
+def color_palette(name):
+    return seaborn().color_palette(name)
+
+
+def bar_chart(ax, labels, values, palette):
+    """One colored bar per label with the seaborn ``palette``."""
+    labels = [str(label) for label in labels]
+    seaborn().barplot(x=labels, y=list(values), hue=labels, palette=palette, legend=False, ax=ax)
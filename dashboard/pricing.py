@@ -0,0 +1,68 @@
+import streamlit as st
+from aggregates import pricing_aggregates
+from price_quote_service import PRICES_PATH, PriceQuoteService
+from dashboard.loaders import counts_frame, load_csv, load_section_aggregates, show_chart
+from dashboard.plotting import bar_chart, pyplot
+
+# قسم 3 - التسعير الديناميكي
+
+@st.cache_resource
+def get_price_service():
+    # فهرس أسعار واحد مشترك بين كل الجلسات، ويُعاد تحميله تلقائياً عند تحديث ملف الأسعار
+    return PriceQuoteService(PRICES_PATH)
+
+
+def render():
+    st.header("💲 محرك التسعير الديناميكي لتأجير السيارات")
+    df_optimal = load_csv(PRICES_PATH, columns=("car_category", "rental_branch", "day_of_week", "suggested_price"))
+
+    if df_optimal.empty:
+        st.warning("لا توجد بيانات أسعار مثلى حالياً.")
+        st.stop() # إيقاف التطبيق هنا إذا لم تكن هناك بيانات
+
+    col1, col2 = st.columns(2)
+    with col1:
+        car_category = st.selectbox("فئة السيارة", df_optimal['car_category'].unique())
+        branch = st.selectbox("الفرع", df_optimal['rental_branch'].unique())
+    with col2:
+        day = st.selectbox("اليوم من الأسبوع", df_optimal['day_of_week'].unique()) # تصحيح اسم العمود هنا
+
+    if st.button("اقتراح السعر الأمثل"):
+        suggested_price = get_price_service().quote(car_category, branch, day)
+        if suggested_price is not None:
+            st.success(f"السعر المقترح الأمثل: {suggested_price:.2f} ريال/يوم")
+            st.write("*(هذا السعر مستخرج من البيانات التي حسبها موديل التسعير الديناميكي)*")
+        else:
+            st.warning("لم يتم العثور على سعر مقترح لهذه المجموعة من الخيارات. يرجى التحقق من بيانات الموديل.", icon="⚠️")
+
+    st.subheader("رسم بياني: متوسط الأسعار المقترحة")
+    
+    # المتوسطات محسوبة مسبقاً في ملخص التسعير بدلاً من تجميع كل صفوف الأسعار عند كل رسم
+    pricing_agg = load_section_aggregates("pricing")
+    if pricing_agg is None:
+        # لا يوجد ملخص صالح؛ يُحسب من جدول الأسعار المحمّل أعلاه
+        pricing_agg = pricing_aggregates(df_optimal)
+    df_price_by_category = counts_frame(pricing_agg["mean_price_by_category"], "car_category", "suggested_price")
+    df_price_by_day = counts_frame(pricing_agg["mean_price_by_day"], "day_of_week", "suggested_price")
+
+    # متوسط السعر حسب فئة السيارة
+    def draw_price_by_category():
+        plt = pyplot()
+        fig_cat, ax_cat = plt.subplots(figsize=(10, 5))
+        bar_chart(ax_cat, df_price_by_category['car_category'], df_price_by_category['suggested_price'], 'Blues')
+        ax_cat.set_title('متوسط السعر المقترح حسب فئة السيارة')
+        ax_cat.set_xlabel('فئة السيارة')
+        ax_cat.set_ylabel('متوسط السعر المقترح')
+        return fig_cat
+    show_chart("price_by_category_barplot", draw_price_by_category, df_price_by_category)
+
+    # متوسط السعر حسب اليوم
+    def draw_price_by_day():
+        plt = pyplot()
+        fig_day, ax_day = plt.subplots(figsize=(10, 5))
+        bar_chart(ax_day, df_price_by_day['day_of_week'], df_price_by_day['suggested_price'], 'Greens')
+        ax_day.set_title('متوسط السعر المقترح حسب اليوم من الأسبوع')
+        ax_day.set_xlabel('اليوم من الأسبوع')
+        ax_day.set_ylabel('متوسط السعر المقترح')
+        return fig_day
+    show_chart("price_by_day_barplot", draw_price_by_day, df_price_by_day)
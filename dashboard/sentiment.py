@@ -0,0 +1,61 @@
+import streamlit as st
+import pandas as pd
+from aggregates import sentiment_aggregates
+from dashboard.loaders import counts_frame, load_csv, load_section_aggregates, show_chart
+from dashboard.plotting import color_palette, pyplot
+from data_storage import load_table
+
+# قسم 4 - تحليل المشاعر
+
+SENTIMENT_RESULTS_PATH = "data/sentiment_results/sentiment_analysis_results.csv"
+# الأعمدة التي تحتاجها الرسوم فقط؛ نصوص التعليقات تُقرأ لصفوف المعاينة فقط
+SENTIMENT_COLUMNS = ("comment_id", "analysis_date", "sentiment", "sentiment_score")
+PREVIEW_COLUMNS = ["comment_id", "comment_text", "analysis_date", "sentiment", "sentiment_score"]
+PREVIEW_ROWS = 20
+
+
+def load_preview(path, nrows=PREVIEW_ROWS):
+    try:
+        return load_table(path, columns=PREVIEW_COLUMNS, nrows=nrows)
+    except Exception as e:
+        st.error(f"❌ خطأ في تحميل التعليقات من {path}: {e}", icon="❌")
+        return pd.DataFrame()
+
+
+def render():
+    st.header("🗣️ تحليل مشاعر العملاء من التعليقات")
+    df_sentiment = load_csv(SENTIMENT_RESULTS_PATH, columns=SENTIMENT_COLUMNS)
+
+    if df_sentiment.empty:
+        st.warning("لا توجد بيانات تحليل مشاعر حالياً.")
+    else:
+        st.dataframe(load_preview(SENTIMENT_RESULTS_PATH)) # عرض أول 20 تعليق
+        
+        sentiment_agg = load_section_aggregates("sentiment")
+        if sentiment_agg is None:
+            # لا يوجد ملخص صالح؛ يُحسب من جدول المشاعر المحمّل أعلاه
+            sentiment_agg = sentiment_aggregates(df_sentiment)
+        df_sentiment_counts = counts_frame(sentiment_agg["sentiment_counts"], "sentiment")
+        histogram = sentiment_agg["score_histogram"]
+        df_score_bins = pd.DataFrame({"left": histogram["edges"][:-1], "right": histogram["edges"][1:], "count": histogram["counts"]})
+
+        st.subheader("رسم بياني: توزيع المشاعر")
+        def draw_sentiment_pie():
+            plt = pyplot()
+            fig_sent, ax_sent = plt.subplots(figsize=(8, 6))
+            ax_sent.pie(df_sentiment_counts['count'], labels=df_sentiment_counts['sentiment'], autopct='%1.1f%%', startangle=90, colors=color_palette("pastel"))
+            ax_sent.set_title('توزيع المشاعر العامة')
+            return fig_sent
+        show_chart("sentiment_pie", draw_sentiment_pie, df_sentiment_counts)
+        
+        st.subheader("رسم بياني: توزيع درجات المشاعر")
+        def draw_sentiment_scores():
+            plt = pyplot()
+            fig_score, ax_score = plt.subplots(figsize=(10, 5))
+            # الأعمدة من فئات المدرج التكراري المحسوبة مسبقاً (20 فئة بين -1 و 1)
+            ax_score.bar(df_score_bins['left'], df_score_bins['count'], width=df_score_bins['right'] - df_score_bins['left'], align='edge', color='purple', alpha=0.7, edgecolor='white')
+            ax_score.set_title('توزيع درجات المشاعر')
+            ax_score.set_xlabel('درجة المشاعر (-1 سلبي جداً إلى 1 إيجابي جداً)')
+            ax_score.set_ylabel('العدد')
+            return fig_score
+        show_chart("sentiment_score_histogram", draw_sentiment_scores, df_score_bins)
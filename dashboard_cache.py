@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from data_storage import resolve_table_path
+
+# ذاكرة مؤقتة لجداول لوحة التحكم، مشتركة بين كل الجلسات (وليست نسخة لكل جلسة)
+# المفتاح = المسار + الأعمدة، ويتم التحقق من بصمة الملف (mtime_ns + الحجم) عند كل قراءة:
+# إذا أعاد pipeline كتابة الملف يتم تحميله من جديد مباشرة دون الحاجة لإعادة تشغيل لوحة التحكم
+
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+def file_signature(path):
+    """(resolved path, mtime_ns, size) of the file ``load_table`` would read, or None."""
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        return None
+    stat = os.stat(resolved)
+    return resolved, stat.st_mtime_ns, stat.st_size
+
+
+def signature_fingerprint(signature, columns=None):
+    return hashlib.sha1(repr((signature, columns)).encode('utf-8')).hexdigest()[:16]
+
+
+class FrameCache:
+    """Thread-safe LRU cache of loaded DataFrames with freshness checks, a TTL and a memory bound.
+
+    Cached frames are shared between callers and must be treated as read-only.
+    Each frame carries ``df.attrs['fingerprint']``, which changes whenever the
+    underlying file does, so derived caches can key on it.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, path, loader, columns=None):
+        """Return the frame for ``path``/``columns``, calling ``loader(path, columns)`` on a miss.
+
+        Returns None when the file does not exist.
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        key = (path, columns)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["signature"] == signature and now - entry["loaded_at"] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["frame"]
+            self.misses += 1
+            if entry is not None and entry["signature"] != signature:
+                self.reloads += 1
+
+        # التحميل خارج القفل حتى لا تنتظر باقي الجلسات ملفاً كبيراً لا تحتاجه
+        frame = loader(path, columns)
+        frame.attrs['fingerprint'] = signature_fingerprint(signature, columns)
+        # deep=True: أعمدة النصوص (التعليقات، أرقام العملاء) تُحسب بحجمها الفعلي وليس كمؤشرات 8 بايت؛ يُحسب مرة واحدة لكل تحميل
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._entries[key] = {"signature": signature, "frame": frame, "loaded_at": now, "nbytes": nbytes}
+            self._entries.move_to_end(key)
+            self._evict()
+        return frame
+
+    def _evict(self):
+        total = sum(entry["nbytes"] for entry in self._entries.values())
+        # نُبقي على الأقل آخر جدول تم تحميله حتى لو كان أكبر من الحد
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            total -= entry["nbytes"]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": sum(entry["nbytes"] for entry in self._entries.values()),
+            }
@@ -0,0 +1,168 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# طبقة تخزين مشتركة لمخرجات جميع الموديلات
+# كل ملف CSV يُكتب بجانبه ملف Parquet (عمودي، مضغوط، ومحافظ على أنواع البيانات)
+# لوحة التحكم تقرأ ملف Parquet وتحمّل الأعمدة المطلوبة فقط بدلاً من إعادة تحليل ملف CSV بالكامل
+
+PARQUET_COMPRESSION = "zstd"
+
+
+def parquet_path_for(csv_path):
+    """Return the Parquet file that sits next to a CSV output."""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _atomic_write(write_func, path):
+    # الكتابة في ملف مؤقت ثم استبداله دفعة واحدة حتى لا تقرأ لوحة التحكم ملفاً نصف مكتوب
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_table(df, csv_path, write_csv=True):
+    """Write a pipeline output as Parquet (and CSV unless disabled) and return the Parquet path."""
+    output_dir = os.path.dirname(csv_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    parquet_path = parquet_path_for(csv_path)
+    # نكتب CSV أولاً ثم Parquet، حتى يكون ملف Parquet دائماً الأحدث عند المقارنة بالتوقيت
+    if write_csv:
+        _atomic_write(lambda tmp: df.to_csv(tmp, index=False), csv_path)
+    _atomic_write(lambda tmp: df.to_parquet(tmp, index=False, compression=PARQUET_COMPRESSION), parquet_path)
+    return parquet_path
+
+
+def resolve_table_path(path):
+    """Return the freshest on-disk file for ``path`` (Parquet preferred), or None if nothing exists."""
+    parquet_path = path if path.endswith(".parquet") else parquet_path_for(path)
+    csv_path = None if path.endswith(".parquet") else path
+
+    parquet_exists = os.path.exists(parquet_path)
+    csv_exists = csv_path is not None and os.path.exists(csv_path)
+    if parquet_exists and (not csv_exists or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return parquet_path
+    if csv_exists:
+        return csv_path
+    return None
+
+
+def load_table(path, columns=None, nrows=None):
+    """Load a pipeline output, reading only ``columns`` when given.
+
+    Parquet files are memory-mapped and column-projected; a CSV is used only when
+    no up-to-date Parquet file exists. Requested columns missing from the file are
+    skipped, so callers should still check ``df.columns``. ``nrows`` reads at most
+    that many rows from the start of the file (for previews).
+    """
+    resolved = resolve_table_path(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+
+    if resolved.endswith(".parquet"):
+        if columns is not None:
+            available = set(pq.read_schema(resolved).names)
+            columns = [col for col in columns if col in available]
+        if nrows is not None:
+            # أول دفعة فقط، فلا تُقرأ باقي صفوف الملف (مثل نصوص كل التعليقات)
+            first_batch = next(pq.ParquetFile(resolved, memory_map=True).iter_batches(batch_size=nrows, columns=columns), None)
+            if first_batch is not None:
+                return first_batch.to_pandas()
+        table = pq.read_table(resolved, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    if columns is None:
+        return pd.read_csv(resolved, nrows=nrows)
+    wanted = set(columns)
+    return pd.read_csv(resolved, usecols=lambda col: col in wanted, nrows=nrows)
+
+
+class ChunkedTableWriter:
+    """Append DataFrame chunks to a CSV + Parquet output pair.
+
+    Chunks are written to temporary files and only moved into place by ``close()``,
+    so readers keep seeing the previous complete output while a long scoring run is
+    in progress. Use as a context manager; on error the temporary files are discarded.
+
+    With ``append=True`` the existing output is copied into the temporary files
+    first (a byte copy for CSV, a row-group stream for Parquet), so new chunks are
+    added after it without re-reading it into a DataFrame.
+    """
+
+    def __init__(self, csv_path, write_csv=True, append=False):
+        output_dir = os.path.dirname(csv_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.csv_path = csv_path if write_csv else None
+        self.parquet_path = parquet_path_for(csv_path)
+        self._tmp_csv = f"{csv_path}.tmp-{os.getpid()}" if write_csv else None
+        self._tmp_parquet = f"{self.parquet_path}.tmp-{os.getpid()}"
+        self._csv_has_header = False
+        self._parquet_writer = None
+        self._schema = None
+        self.rows_written = 0
+        self.rows_copied = 0
+        if append:
+            self._copy_existing()
+
+    def _copy_existing(self):
+        if self._tmp_csv is not None and os.path.exists(self.csv_path):
+            shutil.copyfile(self.csv_path, self._tmp_csv)
+            self._csv_has_header = True
+        if os.path.exists(self.parquet_path):
+            existing = pq.ParquetFile(self.parquet_path, memory_map=True)
+            self._schema = existing.schema_arrow
+            self._parquet_writer = pq.ParquetWriter(self._tmp_parquet, self._schema, compression=PARQUET_COMPRESSION)
+            for batch in existing.iter_batches():
+                self._parquet_writer.write_batch(batch)
+            self.rows_copied = existing.metadata.num_rows
+
+    def write(self, df):
+        if self._tmp_csv is not None:
+            df.to_csv(self._tmp_csv, mode="a", header=not self._csv_has_header, index=False)
+            self._csv_has_header = True
+
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(self._tmp_parquet, self._schema, compression=PARQUET_COMPRESSION)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+        self.rows_written += len(df)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        # نفس ترتيب save_table: CSV أولاً ثم Parquet
+        if self._tmp_csv is not None and os.path.exists(self._tmp_csv):
+            os.replace(self._tmp_csv, self.csv_path)
+        if os.path.exists(self._tmp_parquet):
+            os.replace(self._tmp_parquet, self.parquet_path)
+
+    def abort(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        for tmp_path in (self._tmp_csv, self._tmp_parquet):
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import timeseries_store
+from daily_forecast_pipeline import WEATHER_HISTORY_DATASET
+from data_storage import load_table, resolve_table_path, save_table
+from feature_cache import code_version
+from instrumentation import track_stage
+from price_model_pipeline import load_daily_temperatures
+from pricing_engine import COMFORT_TEMPERATURE_CELSIUS
+from synthetic_data import seasonal_temperature
+
+# توقع الطلب (عدد الحجوزات اليومية) لكل فرع × فئة سيارة
+# لكل سلسلة موديل Ridge خفيف على الحجوزات السابقة (lags) + الطقس (متوسط الحرارة اليومي) + يوم الأسبوع
+# السلاسل تُدرَّب بالتوازي على عدة عمليات، والنتائج تُكتب دفعة واحدة
+# كل موديل يحفظ مجاميعه (XᵀX و Xᵀy)، فالأيام الجديدة تُضاف إليها ويُعاد الحل مباشرة بدلاً من إعادة التدريب من الصفر
+
+# الحجوزات اليومية: date, rental_branch, car_category, bookings (بدون هذا الملف لا يُكتب أي توقع؛
+# السجل الاصطناعي في synthetic_data.py للقياسات في benchmarks/ فقط، ولا يُعرض كحجوزات فعلية)
+BOOKINGS_PATH = "data/raw/daily_bookings.csv"
+OUTPUT_DIR = "data/forecast_results"
+DEMAND_FORECAST_PATH = os.path.join(OUTPUT_DIR, "demand_forecast.csv")
+# حالة موديلات السلاسل بين التشغيلات (للتحديث التدريجي)
+MODEL_STATE_PATH = "data/demand_forecast/series_state.npz"
+
+SERIES_COLUMNS = ["rental_branch", "car_category"]
+HORIZON_DAYS = 14
+# الأيام الأخيرة من السجل التي يُكتب لها التوقع بجانب الفعلي (للمقارنة في لوحة التحكم)
+BACKTEST_DAYS = 56
+# نافذة التدريب عند إعادة التدريب الكاملة
+HISTORY_DAYS = 730
+LAGS = (1, 7, 14)
+RIDGE_ALPHA = 1.0
+MIN_TRAINING_DAYS = 28
+# بعد هذا العدد من الأيام يُعاد تدريب السلسلة بالكامل على النافذة الحالية بدلاً من الإضافة فقط
+FULL_REFIT_DAYS = 28
+# عدد السلاسل في كل مهمة ترسل إلى عملية عاملة (لتقليل تكلفة الإرسال بين العمليات)
+SERIES_PER_TASK = 16
+
+FEATURE_NAMES = ["intercept", *[f"lag_{lag}" for lag in LAGS], "mean_7",
+                 *[f"weekday_{day}" for day in range(1, 7)], "temperature", "heat_excess"]
+
+# محاور التاريخ والحرارة المشتركة بين كل السلاسل داخل كل عملية عاملة
+_DATES = None
+_TEMPERATURES = None
+_WEEKDAYS = None
+_N_HISTORY = None
+
+
+def design_matrix(y, temperature, weekday):
+    """Feature rows for every day of ``y``; rows whose lags fall before the series start are NaN."""
+    n = len(y)
+    X = np.full((n, len(FEATURE_NAMES)), np.nan)
+    X[:, 0] = 1.0
+    for column, lag in enumerate(LAGS, start=1):
+        X[lag:, column] = y[:n - lag]
+    cumulative = np.concatenate([[0.0], np.cumsum(y)])
+    X[7:, len(LAGS) + 1] = (cumulative[7:n] - cumulative[:n - 7]) / 7
+    weekday_start = len(LAGS) + 2
+    for day in range(1, 7):
+        X[:, weekday_start + day - 1] = weekday == day
+    X[:, -2] = temperature
+    X[:, -1] = np.maximum(temperature - COMFORT_TEMPERATURE_CELSIUS, 0)
+    X[:max(LAGS)] = np.nan
+    return X
+
+
+FEATURE_VERSION = code_version(design_matrix)
+
+
+def solve_ridge(xtx, xty, alpha=RIDGE_ALPHA):
+    # الثابت (intercept) بدون عقوبة
+    penalty = np.full(xtx.shape[0], alpha)
+    penalty[0] = 0.0
+    return np.linalg.solve(xtx + np.diag(penalty), xty)
+
+
+def _sufficient_stats(X, y):
+    valid = ~np.isnan(X).any(axis=1)
+    return X[valid].T @ X[valid], X[valid].T @ y[valid], int(valid.sum())
+
+
+def _tail_hash(y, end):
+    # بصمة آخر أيام السجل حتى end: تعديل حجوزات أيام سابقة (وصول متأخر) يفرض إعادة تدريب كاملة
+    return hashlib.sha1(np.ascontiguousarray(y[max(0, end - FULL_REFIT_DAYS):end]).tobytes()).hexdigest()[:16]
+
+
+def _init_demand_worker(dates, temperatures, weekdays, n_history):
+    global _DATES, _TEMPERATURES, _WEEKDAYS, _N_HISTORY
+    _DATES, _TEMPERATURES, _WEEKDAYS, _N_HISTORY = dates, temperatures, weekdays, n_history
+
+
+def fit_series(values, state, dates, temperatures, weekdays, n_history, horizon_days):
+    """Fit (or update) one series and forecast it.
+
+    ``values`` are the bookings on the first ``n_history`` days of ``dates``
+    (NaN before the series starts); ``temperatures`` / ``weekdays`` also cover
+    the ``horizon_days`` after. Returns (state, mode, fitted, forecast) or
+    None when the series is too short.
+    """
+    observed = np.flatnonzero(~np.isnan(values))
+    if observed.size == 0:
+        return None
+    first = observed[0]
+    y = values[first:]
+    temps, days = temperatures[first:], weekdays[first:]
+    X = design_matrix(y, temps[:len(y)], days[:len(y)])
+    last_date = str(dates[n_history - 1])
+
+    mode = "full"
+    if state is not None:
+        # عدد أيام السلسلة التي دخلت الموديل المحفوظ، وكم مضى على آخر تدريب كامل
+        fitted_end = int((np.datetime64(state["fitted_through"]) - dates[0]).astype(int)) - first + 1
+        days_since_full_fit = int((dates[n_history - 1] - np.datetime64(state["full_fit_on"])).astype(int))
+        if 0 < fitted_end <= len(y) and days_since_full_fit < FULL_REFIT_DAYS \
+                and _tail_hash(y, fitted_end) == state["tail_hash"]:
+            xtx, xty, n_obs = _sufficient_stats(X[fitted_end:], y[fitted_end:])
+            xtx, xty, n_obs = state["xtx"] + xtx, state["xty"] + xty, state["n_obs"] + n_obs
+            full_fit_on = state["full_fit_on"]
+            mode = "incremental" if n_obs > state["n_obs"] else "unchanged"
+    if mode == "full":
+        xtx, xty, n_obs = _sufficient_stats(X, y)
+        full_fit_on = last_date
+    if n_obs < MIN_TRAINING_DAYS:
+        return None
+    beta = solve_ridge(xtx, xty)
+
+    # التوقع للأيام الأخيرة من السجل (باستخدام القيم الفعلية السابقة) ثم للأيام القادمة يوماً بيوم
+    backtest_start = max(len(y) - BACKTEST_DAYS, max(LAGS))
+    fitted = np.maximum(X[backtest_start:] @ beta, 0)
+    y_extended = np.concatenate([y, np.zeros(horizon_days)])
+    window = max(LAGS) + 1
+    for step in range(horizon_days):
+        t = len(y) + step
+        row = design_matrix(y_extended[t - window + 1:t + 1], temps[t - window + 1:t + 1], days[t - window + 1:t + 1])[-1]
+        y_extended[t] = max(row @ beta, 0.0)
+    state = {
+        "xtx": xtx, "xty": xty, "n_obs": n_obs, "fitted_through": last_date,
+        "full_fit_on": full_fit_on, "tail_hash": _tail_hash(y, len(y)),
+    }
+    return state, mode, (first + backtest_start, fitted), y_extended[len(y):]
+
+
+def _fit_series_batch(batch):
+    results = []
+    for key, values, state in batch:
+        result = fit_series(values, state, _DATES, _TEMPERATURES, _WEEKDAYS, _N_HISTORY, len(_DATES) - _N_HISTORY)
+        results.append((key, result))
+    return results
+
+
+def load_bookings(path=BOOKINGS_PATH):
+    """Daily bookings per series, or None if there is no bookings file yet."""
+    if resolve_table_path(path) is None:
+        return None
+    df = load_table(path, columns=["date", *SERIES_COLUMNS, "bookings"])
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    return df
+
+
+def load_daily_temperature_axis(dates):
+    """Mean temperature per day: weather history, then the weather forecast, else the seasonal curve."""
+    history = timeseries_store.read_range(WEATHER_HISTORY_DATASET, dates[0], dates[-1] + pd.Timedelta(days=1),
+                                          columns=["temperature_celsius"], max_points=None)
+    daily = pd.Series(dtype=float)
+    if not history.empty:
+        daily = history.groupby(pd.to_datetime(history[timeseries_store.TIME_COLUMN]).dt.normalize())["temperature_celsius"].mean()
+    forecast = load_daily_temperatures()
+    daily = daily.combine_first(forecast) if not forecast.empty else daily
+    temperatures = pd.Series(daily, dtype=float).reindex(dates).to_numpy()
+    known_days = int((~np.isnan(temperatures)).sum())
+    return np.where(np.isnan(temperatures), seasonal_temperature(dates), temperatures), known_days
+
+
+def bookings_matrix(df, dates):
+    """(days x series) bookings on ``dates``: 0 on days without bookings, NaN before each series' first day."""
+    daily = df.groupby(["date", *SERIES_COLUMNS], observed=True)["bookings"].sum()
+    wide = daily.unstack(SERIES_COLUMNS).reindex(dates)
+    first_dates = df.groupby(SERIES_COLUMNS, observed=True)["date"].min().reindex(wide.columns)
+    values = wide.fillna(0).to_numpy(dtype=np.float64, copy=True)
+    values[dates.to_numpy()[:, None] < first_dates.to_numpy()[None, :]] = np.nan
+    return list(wide.columns), values
+
+
+def load_model_state(path=MODEL_STATE_PATH):
+    """Per-series model state saved by the previous run ({} if missing or built by other feature code)."""
+    if not os.path.exists(path):
+        return {}
+    with np.load(path, allow_pickle=False) as npz:
+        # كل وصول إلى مفتاح في ملف npz يقرأه من جديد، لذلك نقرأ كل المصفوفات مرة واحدة
+        data = {name: npz[name] for name in npz.files}
+    if str(data["feature_version"]) != FEATURE_VERSION:
+        return {}
+    return {
+        (str(branch), str(category)): {
+            "xtx": data["xtx"][i], "xty": data["xty"][i], "n_obs": int(data["n_obs"][i]),
+            "fitted_through": str(data["fitted_through"][i]), "full_fit_on": str(data["full_fit_on"][i]),
+            "tail_hash": str(data["tail_hash"][i]),
+        }
+        for i, (branch, category) in enumerate(zip(data["rental_branch"], data["car_category"]))
+    }
+
+
+def save_model_state(states, path=MODEL_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    keys = list(states)
+    tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+    np.savez(
+        tmp_path,
+        feature_version=np.array(FEATURE_VERSION),
+        rental_branch=np.array([str(key[0]) for key in keys]),
+        car_category=np.array([str(key[1]) for key in keys]),
+        xtx=np.stack([states[key]["xtx"] for key in keys]),
+        xty=np.stack([states[key]["xty"] for key in keys]),
+        n_obs=np.array([states[key]["n_obs"] for key in keys]),
+        fitted_through=np.array([states[key]["fitted_through"] for key in keys]),
+        full_fit_on=np.array([states[key]["full_fit_on"] for key in keys]),
+        tail_hash=np.array([states[key]["tail_hash"] for key in keys]),
+    )
+    os.replace(tmp_path, path)
+
+
+@track_stage("demand", "total")
+def run_demand_forecast_pipeline(n_workers=None, horizon_days=HORIZON_DAYS):
+    print("--- Starting Demand Forecast Pipeline ---")
+
+    # --- Step 1: Bookings History and Daily Temperatures ---
+    with track_stage("demand", "load_history") as stage:
+        df_bookings = load_bookings()
+        if df_bookings is None:
+            # لا حجوزات فعلية بعد: لا نكتب توقعات ولا "فعلي" مختلق تعرضه لوحة التحكم
+            print(f"⚠️ No bookings found at {BOOKINGS_PATH}; no demand forecast to produce yet.")
+            print("--- Demand Forecast Pipeline Completed ---")
+            return
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        history_dates = pd.date_range(end=df_bookings["date"].max(), periods=HISTORY_DAYS, freq="D")
+        all_dates = pd.date_range(history_dates[0], periods=HISTORY_DAYS + horizon_days, freq="D")
+        temperatures, known_days = load_daily_temperature_axis(all_dates)
+        keys, values = bookings_matrix(df_bookings, history_dates)
+        stage.rows = len(df_bookings)
+    print(f"✅ {len(keys)} series x {len(history_dates)} days of bookings loaded "
+          f"(weather readings for {known_days} of {len(all_dates)} days, seasonal temperatures elsewhere).")
+
+    # --- Step 2: Fit / Update and Forecast Every Series in Parallel ---
+    with track_stage("demand", "load_state"):
+        previous_states = load_model_state()
+    series = [(key, values[:, i], previous_states.get(key)) for i, key in enumerate(keys)]
+    batches = [series[start:start + SERIES_PER_TASK] for start in range(0, len(series), SERIES_PER_TASK)]
+    dates = all_dates.to_numpy().astype("datetime64[D]")
+    n_workers = n_workers or os.cpu_count() or 1
+    with track_stage("demand", "fit_forecast", rows=len(series)), \
+            ProcessPoolExecutor(max_workers=n_workers, initializer=_init_demand_worker,
+                                initargs=(dates, temperatures, all_dates.weekday.to_numpy(), len(history_dates))) as pool:
+        results = [result for batch_results in pool.map(_fit_series_batch, batches) for result in batch_results]
+
+    # --- Step 3: Assemble All Forecasts and Write Them at Once ---
+    with track_stage("demand", "save") as stage:
+        states, modes, parts = {}, {}, []
+        for (key, result), (_, series_values, _) in zip(results, series):
+            if result is None:
+                modes["skipped"] = modes.get("skipped", 0) + 1
+                continue
+            state, mode, (backtest_start, fitted), forecast = result
+            states[key] = state
+            modes[mode] = modes.get(mode, 0) + 1
+            day_index = np.arange(backtest_start, len(history_dates) + horizon_days)
+            actual = np.concatenate([series_values[backtest_start:], np.full(horizon_days, np.nan)])
+            parts.append((key, day_index, actual, np.concatenate([fitted, forecast])))
+
+        if not parts:
+            print(f"❌ No series has {MIN_TRAINING_DAYS} days of bookings yet; nothing to forecast.")
+            return False
+        series_index = np.repeat(np.arange(len(parts)), [len(part[1]) for part in parts])
+        day_index = np.concatenate([part[1] for part in parts])
+        df_forecast = pd.DataFrame({
+            "date": all_dates[day_index],
+            "rental_branch": pd.Categorical(np.array([part[0][0] for part in parts], dtype=object)[series_index]),
+            "car_category": pd.Categorical(np.array([part[0][1] for part in parts], dtype=object)[series_index]),
+            "actual_bookings": np.concatenate([part[2] for part in parts]),
+            "forecast_bookings": np.concatenate([part[3] for part in parts]).round(2),
+            "is_forecast": day_index >= len(history_dates),
+        })
+        save_table(df_forecast, DEMAND_FORECAST_PATH)
+        save_model_state(states)
+        stage.rows = len(df_forecast)
+
+    summary = ", ".join(f"{count} {mode}" for mode, count in sorted(modes.items()))
+    print(f"✅ Demand models: {summary}.")
+    print(f"✅ {horizon_days}-day demand forecast for {len(states)} series saved to: {DEMAND_FORECAST_PATH}")
+    print("--- Demand Forecast Pipeline Completed ---")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-branch, per-category daily demand forecast")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    args = parser.parse_args()
+    run_demand_forecast_pipeline(n_workers=args.workers, horizon_days=args.horizon_days)
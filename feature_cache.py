@@ -0,0 +1,88 @@
+import hashlib
+import inspect
+import os
+import joblib
+
+# ذاكرة تخزين مؤقت (cache) لمخرجات المعالجة المسبقة
+# المفتاح = بصمة محتوى الملف الخام + بصمة كود المعالجة، لذلك أي تغيير في البيانات أو الكود يبطل النسخة المخزنة تلقائياً
+
+FEATURE_CACHE_DIR = "data/cache/features"
+# عدد النسخ التي يتم الاحتفاظ بها (الأحدث استخداماً)؛ الباقي يُحذف تلقائياً
+CACHE_MAX_ENTRIES = 3
+CACHE_SUFFIX = ".joblib"
+
+
+def file_content_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's bytes, read in blocks so large raw files are never fully loaded."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(*functions):
+    """Hash of the source code of ``functions``, used as the preprocessing code version."""
+    digest = hashlib.sha256()
+    for func in functions:
+        digest.update(inspect.getsource(func).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts):
+    return hashlib.sha256("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def cache_entry_path(namespace, key, cache_dir=FEATURE_CACHE_DIR):
+    return os.path.join(cache_dir, f"{namespace}-{key}{CACHE_SUFFIX}")
+
+
+def load_cached(namespace, key, cache_dir=FEATURE_CACHE_DIR):
+    """Return the cached object for ``key``, or None on a miss or an unreadable entry."""
+    path = cache_entry_path(namespace, key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        obj = joblib.load(path)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable cache entry {path}: {e}")
+        os.remove(path)
+        return None
+    # تحديث وقت الاستخدام حتى لا يتم حذف هذه النسخة أثناء التنظيف
+    os.utime(path)
+    return obj
+
+
+def has_cached(namespace, key, cache_dir=FEATURE_CACHE_DIR):
+    """True if an entry for ``key`` exists, without deserializing it."""
+    path = cache_entry_path(namespace, key, cache_dir)
+    if not os.path.exists(path):
+        return False
+    os.utime(path)
+    return True
+
+
+def save_cached(namespace, key, obj, cache_dir=FEATURE_CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_entry_path(namespace, key, cache_dir)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    # بدون ضغط: القراءة أسرع بكثير، والهدف هنا هو الوقت وليس حجم القرص
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+    evict_stale(namespace, cache_dir=cache_dir, max_entries=max_entries)
+    return path
+
+
+def evict_stale(namespace, cache_dir=FEATURE_CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+    """Keep only the ``max_entries`` most recently used entries of ``namespace``."""
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = [
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if name.startswith(f"{namespace}-") and name.endswith(CACHE_SUFFIX)
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    evicted = entries[max_entries:]
+    for path in evicted:
+        os.remove(path)
+    return evicted
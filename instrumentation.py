@@ -0,0 +1,181 @@
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: لا يوجد getrusage
+    resource = None
+
+# قياس زمن واستهلاك ذاكرة كل مرحلة في الـ pipelines
+# كل مرحلة تُسجَّل كسطر JSON في ملف يُضاف إليه فقط (data/metrics/stage_metrics.jsonl):
+# الزمن الفعلي، زمن المعالج (بما فيه العمليات الفرعية)، أعلى استهلاك ذاكرة RSS خلال المرحلة، وعدد الصفوف
+
+METRICS_LOG_PATH = "data/metrics/stage_metrics.jsonl"
+# كل العمليات التي يشغلها pipeline_runner تشترك في نفس المعرف عبر متغير البيئة هذا
+RUN_ID_ENV = "PIPELINE_RUN_ID"
+RSS_SAMPLE_INTERVAL_SECONDS = 0.05
+
+
+def new_run_id():
+    return uuid.uuid4().hex[:12]
+
+
+_PROCESS_RUN_ID = new_run_id()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_run_id():
+    return os.environ.get(RUN_ID_ENV, _PROCESS_RUN_ID)
+
+
+def current_rss_bytes():
+    """Resident set size of this process (Linux /proc), falling back to the lifetime peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return _max_rss_bytes()
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss بالكيلوبايت على Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_seconds():
+    times = os.times()
+    # يشمل العمليات الفرعية المنتهية (مثل عمال ProcessPoolExecutor)
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+class track_stage:
+    """Record wall time, CPU time, peak RSS and rows of one pipeline stage.
+
+    Use as ``with track_stage("churn", "smote") as stage: ...; stage.rows = len(X)``
+    or as a decorator ``@track_stage("weather", "total")``. Failures are recorded
+    with ``status="error"`` and re-raised.
+    """
+
+    def __init__(self, pipeline, stage, rows=None, log_path=METRICS_LOG_PATH):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.rows = rows
+        self.log_path = log_path
+        self.record = None
+
+    def __call__(self, func):
+        # كل استدعاء للدالة المزخرفة يقيس نفسه بنسخة جديدة، حتى لا تتشارك الاستدعاءات المتداخلة نفس الحالة
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(self.pipeline, self.stage, self.rows, self.log_path):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self._sampler = _RssSampler(RSS_SAMPLE_INTERVAL_SECONDS)
+        self._sampler.start()
+        self._started_at = datetime.datetime.now()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = _cpu_seconds() - self._cpu_start
+        peak_rss = self._sampler.stop()
+        self.record = {
+            "run_id": current_run_id(),
+            "started_at": self._started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "pipeline": self.pipeline,
+            "stage": self.stage,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+            "rows": None if self.rows is None else int(self.rows),
+            "status": "ok" if exc_type is None else "error",
+        }
+        try:
+            append_metric(self.record, self.log_path)
+        except OSError as e:
+            # القياس لا يجب أن يوقف الـ pipeline
+            print(f"⚠️ Could not write stage metrics to {self.log_path}: {e}")
+        return False
+
+
+def append_metric(record, log_path=METRICS_LOG_PATH):
+    log_dir = os.path.dirname(log_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    # سطر واحد بكتابة واحدة في وضع الإضافة، حتى لا تتداخل الأسطر من عمليات متوازية
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_stage_metrics(log_path=METRICS_LOG_PATH):
+    """Read the metrics log into a DataFrame (empty if missing); unreadable lines are skipped."""
+    records = []
+    try:
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # سطر ناقص من عملية توقفت أثناء الكتابة
+                    continue
+    except FileNotFoundError:
+        pass
+    df = pd.DataFrame(records, columns=["run_id", "started_at", "pipeline", "stage", "wall_s", "cpu_s",
+                                        "peak_rss_mb", "rows", "status"])
+    df["started_at"] = pd.to_datetime(df["started_at"])
+    return df
+
+
+def summarize_runs(df, pipeline):
+    """One row per (run, stage) of ``pipeline``: stages repeated per chunk are summed, peak RSS is the max."""
+    df = df[df["pipeline"] == pipeline]
+    runs = df.groupby(["run_id", "stage"], sort=False).agg(
+        started_at=("started_at", "min"), wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"),
+        peak_rss_mb=("peak_rss_mb", "max"), rows=("rows", lambda rows: rows.sum(min_count=1)), calls=("stage", "size"),
+        errors=("status", lambda status: int((status == "error").sum())),
+    ).reset_index()
+    # كل مراحل التشغيل تأخذ وقت بدايته، حتى تقع على نفس النقطة في محور الزمن
+    runs["run_started_at"] = runs.groupby("run_id")["started_at"].transform("min")
+    return runs.sort_values(["run_started_at", "started_at"]).reset_index(drop=True)
+
+
+def find_regressions(runs, threshold=1.5, min_seconds=0.5):
+    """Stages of the latest run slower than ``threshold`` x their median over earlier runs."""
+    if runs.empty:
+        return runs
+    latest_run = runs.loc[runs["run_started_at"].idxmax(), "run_id"]
+    latest = runs[runs["run_id"] == latest_run].set_index("stage")
+    baseline = runs[runs["run_id"] != latest_run].groupby("stage")["wall_s"].median()
+    latest = latest.join(baseline.rename("median_wall_s"), how="inner")
+    slower = (latest["wall_s"] > threshold * latest["median_wall_s"]) & (latest["wall_s"] >= min_seconds)
+    return latest.loc[slower, ["wall_s", "median_wall_s", "rows"]].reset_index()
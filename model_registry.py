@@ -0,0 +1,236 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import threading
+import uuid
+import joblib
+from feature_cache import file_content_hash
+
+# سجل موديلات بإصدارات (versions): كل إصدار مجلد ثابت لا يتغير بعد كتابته
+#   models/registry/<name>/<version>/model.joblib        الموديل (بدون ضغط حتى تُقرأ مصفوفاته كـ memory-map)
+#   models/registry/<name>/<version>/feature_schema.json مخطط الأعمدة (اختياري)
+#   models/registry/<name>/<version>/meta.json           المقاييس والمعاملات وبصمات الملفات
+#   models/registry/<name>/ACTIVE.json                   مؤشر الإصدار النشط + الإصدارات السابقة (للتراجع)
+# التحميل بـ mmap_mode='r' يجعل كل العمليات (جلسات Streamlit وعمال الـ pipelines) تقرأ نفس صفحات الملف
+# من ذاكرة نظام التشغيل بدلاً من نسخة كاملة لكل عملية. ملاحظة: أشجار scikit-learn تنسخ مصفوفاتها عند التحميل،
+# فالمشاركة تشمل مصفوفات NumPy الأخرى في الموديل فقط
+
+REGISTRY_ROOT = "models/registry"
+ACTIVE_POINTER = "ACTIVE.json"
+MODEL_FILE = "model.joblib"
+FEATURE_SCHEMA_FILE = "feature_schema.json"
+META_FILE = "meta.json"
+# عدد الإصدارات غير النشطة التي يُحتفظ بها للتراجع؛ الأقدم منها يُحذف عند تسجيل إصدار جديد
+KEEP_VERSIONS = 5
+
+# الموديلات المحملة في هذه العملية: (name, version, artifact) -> object
+_LOADED = {}
+_LOADED_LOCK = threading.Lock()
+
+
+def model_dir(name, root=REGISTRY_ROOT):
+    return os.path.join(root, name)
+
+
+def version_dir(name, version, root=REGISTRY_ROOT):
+    return os.path.join(root, name, version)
+
+
+def _write_json_atomic(payload, path):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_versions(name, root=REGISTRY_ROOT):
+    """Registered versions of ``name``, oldest first."""
+    directory = model_dir(name, root)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(entry for entry in os.listdir(directory)
+                  if entry.startswith("v") and os.path.exists(os.path.join(directory, entry, META_FILE)))
+
+
+def load_meta(name, version, root=REGISTRY_ROOT):
+    with open(os.path.join(version_dir(name, version, root), META_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_pointer(name, root=REGISTRY_ROOT):
+    try:
+        with open(os.path.join(model_dir(name, root), ACTIVE_POINTER), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def active_version(name, root=REGISTRY_ROOT):
+    """The promoted version of ``name``, or None if nothing was promoted yet."""
+    pointer = _read_pointer(name, root)
+    return pointer["version"] if pointer else None
+
+
+def _next_version(name, root):
+    versions = list_versions(name, root)
+    return f"v{int(versions[-1][1:]) + 1:04d}" if versions else "v0001"
+
+
+def register_model(name, model, feature_schema=None, metrics=None, params=None, promote=True, root=REGISTRY_ROOT):
+    """Store ``model`` (and an optional feature schema) as a new immutable version.
+
+    The version directory is written under a temporary name and renamed into
+    place, so readers never see a partial version. Returns the new version.
+    """
+    os.makedirs(model_dir(name, root), exist_ok=True)
+    staging = os.path.join(model_dir(name, root), f".staging-{uuid.uuid4().hex[:8]}")
+    os.makedirs(staging)
+    try:
+        # compress=0: المصفوفات تُكتب كما هي، فيمكن قراءتها لاحقاً كـ memory-map
+        joblib.dump(model, os.path.join(staging, MODEL_FILE), compress=0)
+        if feature_schema is not None:
+            _write_json_atomic(feature_schema, os.path.join(staging, FEATURE_SCHEMA_FILE))
+        files = sorted(os.listdir(staging))
+
+        while True:
+            version = _next_version(name, root)
+            meta = {
+                "name": name,
+                "version": version,
+                "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "model_class": type(model).__name__,
+                "metrics": metrics or {},
+                "params": params or {},
+                "files": {entry: file_content_hash(os.path.join(staging, entry)) for entry in files},
+            }
+            _write_json_atomic(meta, os.path.join(staging, META_FILE))
+            try:
+                # os.rename يفشل إذا سبقتنا عملية أخرى إلى نفس رقم الإصدار؛ نعيد المحاولة بالرقم التالي
+                os.rename(staging, version_dir(name, version, root))
+                break
+            except OSError:
+                if not os.path.isdir(version_dir(name, version, root)):
+                    raise
+    finally:
+        if os.path.isdir(staging):
+            shutil.rmtree(staging)
+
+    print(f"✅ Registered {name} {version} in {model_dir(name, root)}")
+    if promote:
+        promote_version(name, version, root)
+    prune_versions(name, root=root)
+    return version
+
+
+def promote_version(name, version, root=REGISTRY_ROOT):
+    """Make ``version`` the active one by atomically replacing the ACTIVE pointer."""
+    if version not in list_versions(name, root):
+        raise ValueError(f"Unknown version '{version}' of model '{name}'")
+    pointer = _read_pointer(name, root) or {"version": None, "history": []}
+    history = pointer["history"]
+    if pointer["version"] and pointer["version"] != version:
+        history = history + [pointer["version"]]
+    _write_json_atomic({
+        "version": version,
+        "promoted_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "history": history,
+    }, os.path.join(model_dir(name, root), ACTIVE_POINTER))
+    print(f"✅ {name} {version} is now active.")
+    return version
+
+
+def rollback(name, root=REGISTRY_ROOT):
+    """Re-activate the previously active version of ``name``; returns it."""
+    pointer = _read_pointer(name, root)
+    available = set(list_versions(name, root))
+    history = [version for version in (pointer or {}).get("history", []) if version in available]
+    if not history:
+        raise ValueError(f"Model '{name}' has no previous version to roll back to")
+    previous = history[-1]
+    _write_json_atomic({
+        "version": previous,
+        "promoted_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "history": history[:-1],
+    }, os.path.join(model_dir(name, root), ACTIVE_POINTER))
+    print(f"✅ {name} rolled back from {pointer['version']} to {previous}.")
+    return previous
+
+
+def prune_versions(name, keep=KEEP_VERSIONS, root=REGISTRY_ROOT):
+    """Delete the oldest versions beyond ``keep``, never the active one."""
+    active = active_version(name, root)
+    removable = [version for version in list_versions(name, root) if version != active]
+    removed = removable[:max(0, len(removable) - keep)]
+    for version in removed:
+        shutil.rmtree(version_dir(name, version, root))
+    return removed
+
+
+def load_artifact(name, version=None, artifact=MODEL_FILE, mmap_mode='r', root=REGISTRY_ROOT):
+    """Load ``artifact`` of ``version`` (default: the active one), memory-mapping its arrays.
+
+    Loaded objects are kept per process, so repeated calls (every Streamlit
+    rerun, every chunk of a pipeline) reuse the same read-only copy. Returns
+    None when the model has no active version or the artifact doesn't exist.
+    """
+    version = version or active_version(name, root)
+    if version is None:
+        return None
+    path = os.path.join(version_dir(name, version, root), artifact)
+    key = (os.path.abspath(root), name, version, artifact)
+    with _LOADED_LOCK:
+        if key in _LOADED:
+            return _LOADED[key]
+    if not os.path.exists(path):
+        return None
+    obj = joblib.load(path, mmap_mode=mmap_mode)
+    with _LOADED_LOCK:
+        return _LOADED.setdefault(key, obj)
+
+
+def load_feature_schema(name, version=None, root=REGISTRY_ROOT):
+    version = version or active_version(name, root)
+    if version is None:
+        return None
+    path = os.path.join(version_dir(name, version, root), FEATURE_SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def active_meta(name, root=REGISTRY_ROOT):
+    """Meta of the active version of ``name``, or None."""
+    version = active_version(name, root)
+    return load_meta(name, version, root) if version else None
+
+
+def describe(name, root=REGISTRY_ROOT):
+    """Meta of every version of ``name`` (newest first), with an ``active`` flag."""
+    active = active_version(name, root)
+    return [{**load_meta(name, version, root), "active": version == active}
+            for version in reversed(list_versions(name, root))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the model registry and promote or roll back versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="show the versions of a model")
+    list_parser.add_argument("name")
+    promote_parser = subparsers.add_parser("promote", help="make a version the active one")
+    promote_parser.add_argument("name")
+    promote_parser.add_argument("version")
+    rollback_parser = subparsers.add_parser("rollback", help="re-activate the previously active version")
+    rollback_parser.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for meta in describe(args.name):
+            metrics = ", ".join(f"{key}={value:.4f}" for key, value in meta["metrics"].items())
+            print(f"{'*' if meta['active'] else ' '} {meta['version']}  {meta['created_at']}  {meta['model_class']}  {metrics}")
+    elif args.command == "promote":
+        promote_version(args.name, args.version)
+    else:
+        rollback(args.name)
@@ -1,32 +1,281 @@
 import pandas as pd
+import numpy as np
 import datetime
 import joblib
 import os
 import random # لاستخدام قيم عشوائية لدرجات المشاعر
+import argparse
+import hashlib
+import itertools
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from data_storage import save_table, load_table, resolve_table_path, ChunkedTableWriter
+from feature_cache import file_content_hash, make_cache_key
+from aggregates import refresh_aggregates
+from instrumentation import track_stage
+import model_registry
 
-# هذا الجزء فقط إذا كان لديك موديل تحليل مشاعر مدرب ومحفوظ (مثل موديل تصنيف المشاعر)
-# تأكد من أن المسار صحيح لموديلك
-# try:
-#     sentiment_model = joblib.load('models/sentiment_classifier_model.joblib')
-#     tfidf_vectorizer = joblib.load('models/tfidf_vectorizer.joblib')
-#     print("✅ Sentiment model and vectorizer loaded successfully!")
-# except FileNotFoundError:
-#     print("❌ Error: Sentiment model or TF-IDF vectorizer not found. Using dummy sentiment for now.")
-#     sentiment_model = None
-#     tfidf_vectorizer = None
+# Define paths
+SENTIMENT_MODEL_PATH = 'models/sentiment_classifier_model.joblib'
+TFIDF_VECTORIZER_PATH = 'models/tfidf_vectorizer.joblib'
+# اسم الموديل في سجل الموديلات: الموديل والـ vectorizer محفوظان معاً كإصدار واحد
+# الملفات أعلاه تُستخدم فقط إذا لم يُسجَّل أي إصدار بعد (python nlp_reviews_pipeline.py --register-model)
+SENTIMENT_MODEL_NAME = "sentiment_classifier"
+# ملف التعليقات الخام: عمود comment_text إلزامي، وعمود comment_id اختياري
+REVIEWS_INPUT_PATH = 'data/raw/customer_reviews.csv'
+OUTPUT_DIR = "data/sentiment_results"
+OUTPUT_FILE_PATH = os.path.join(OUTPUT_DIR, "sentiment_analysis_results.csv")
 
+# عدد التعليقات في كل دفعة؛ كل دفعة = استدعاء واحد لـ transform واستدعاء واحد لـ predict_proba
+REVIEWS_CHUNKSIZE = 5_000
+
+# أعمدة ملف النتائج؛ comment_hash هو مفتاح التعليق و model_version بصمة الموديل الذي قيّمه
+SENTIMENT_RESULT_COLUMNS = [
+    "comment_id", "comment_text", "analysis_date", "sentiment", "sentiment_score", "comment_hash", "model_version",
+]
+
+POSITIVE_LABELS = {"1", "pos", "positive"}
+NEGATIVE_LABELS = {"0", "-1", "neg", "negative"}
+
+# الموديل والـ vectorizer المحملين داخل كل عملية عاملة (worker)
+_SENTIMENT_MODEL = None
+_TFIDF_VECTORIZER = None
+
+
+def load_sentiment_artifacts(version=None):
+    """Load the classifier and TF-IDF vectorizer, or return (None, None) if unavailable.
+
+    ``version`` is a registry version (default: the active one); the legacy
+    files under models/ are used when nothing is registered.
+    """
+    try:
+        bundle = model_registry.load_artifact(SENTIMENT_MODEL_NAME, version)
+        if bundle is not None:
+            return bundle["classifier"], bundle["vectorizer"]
+        sentiment_model = joblib.load(SENTIMENT_MODEL_PATH)
+        tfidf_vectorizer = joblib.load(TFIDF_VECTORIZER_PATH)
+        return sentiment_model, tfidf_vectorizer
+    except Exception as e:
+        # ملفات الموديلات محفوظة عبر Git LFS؛ بدون `git lfs pull` تكون مجرد ملفات مؤشرات
+        print(f"❌ Error: Sentiment model or TF-IDF vectorizer could not be loaded ({e}).")
+        return None, None
+
+
+def register_sentiment_model(sentiment_model, tfidf_vectorizer, metrics=None, params=None):
+    """Store the classifier and its vectorizer as a new registry version and make it the active one."""
+    return model_registry.register_model(
+        SENTIMENT_MODEL_NAME, {"classifier": sentiment_model, "vectorizer": tfidf_vectorizer},
+        metrics=metrics, params=params,
+    )
+
+
+def sentiment_label(model_class):
+    label = str(model_class).strip().lower()
+    if label in POSITIVE_LABELS:
+        return "Positive"
+    if label in NEGATIVE_LABELS:
+        return "Negative"
+    return str(model_class).strip().title()
+
+
+def score_comments(comments, sentiment_model, tfidf_vectorizer):
+    """Vectorize and classify a batch of comments with one sparse transform / predict_proba call.
+
+    Returns (labels, scores) where each score is P(positive) - P(negative), in [-1, 1].
+    """
+    comment_vectors = tfidf_vectorizer.transform(comments)
+    proba = sentiment_model.predict_proba(comment_vectors)
+    class_labels = np.array([sentiment_label(c) for c in sentiment_model.classes_], dtype=object)
+    polarity = np.select([class_labels == "Positive", class_labels == "Negative"], [1.0, -1.0], default=0.0)
+
+    labels = class_labels[proba.argmax(axis=1)]
+    scores = np.round(proba @ polarity, 2)
+    return labels, scores
+
+
+def keyword_sentiment(comment_text):
+    # مثال على منطق بسيط جداً لتحليل المشاعر (يُستخدم فقط عند عدم توفر الموديل)
+    if "ممتازة" in comment_text or "رائعة" in comment_text or "جيد" in comment_text:
+        return "Positive"
+    elif "سيئة" in comment_text or "متسخة" in comment_text or "فظيعة" in comment_text:
+        return "Negative"
+    return "Neutral"
+
+
+def normalize_comment(comment_text):
+    # توحيد أشكال الحروف والمسافات حتى تحصل التعليقات المتطابقة فعلياً على نفس البصمة
+    return " ".join(unicodedata.normalize("NFKC", str(comment_text)).split()).lower()
+
+
+def comment_hashes(comments):
+    return [hashlib.sha1(normalize_comment(c).encode('utf-8')).hexdigest()[:16] for c in comments]
+
+
+def sentiment_model_version(registry_version=None):
+    """Fingerprint of the model artifacts; results scored by another version get re-scored."""
+    if registry_version is not None:
+        return make_cache_key(SENTIMENT_MODEL_NAME, registry_version)
+    return make_cache_key(file_content_hash(SENTIMENT_MODEL_PATH), file_content_hash(TFIDF_VECTORIZER_PATH))
+
+
+def _init_sentiment_worker(registry_version):
+    global _SENTIMENT_MODEL, _TFIDF_VECTORIZER
+    # تحميل الموديل مرة واحدة لكل عملية بدلاً من مرة لكل دفعة؛ كل العمال يقرؤون نفس الإصدار
+    # (مصفوفاته memory-mapped من نفس الملف، فلا تتكرر في ذاكرة كل عامل)
+    _SENTIMENT_MODEL, _TFIDF_VECTORIZER = load_sentiment_artifacts(registry_version)
 
-def run_sentiment_analysis_pipeline():
-    print("--- Starting Customer Comments Model (Sentiment Analysis) Pipeline ---")
 
-    # Define output directory and file path
-    output_dir = "data/sentiment_results"
-    output_file_path = os.path.join(output_dir, "sentiment_analysis_results.csv")
+def _score_chunk(chunk):
+    labels, scores = score_comments(chunk['comment_text'].tolist(), _SENTIMENT_MODEL, _TFIDF_VECTORIZER)
+    return pd.DataFrame({
+        "comment_id": chunk['comment_id'].to_numpy(),
+        "comment_text": chunk['comment_text'].to_numpy(),
+        "sentiment": labels,
+        "sentiment_score": scores,
+        "comment_hash": chunk['comment_hash'].to_numpy(),
+    })
+
+
+def iter_review_chunks(input_path=REVIEWS_INPUT_PATH, chunksize=REVIEWS_CHUNKSIZE):
+    for chunk in pd.read_csv(input_path, chunksize=chunksize):
+        chunk['comment_text'] = chunk['comment_text'].fillna("").astype(str)
+        yield chunk
+
+
+def iter_unscored_chunks(chunks, scored_hashes, first_id=1):
+    """Drop comments whose hash is in ``scored_hashes`` and duplicates within the run.
+
+    Comments without a ``comment_id`` column get consecutive ids from ``first_id``,
+    counted over the remaining (new) comments only.
+    """
+    next_id = first_id
+    for chunk in chunks:
+        chunk = chunk.assign(comment_hash=comment_hashes(chunk['comment_text']))
+        chunk = chunk[~chunk['comment_hash'].isin(scored_hashes)].drop_duplicates('comment_hash')
+        scored_hashes.update(chunk['comment_hash'])
+        if not len(chunk):
+            continue
+        if 'comment_id' not in chunk.columns:
+            chunk = chunk.assign(comment_id=np.arange(next_id, next_id + len(chunk)))
+            next_id += len(chunk)
+        yield chunk
+
+
+def load_sentiment_store(model_version):
+    """Read the existing results store.
+
+    Returns (rows to keep, rows to re-score, next free comment_id). Rows scored by
+    another model version, or written before comments were hashed, are returned
+    for re-scoring; in that case the store is rebuilt instead of appended to.
+    """
+    if resolve_table_path(OUTPUT_FILE_PATH) is None:
+        return pd.DataFrame(columns=SENTIMENT_RESULT_COLUMNS), None, 1
+    stored = load_table(OUTPUT_FILE_PATH, columns=['comment_id', 'comment_hash', 'model_version'])
+    next_id = int(stored['comment_id'].max()) + 1 if len(stored) else 1
+    if {'comment_hash', 'model_version'}.issubset(stored.columns) and (stored['model_version'] == model_version).all():
+        return stored, None, next_id
+
+    # نسخة موديل مختلفة (أو ملف قديم): نحتاج نصوص التعليقات لإعادة تقييمها
+    stored = load_table(OUTPUT_FILE_PATH)
+    if 'model_version' in stored.columns:
+        current = stored['model_version'] == model_version
+    else:
+        current = pd.Series(False, index=stored.index)
+    stale = stored.loc[~current, ['comment_id', 'comment_text']].reset_index(drop=True)
+    stale['comment_text'] = stale['comment_text'].fillna("").astype(str)
+    return stored.loc[current].reindex(columns=SENTIMENT_RESULT_COLUMNS), stale, next_id
+
+
+def run_batched_sentiment_scoring(input_path=REVIEWS_INPUT_PATH, chunksize=REVIEWS_CHUNKSIZE, n_workers=None):
+    """Score only new or changed reviews from ``input_path`` and append them to the results store.
+
+    The input is streamed in chunks; comments whose normalized-text hash was already
+    scored by the current model version are skipped, and the remaining chunks are
+    scored in parallel worker processes. Returns (new rows scored, rows in the store).
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    # الإصدار النشط يُثبَّت في بداية التشغيل، حتى لا يقيّم العمال بإصدارات مختلفة إذا رُقّي إصدار جديد أثناءه
+    registry_version = model_registry.active_version(SENTIMENT_MODEL_NAME)
+    model_version = sentiment_model_version(registry_version)
+    analysis_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with track_stage("sentiment", "load_store") as stage:
+        kept, stale, next_id = load_sentiment_store(model_version)
+        stage.rows = len(kept)
+    chunks = iter_review_chunks(input_path, chunksize)
+    if stale is not None and len(stale):
+        print(f"⚠️ Sentiment model artifacts changed; re-scoring {len(stale)} stored comments.")
+        stale_chunks = (stale.iloc[start:start + chunksize] for start in range(0, len(stale), chunksize))
+        chunks = itertools.chain(stale_chunks, chunks)
+    delta_chunks = iter_unscored_chunks(chunks, set(kept['comment_hash']), first_id=next_id)
+
+    first_chunk = next(delta_chunks, None)
+    if first_chunk is None and stale is None:
+        return 0, len(kept)
+    delta_chunks = itertools.chain([first_chunk] if first_chunk is not None else [], delta_chunks)
+
+    # بدون إعادة تقييم: نضيف الجديد فقط بعد النتائج الحالية؛ مع إعادة التقييم: نعيد بناء الملف من الصفوف السليمة
+    append = stale is None
+    # عدد الدفعات الجارية في نفس الوقت محدود حتى لا يُقرأ الملف كاملاً في الذاكرة
+    max_in_flight = n_workers * 2
+    new_rows = 0
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_sentiment_worker,
+                               initargs=(registry_version,)) as pool, \
+            ChunkedTableWriter(OUTPUT_FILE_PATH, append=append) as writer:
+        if not append and len(kept):
+            writer.write(kept)
+        in_flight = []
+        for chunk in delta_chunks:
+            in_flight.append(pool.submit(_score_chunk, chunk))
+            if len(in_flight) >= max_in_flight:
+                new_rows += _write_scored_chunk(writer, in_flight.pop(0).result(), analysis_date, model_version)
+                print(f"✅ Scored {new_rows} new comments so far...")
+        for future in in_flight:
+            new_rows += _write_scored_chunk(writer, future.result(), analysis_date, model_version)
+            print(f"✅ Scored {new_rows} new comments so far...")
+    return new_rows, writer.rows_copied + writer.rows_written
+
+
+def _write_scored_chunk(writer, df_scored, analysis_date, model_version):
+    df_scored["analysis_date"] = analysis_date
+    df_scored["model_version"] = model_version
+    writer.write(df_scored[SENTIMENT_RESULT_COLUMNS])
+    return len(df_scored)
+
+
+@track_stage("sentiment", "total")
+def run_sentiment_analysis_pipeline(input_path=REVIEWS_INPUT_PATH, chunksize=REVIEWS_CHUNKSIZE, n_workers=None):
+    print("--- Starting Customer Comments Model (Sentiment Analysis) Pipeline ---")
 
     # Ensure the output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # --- Step 1: Batched Model Scoring of Real Reviews (when both are available) ---
+    sentiment_model, tfidf_vectorizer = load_sentiment_artifacts()
+    if os.path.exists(input_path) and sentiment_model is not None:
+        print(f"✅ Sentiment model and vectorizer loaded. Scoring reviews from {input_path} in chunks of {chunksize}...")
+        with track_stage("sentiment", "batched_scoring") as stage:
+            new_rows, total_rows = run_batched_sentiment_scoring(input_path, chunksize, n_workers)
+            stage.rows = new_rows
+        if new_rows:
+            print(f"✅ {new_rows} new comments scored; {total_rows} results in: {OUTPUT_FILE_PATH}")
+        else:
+            print(f"✅ No new or changed comments to score; {total_rows} results already in: {OUTPUT_FILE_PATH}")
+        refresh_aggregates("sentiment")
+        print("--- Customer Comments Model Pipeline Completed ---")
+        return True
+    # غياب ملف التعليقات حالة متوقعة (لا تعليقات بعد)، أما وجوده مع فشل تحميل الموديل فهو فشل للـ pipeline
+    model_failed = os.path.exists(input_path)
+    if not model_failed:
+        print(f"⚠️ Reviews file not found at {input_path}.")
+    if resolve_table_path(OUTPUT_FILE_PATH) is not None:
+        # لا نستبدل النتائج المتراكمة بتعليقات افتراضية بسبب خطأ مؤقت؛ التشغيل التالي يكمل من حيث توقف
+        print(f"⚠️ Keeping the existing sentiment results in {OUTPUT_FILE_PATH} unchanged.")
+        print("--- Customer Comments Model Pipeline Completed ---")
+        return not model_failed
+    print("Using dummy comments and keyword-based sentiment for now.")
 
-    # --- Step 1: Define Dummy Customer Comments (Replace with real data loading) ---
+    # --- Step 2: Define Dummy Customer Comments (fallback) ---
     dummy_comments = [
         "خدمة تأجير السيارات كانت ممتازة وسريعة جداً. تجربة رائعة!",
         "السيارة كانت نظيفة ومريحة، لكن كان هناك تأخير بسيط في الاستلام.",
@@ -36,46 +285,38 @@ def run_sentiment_analysis_pipeline():
     ]
     print("✅ Dummy comments loaded.")
 
-    # --- Step 2: Perform Sentiment Analysis (Using dummy logic for now) ---
-    # هذا الجزء سيحتوي على منطق تحليل المشاعر الفعلي لاحقاً
-    # إذا كان لديك موديل sentiment_model و tfidf_vectorizer، يمكنك استخدامهم هنا
-    
+    # --- Step 3: Perform Sentiment Analysis (Using dummy logic) ---
     results = []
     for comment_id, comment_text in enumerate(dummy_comments):
-        sentiment = "Neutral" # قيمة افتراضية
-        sentiment_score = round(random.uniform(-1.0, 1.0), 2) # درجة مشاعر افتراضية
-
-        # مثال على منطق بسيط جداً لتحليل المشاعر (يمكن استبداله بموديلك)
-        if "ممتازة" in comment_text or "رائعة" in comment_text or "جيد" in comment_text:
-            sentiment = "Positive"
-        elif "سيئة" in comment_text or "متسخة" in comment_text or "فظيعة" in comment_text:
-            sentiment = "Negative"
-        else:
-            sentiment = "Neutral"
-            
-        # إذا كان لديك موديل، الكود الفعلي سيكون هكذا (مثال):
-        # if sentiment_model and tfidf_vectorizer:
-        #     comment_vec = tfidf_vectorizer.transform([comment_text])
-        #     prediction = sentiment_model.predict(comment_vec)[0]
-        #     sentiment = "Positive" if prediction == 1 else "Negative"
-        #     sentiment_score = sentiment_model.predict_proba(comment_vec)[0, prediction] # مثال
-
         results.append({
             "comment_id": comment_id + 1,
             "comment_text": comment_text,
             "analysis_date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "sentiment": sentiment,
-            "sentiment_score": sentiment_score
+            "sentiment": keyword_sentiment(comment_text),
+            "sentiment_score": round(random.uniform(-1.0, 1.0), 2) # درجة مشاعر افتراضية
         })
     print("✅ Sentiment analysis completed for dummy comments.")
 
-    # --- Step 3: Save Results to CSV ---
+    # --- Step 4: Save Results to CSV + Parquet ---
     df_results = pd.DataFrame(results)
-    df_results.to_csv(output_file_path, index=False)
-    print(f"✅ Sentiment analysis results saved to: {output_file_path}")
+    with track_stage("sentiment", "save", rows=len(df_results)):
+        save_table(df_results, OUTPUT_FILE_PATH)
+    print(f"✅ Sentiment analysis results saved to: {OUTPUT_FILE_PATH}")
+    refresh_aggregates("sentiment")
 
     print("--- Customer Comments Model Pipeline Completed ---")
+    return not model_failed
 
 if __name__ == "__main__":
-    run_sentiment_analysis_pipeline()
-
+    parser = argparse.ArgumentParser(description="Customer comments sentiment pipeline")
+    parser.add_argument("--input", default=REVIEWS_INPUT_PATH, help="CSV file with a comment_text column")
+    parser.add_argument("--chunksize", type=int, default=REVIEWS_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--register-model", action="store_true",
+                        help="store the model files under models/ as a new registry version and promote it")
+    args = parser.parse_args()
+    if args.register_model:
+        register_sentiment_model(joblib.load(SENTIMENT_MODEL_PATH), joblib.load(TFIDF_VECTORIZER_PATH),
+                                 params={"source": SENTIMENT_MODEL_PATH})
+    else:
+        run_sentiment_analysis_pipeline(args.input, args.chunksize, args.workers)
@@ -0,0 +1,251 @@
+import argparse
+import datetime
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from feature_cache import file_content_hash, make_cache_key
+from instrumentation import RUN_ID_ENV, new_run_id
+
+# منسّق تشغيل الـ pipelines اليومية كـ DAG
+# العقد المستقلة تعمل بالتوازي في عمليات منفصلة، والعقدة التي لم تتغير مدخلاتها ولا كودها منذ آخر تشغيل ناجح تُتخطى
+# نتيجة كل تشغيل تُكتب في data/run_manifest.json (وهو أيضاً مصدر البصمات للتشغيل التالي)
+
+RUN_MANIFEST_PATH = "data/run_manifest.json"
+SHARED_CODE = ["data_storage.py", "aggregates.py", "feature_cache.py", "instrumentation.py"]
+
+
+@dataclass
+class PipelineNode:
+    name: str
+    target: str  # "module:function"
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    code: list = field(default_factory=list)
+    depends_on: list = field(default_factory=list)
+    # soft_depends_on: تعمل بعد هذه العقد، لكن فشلها لا يمنع التشغيل (العقدة تتعامل مع مدخلات قديمة أو غائبة)
+    soft_depends_on: list = field(default_factory=list)
+    # volatile: مصدر بيانات خارجي (API) لا يمكن حساب بصمته، فالعقدة تعمل دائماً
+    volatile: bool = False
+    # قيمة إضافية تدخل في البصمة (مثلاً تاريخ اليوم لعقدة تسعّر بدءاً من اليوم)
+    extra_key: object = None
+
+
+PIPELINES = [
+    PipelineNode(
+        name="weather",
+        target="daily_forecast_pipeline:run_weather_model_pipeline",
+        outputs=["data/forecast_results/weather_forecast.csv"],
+        code=["daily_forecast_pipeline.py", "weather_fetcher.py", "timeseries_store.py"],
+        volatile=True,
+    ),
+    PipelineNode(
+        name="sentiment",
+        target="nlp_reviews_pipeline:run_sentiment_analysis_pipeline",
+        # ACTIVE.json يتغير عند ترقية إصدار جديد أو التراجع عنه في سجل الموديلات
+        inputs=["data/raw/customer_reviews.csv", "models/registry/sentiment_classifier/ACTIVE.json",
+                "models/sentiment_classifier_model.joblib", "models/tfidf_vectorizer.joblib"],
+        outputs=["data/sentiment_results/sentiment_analysis_results.csv", "data/aggregates/sentiment.json"],
+        code=["nlp_reviews_pipeline.py", "model_registry.py"],
+    ),
+    PipelineNode(
+        name="churn",
+        target="churn_model_pipeline:run_churn_scoring_pipeline",
+        inputs=["data/raw/WA_Fn-UseC_-Telco-Customer-Churn.csv", "models/registry/churn_classifier/ACTIVE.json",
+                "models/churn_classifier_model.joblib", "models/churn_feature_schema.json"],
+        outputs=["data/predictions/churn_predictions.csv", "data/aggregates/churn.json"],
+        code=["churn_model_pipeline.py", "model_registry.py"],
+    ),
+    PipelineNode(
+        name="pricing",
+        target="price_model_pipeline:run_price_model_pipeline",
+        # التسعير يستخدم توقعات الطقس كإشارة طلب، لذلك يعمل بعد عقدة الطقس
+        # (وبدونها يستخدم معامل طقس محايد 1.0، فلا يتوقف عند فشل الطقس)
+        inputs=["data/forecast_results/weather_forecast_hourly.csv"],
+        outputs=["data/pricing_results/optimal_prices.csv", "data/aggregates/pricing.json"],
+        code=["price_model_pipeline.py", "pricing_engine.py"],
+        soft_depends_on=["weather"],
+        extra_key=lambda: datetime.date.today().isoformat(),
+    ),
+    PipelineNode(
+        name="demand",
+        target="demand_forecast_pipeline:run_demand_forecast_pipeline",
+        # موديلات الطلب تستخدم سجل الطقس وتوقعاته، لذلك تعمل بعد عقدة الطقس (وبالتوازي مع التسعير)
+        inputs=["data/raw/daily_bookings.csv", "data/forecast_results/weather_forecast_hourly.csv"],
+        outputs=["data/forecast_results/demand_forecast.csv", "data/demand_forecast/series_state.npz"],
+        code=["demand_forecast_pipeline.py", "synthetic_data.py", "timeseries_store.py", "pricing_engine.py"],
+        soft_depends_on=["weather"],
+        # بدون ملف حجوزات يمتد السجل الاصطناعي حتى الأمس، فيتغير كل يوم
+        extra_key=lambda: datetime.date.today().isoformat(),
+    ),
+]
+
+
+def _hash_paths(paths):
+    return {path: file_content_hash(path) if os.path.exists(path) else "missing" for path in paths}
+
+
+def node_fingerprint(node):
+    """Hash of the node's input files, code files and extra key; None for volatile nodes."""
+    if node.volatile:
+        return None
+    extra = node.extra_key() if callable(node.extra_key) else node.extra_key
+    hashes = _hash_paths(list(node.inputs) + list(node.code) + SHARED_CODE)
+    return make_cache_key(node.target, json.dumps(hashes, sort_keys=True), extra)
+
+
+def load_manifest(path=RUN_MANIFEST_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(manifest, path=RUN_MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _last_successful_fingerprint(previous_manifest, name):
+    # البصمة المحفوظة هي بصمة آخر تشغيل ناجح (حتى لو تم تخطي العقدة في التشغيلات التالية)
+    entry = previous_manifest.get("nodes", {}).get(name, {})
+    return entry.get("fingerprint") if entry.get("status") in ("success", "skipped") else None
+
+
+def _run_node(target):
+    """Worker entry point: import and call ``module:function``; returns (ok, duration, error).
+
+    A pipeline fails by raising or by returning False (after printing its ❌ message).
+    """
+    module_name, func_name = target.split(":")
+    start = time.perf_counter()
+    try:
+        result = getattr(importlib.import_module(module_name), func_name)()
+    except Exception:
+        return False, time.perf_counter() - start, traceback.format_exc()
+    if result is False:
+        return False, time.perf_counter() - start, f"{target} reported a failure (see its ❌ output above)"
+    return True, time.perf_counter() - start, None
+
+
+def validate_dag(nodes):
+    names = {node.name for node in nodes}
+    for node in nodes:
+        unknown = set(node.depends_on + node.soft_depends_on) - names
+        if unknown:
+            raise ValueError(f"Pipeline '{node.name}' depends on unknown nodes: {sorted(unknown)}")
+    # التأكد من عدم وجود حلقات (cycle) بترتيب طوبولوجي بسيط
+    remaining = {node.name: set(node.depends_on + node.soft_depends_on) for node in nodes}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline DAG has a cycle between: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_pipelines(nodes=PIPELINES, only=None, force=False, max_workers=None, manifest_path=RUN_MANIFEST_PATH):
+    """Run the DAG and return the new manifest dict.
+
+    Entries of nodes that were not selected are carried over from the previous
+    manifest; ``manifest["selected"]`` lists the nodes of this run.
+    """
+    validate_dag(nodes)
+    if only:
+        # تشغيل عقد محددة مع كل ما تعتمد عليه
+        selected, stack = set(), list(only)
+        by_name = {node.name: node for node in nodes}
+        while stack:
+            name = stack.pop()
+            if name not in selected:
+                selected.add(name)
+                stack.extend(by_name[name].depends_on + by_name[name].soft_depends_on)
+        nodes = [node for node in nodes if node.name in selected]
+
+    previous = load_manifest(manifest_path)
+    run_started = time.perf_counter()
+    # معرف واحد للتشغيل ترثه كل العمليات العاملة، فتُجمع قياسات مراحلها تحت نفس التشغيل
+    run_id = new_run_id()
+    os.environ[RUN_ID_ENV] = run_id
+    # العقد غير المختارة (مع --only) تحتفظ بنتيجة وبصمة آخر تشغيل لها، حتى يتخطاها التشغيل الكامل التالي
+    manifest = {"run_id": run_id, "started_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "nodes": dict(previous.get("nodes", {})), "selected": [node.name for node in nodes]}
+    pending = {node.name: node for node in nodes}
+    status = {}
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers or len(nodes)) as pool:
+        while pending or running:
+            for name, node in list(pending.items()):
+                upstream = [status.get(dep) for dep in node.depends_on]
+                if any(state in ("failed", "blocked") for state in upstream):
+                    del pending[name]
+                    status[name] = "blocked"
+                    manifest["nodes"][name] = {"status": "blocked", "reason": "upstream pipeline failed"}
+                    print(f"⚠️ [{name}] not run: an upstream pipeline failed.")
+                    continue
+                if not all(state in ("success", "skipped") for state in upstream):
+                    continue
+                if any(dep not in status for dep in node.soft_depends_on):
+                    continue
+                del pending[name]
+                # البصمة تُحسب عند الجاهزية، أي بعد أن كتبت العقد السابقة مخرجاتها
+                fingerprint = node_fingerprint(node)
+                unchanged = fingerprint is not None and fingerprint == _last_successful_fingerprint(previous, name)
+                if unchanged and not force and all(os.path.exists(path) for path in node.outputs):
+                    status[name] = "skipped"
+                    manifest["nodes"][name] = {"status": "skipped", "fingerprint": fingerprint, "outputs": node.outputs}
+                    print(f"✅ [{name}] inputs and code unchanged; skipping.")
+                    continue
+                print(f"▶️ [{name}] starting {node.target}")
+                running[pool.submit(_run_node, node.target)] = (node, fingerprint)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node, fingerprint = running.pop(future)
+                ok, duration, error = future.result()
+                if ok and fingerprint is not None:
+                    # إعادة الحساب بعد التشغيل: العقدة قد تكتب بعض مدخلاتها
+                    fingerprint = node_fingerprint(node)
+                status[node.name] = "success" if ok else "failed"
+                manifest["nodes"][node.name] = {
+                    "status": status[node.name],
+                    "fingerprint": fingerprint if ok else None,
+                    "duration_s": round(duration, 3),
+                    "outputs": node.outputs,
+                }
+                if ok:
+                    print(f"✅ [{node.name}] finished in {duration:.1f}s")
+                else:
+                    manifest["nodes"][node.name]["error"] = error.strip().splitlines()[-1]
+                    print(f"❌ [{node.name}] failed after {duration:.1f}s:\n{error}")
+
+    manifest["finished_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    manifest["wall_time_s"] = round(time.perf_counter() - run_started, 3)
+    write_manifest(manifest, manifest_path)
+    print(f"✅ Run manifest saved to {manifest_path} (wall time {manifest['wall_time_s']:.1f}s)")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the daily pipelines as a DAG, skipping unchanged ones")
+    parser.add_argument("--only", nargs="+", choices=[node.name for node in PIPELINES],
+                        help="run only these pipelines (and what they depend on)")
+    parser.add_argument("--force", action="store_true", help="run every selected pipeline even if unchanged")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per pipeline)")
+    args = parser.parse_args()
+    result = run_pipelines(only=args.only, force=args.force, max_workers=args.workers)
+    # حالة الخروج من عقد هذا التشغيل فقط، لا من نتائج قديمة محفوظة في الـ manifest
+    sys.exit(1 if any(result["nodes"][name]["status"] in ("failed", "blocked") for name in result["selected"]) else 0)
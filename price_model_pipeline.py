@@ -1,9 +1,30 @@
+import argparse
 import datetime
 import pandas as pd
 import os
-import random
+from aggregates import refresh_aggregates
+from data_storage import load_table, resolve_table_path, save_table
+from instrumentation import track_stage
+from daily_forecast_pipeline import HOURLY_FORECAST_FILE_PATH
+from pricing_engine import (
+    CAR_CATEGORIES, RENTAL_BRANCHES, compute_price_grid, date_axis, grid_to_frame, weather_demand_factors,
+)
 
-def run_price_model_pipeline():
+# عدد الأيام القادمة التي تُحسب لها الأسعار (7 = أسبوع واحد، كل يوم من أيام الأسبوع مرة واحدة)
+DEFAULT_HORIZON_DAYS = 7
+
+
+def load_daily_temperatures(path=HOURLY_FORECAST_FILE_PATH):
+    """Mean forecast temperature per day from the weather pipeline, or an empty Series."""
+    if resolve_table_path(path) is None:
+        return pd.Series(dtype=float)
+    df = load_table(path, columns=["forecast_time", "temperature_celsius"])
+    days = pd.to_datetime(df["forecast_time"]).dt.normalize()
+    return df.groupby(days)["temperature_celsius"].mean()
+
+
+@track_stage("pricing", "total")
+def run_price_model_pipeline(horizon_days=DEFAULT_HORIZON_DAYS, start_date=None, write_csv=True):
     print("--- Starting Price Model Pipeline ---")
 
     # Define output directory and file path
@@ -15,45 +36,34 @@ def run_price_model_pipeline():
 
     # Get current time
     current_time = datetime.datetime.now()
+    dates = date_axis(start_date or current_time.date(), horizon_days)
+
+    # إشارة الطلب من توقعات الطقس (الأيام بدون توقع تأخذ معامل 1.0)
+    daily_temperatures = load_daily_temperatures()
+    demand_factors = weather_demand_factors(dates, daily_temperatures)
+    if daily_temperatures.empty:
+        print("⚠️ No weather forecast found; pricing without a weather demand signal.")
+    else:
+        print(f"✅ Weather demand signal applied to {int((demand_factors != 1.0).sum())} of {len(dates)} days.")
+
+    # حساب الشبكة كاملة (فئة × فرع × تاريخ) دفعة واحدة
+    with track_stage("pricing", "grid", rows=len(CAR_CATEGORIES) * len(RENTAL_BRANCHES) * len(dates)):
+        prices = compute_price_grid(CAR_CATEGORIES, RENTAL_BRANCHES, dates, demand_factors)
+        df_prices = grid_to_frame(prices, CAR_CATEGORIES, RENTAL_BRANCHES, dates, current_time.strftime("%Y-%m-%d %H:%M:%S"))
 
-    # Define some dummy data for pricing factors (replace with actual data loading/forecasting)
-    car_categories = ['اقتصادية', 'سيدان', 'دفع رباعي', 'فان', 'فاخرة']
-    rental_branches = ['المطار', 'وسط المدينة', 'الشمال', 'الجنوب', 'آخر']
-    day_of_weeks = ['الاحد', 'الاثنين', 'الثلاثاء', 'الاربعاء', 'الخميس', 'الجمعة', 'السبت']
-
-    # Generate dummy optimal prices (replace with your actual pricing model logic)
-    pricing_data = []
-    for category in car_categories:
-        for branch in rental_branches:
-            for day in day_of_weeks:
-                base_price = 150 # Example base price
-                # Simulate peak/off-peak pricing
-                if day in ['الخميس', 'الجمعة', 'السبت']: # Weekend/peak days
-                    suggested_price = base_price * (1 + random.uniform(0.1, 0.3)) # Increase by 10-30%
-                else: # Weekdays/off-peak
-                    suggested_price = base_price * (1 - random.uniform(0.05, 0.15)) # Decrease by 5-15%
-
-                # Further adjustment based on category (dummy logic)
-                if category == 'فاخرة': suggested_price *= 1.5
-                elif category == 'دفع رباعي': suggested_price *= 1.2
-                elif category == 'اقتصادية': suggested_price *= 0.8
-
-                pricing_data.append({
-                    "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "car_category": category,
-                    "rental_branch": branch,
-                    "day_of_week": day,
-                    "suggested_price": round(suggested_price, 2)
-                })
-
-    df_prices = pd.DataFrame(pricing_data)
-
-    # Save the optimal prices to a CSV file
-    df_prices.to_csv(output_file_path, index=False)
+    # Save the optimal prices to a CSV file (and a Parquet copy for the dashboard)
+    with track_stage("pricing", "save", rows=len(df_prices)):
+        save_table(df_prices, output_file_path, write_csv=write_csv)
 
     print(f"✅ Price model pipeline ran successfully at: {current_time}")
-    print(f"✅ Optimal prices saved to: {output_file_path}")
+    print(f"✅ {len(df_prices):,} optimal prices ({len(dates)} days) saved to: {output_file_path}")
+    refresh_aggregates("pricing")
     print("--- Price Model Pipeline Completed ---")
 
 if __name__ == "__main__":
-    run_price_model_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Compute suggested rental prices for every category, branch and date")
+    parser.add_argument("--horizon-days", type=int, default=DEFAULT_HORIZON_DAYS)
+    parser.add_argument("--start-date", default=None, help="first priced date (YYYY-MM-DD, default: today)")
+    parser.add_argument("--no-csv", action="store_true", help="write only the Parquet output (for long horizons)")
+    args = parser.parse_args()
+    run_price_model_pipeline(horizon_days=args.horizon_days, start_date=args.start_date, write_csv=not args.no_csv)
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+from data_storage import load_table, resolve_table_path
+
+# خدمة عرض الأسعار: فهرس (فئة، فرع، يوم) → سعر في الذاكرة بدلاً من البحث في جدول الأسعار كاملاً عند كل طلب
+# يُعاد بناء الفهرس تلقائياً عندما يكتب pipeline التسعير ملفاً جديداً، ويُستبدل دفعة واحدة دون إيقاف الطلبات
+# التشغيل كخدمة HTTP محلية: python price_quote_service.py --port 8600
+
+PRICES_PATH = "data/pricing_results/optimal_prices.csv"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+# أقل فترة (بالثواني) بين فحصين لتغير ملف الأسعار، حتى لا يكلف كل طلب استدعاء os.stat
+RELOAD_CHECK_INTERVAL_SECONDS = 2.0
+MAX_BATCH_SIZE = 10_000
+
+
+class PriceIndex:
+    """Immutable hash index over one pricing output.
+
+    ``day`` may be a date (``YYYY-MM-DD``) or a day-of-week name; a day name
+    resolves to the earliest priced date falling on that weekday.
+    """
+
+    def __init__(self, df, source=None):
+        categories = df['car_category'].astype(str).tolist()
+        branches = df['rental_branch'].astype(str).tolist()
+        prices = df['suggested_price'].astype(float).round(2).tolist()
+        self._by_date = {}
+        if 'date' in df.columns:
+            dates = pd.to_datetime(df['date']).dt.strftime("%Y-%m-%d").tolist()
+            self._by_date = dict(zip(zip(categories, branches, dates), prices))
+        # الصفوف مرتبة حسب التاريخ: نعكسها حتى يبقى في القاموس أقرب تاريخ لكل يوم من أيام الأسبوع
+        weekday_keys = list(zip(categories, branches, df['day_of_week'].astype(str).tolist()))
+        self._by_weekday = dict(zip(reversed(weekday_keys), reversed(prices)))
+        self.source = source
+        self.size = len(df)
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_path(cls, path=PRICES_PATH):
+        columns = ['car_category', 'rental_branch', 'date', 'day_of_week', 'suggested_price']
+        return cls(load_table(path, columns=columns), source=resolve_table_path(path))
+
+    def lookup(self, category, branch, day):
+        key = (str(category), str(branch), str(day))
+        price = self._by_date.get(key)
+        if price is None:
+            price = self._by_weekday.get(key)
+        return price
+
+
+class PriceQuoteService:
+    """Serves lookups from the current PriceIndex and swaps in a new one when the pricing output changes."""
+
+    def __init__(self, path=PRICES_PATH, check_interval_s=RELOAD_CHECK_INTERVAL_SECONDS):
+        self.path = path
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._index = None
+        self._signature = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self.reload_if_changed(force=True)
+
+    def _file_signature(self):
+        resolved = resolve_table_path(self.path)
+        if resolved is None:
+            return None
+        stat = os.stat(resolved)
+        return resolved, stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self, force=False):
+        """Rebuild the index if the pricing output changed; returns True when a new index was installed."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        # طلب واحد فقط يعيد البناء؛ باقي الطلبات تستمر على الفهرس الحالي
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            self._next_check = now + self.check_interval_s
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                return False
+            try:
+                index = PriceIndex.from_path(self.path)
+            except Exception as e:
+                # ملف قيد الكتابة أو تالف: نحتفظ بالفهرس السابق ونحاول في الفحص التالي
+                print(f"⚠️ Could not reload prices from {signature[0]}: {e}")
+                return False
+            # استبدال المرجع عملية ذرية: كل طلب يرى الفهرس القديم أو الجديد كاملاً
+            self._index = index
+            self._signature = signature
+            self.reloads += 1
+            return True
+        finally:
+            self._lock.release()
+
+    def quote(self, category, branch, day):
+        self.reload_if_changed()
+        index = self._index
+        return None if index is None else index.lookup(category, branch, day)
+
+    def quote_many(self, items):
+        self.reload_if_changed()
+        index = self._index
+        if index is None:
+            return [None] * len(items)
+        return [index.lookup(item.get('category'), item.get('branch'), item.get('day')) for item in items]
+
+    def status(self):
+        index = self._index
+        return {
+            "source": None if index is None else index.source,
+            "prices": 0 if index is None else index.size,
+            "loaded_at": None if index is None else index.loaded_at,
+            "reloads": self.reloads,
+        }
+
+
+class PriceQuoteHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 حتى يعيد العملاء استخدام نفس الاتصال (keep-alive) بدلاً من اتصال جديد لكل طلب
+    protocol_version = "HTTP/1.1"
+    # بدون Nagle: الردود الصغيرة تُرسل فوراً بدلاً من انتظار ACK (~40ms) على الاتصالات الدائمة
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send_json(200, self.service.status())
+            return
+        if url.path != "/quote":
+            self._send_json(404, {"error": "unknown endpoint"})
+            return
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        missing = [key for key in ("category", "branch", "day") if key not in params]
+        if missing:
+            self._send_json(400, {"error": f"missing parameters: {', '.join(missing)}"})
+            return
+        price = self.service.quote(params["category"], params["branch"], params["day"])
+        if price is None:
+            self._send_json(404, {**params, "price": None, "error": "no price for this combination"})
+        else:
+            self._send_json(200, {**params, "price": price})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/quotes":
+            self._send_json(404, {"error": "unknown endpoint"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            items = json.loads(self.rfile.read(length) or b"{}").get("items", [])
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": "body must be JSON: {\"items\": [{\"category\", \"branch\", \"day\"}, ...]}"})
+            return
+        if not isinstance(items, list) or len(items) > MAX_BATCH_SIZE or not all(isinstance(item, dict) for item in items):
+            self._send_json(400, {"error": f"items must be a list of at most {MAX_BATCH_SIZE} lookup objects"})
+            return
+        self._send_json(200, {"prices": self.service.quote_many(items)})
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type("BoundPriceQuoteHandler", (PriceQuoteHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve suggested rental prices over HTTP/JSON")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--prices", default=PRICES_PATH)
+    args = parser.parse_args()
+
+    service = PriceQuoteService(args.prices)
+    if service.status()["prices"] == 0:
+        print(f"⚠️ No pricing output found at {args.prices}; the service will pick it up once it is written.")
+    server = make_server(service, args.host, args.port)
+    print(f"✅ Price quote service listening on http://{args.host}:{args.port} "
+          f"(GET /quote?category=&branch=&day=, POST /quotes, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
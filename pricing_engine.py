@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# محرك التسعير الديناميكي: يحسب شبكة الأسعار كاملة (فئة × فرع × تاريخ) دفعة واحدة بـ NumPy broadcasting
+# السعر = السعر الأساسي × معامل الفئة × معامل الفرع × معامل يوم الأسبوع × معامل الموسم × معامل الطلب (الطقس)
+
+BASE_PRICE = 150.0
+
+CAR_CATEGORIES = ['اقتصادية', 'سيدان', 'دفع رباعي', 'فان', 'فاخرة']
+CATEGORY_MULTIPLIERS = {'اقتصادية': 0.8, 'سيدان': 1.0, 'دفع رباعي': 1.2, 'فان': 1.1, 'فاخرة': 1.5}
+
+RENTAL_BRANCHES = ['المطار', 'وسط المدينة', 'الشمال', 'الجنوب', 'آخر']
+# الفروع غير الموجودة هنا تأخذ المعامل 1.0
+BRANCH_MULTIPLIERS = {'المطار': 1.1, 'وسط المدينة': 1.05}
+
+# أيام الأسبوع بترتيب Python (datetime.weekday: الاثنين = 0)
+DAY_NAMES = ['الاثنين', 'الثلاثاء', 'الاربعاء', 'الخميس', 'الجمعة', 'السبت', 'الاحد']
+# الخميس والجمعة والسبت أيام ذروة (+20%)، باقي الأيام خصم 10%
+WEEKDAY_FACTORS = np.array([0.9, 0.9, 0.9, 1.2, 1.2, 1.2, 0.9])
+# معامل لكل شهر (يناير = 0): الصيف وإجازة نهاية السنة أعلى طلباً
+MONTH_FACTORS = np.array([1.0, 1.0, 1.05, 1.05, 1.0, 1.15, 1.2, 1.2, 1.0, 1.0, 1.0, 1.1])
+
+# الطلب على السيارات يرتفع مع الحر الشديد (أقل مشياً وتنقلاً بالسيارة)
+COMFORT_TEMPERATURE_CELSIUS = 30.0
+WEATHER_SENSITIVITY = 0.05  # +5% لكل 10 درجات فوق درجة الراحة
+MAX_DEMAND_ADJUSTMENT = 0.15
+
+
+def date_axis(start_date, horizon_days):
+    return pd.date_range(pd.Timestamp(start_date).normalize(), periods=horizon_days, freq="D")
+
+
+def weather_demand_factors(dates, daily_temperatures):
+    """Demand multiplier per date from a ``{date: mean temperature}`` Series; 1.0 where unknown."""
+    temps = pd.Series(daily_temperatures, dtype=float).reindex(dates).to_numpy()
+    adjustment = np.clip(WEATHER_SENSITIVITY * (temps - COMFORT_TEMPERATURE_CELSIUS) / 10,
+                         -MAX_DEMAND_ADJUSTMENT, MAX_DEMAND_ADJUSTMENT)
+    return np.where(np.isnan(adjustment), 1.0, 1.0 + adjustment)
+
+
+def compute_price_grid(categories, branches, dates, demand_factors=None, base_price=BASE_PRICE):
+    """Return a (categories, branches, dates) float32 array of suggested prices.
+
+    ``demand_factors`` is either one value per date or a (branches, dates) array
+    for branch-specific demand.
+    """
+    dates = pd.DatetimeIndex(dates)
+    category_factor = np.array([CATEGORY_MULTIPLIERS.get(c, 1.0) for c in categories])[:, None, None]
+    branch_factor = np.array([BRANCH_MULTIPLIERS.get(b, 1.0) for b in branches])[None, :, None]
+    date_factor = WEEKDAY_FACTORS[dates.weekday.to_numpy()] * MONTH_FACTORS[dates.month.to_numpy() - 1]
+    if demand_factors is None:
+        demand = np.ones((1, 1, len(dates)))
+    else:
+        demand = np.asarray(demand_factors, dtype=float)
+        demand = demand[None, :, :] if demand.ndim == 2 else demand[None, None, :]
+
+    # (C,1,1) × (1,B,1) × (1,1,D) × (1,B|1,D) → (C,B,D) بدون أي حلقة Python
+    prices = base_price * category_factor * branch_factor * date_factor[None, None, :] * demand
+    return np.round(prices, 2).astype(np.float32)
+
+
+def grid_to_frame(prices, categories, branches, dates, timestamp):
+    """Flatten a price grid to the long table layout used by optimal_prices.csv.
+
+    The label columns are built as categoricals from integer codes, so no
+    per-row Python objects are created even for tens of millions of cells.
+    """
+    n_categories, n_branches, n_dates = prices.shape
+    n_cells = prices.size
+    dates = pd.DatetimeIndex(dates)
+    date_codes = np.tile(np.arange(n_dates, dtype=np.int32), n_categories * n_branches)
+    weekday_codes = dates.weekday.to_numpy().astype(np.int8)[date_codes]
+    return pd.DataFrame({
+        "timestamp": pd.Categorical.from_codes(np.zeros(n_cells, dtype=np.int8), [timestamp]),
+        "car_category": pd.Categorical.from_codes(
+            np.repeat(np.arange(n_categories, dtype=np.int32), n_branches * n_dates), categories),
+        "rental_branch": pd.Categorical.from_codes(
+            np.tile(np.repeat(np.arange(n_branches, dtype=np.int32), n_dates), n_categories), branches),
+        "date": dates.to_numpy()[date_codes],
+        "day_of_week": pd.Categorical.from_codes(weekday_codes, DAY_NAMES),
+        "suggested_price": prices.reshape(-1),
+    })
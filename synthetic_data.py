@@ -0,0 +1,253 @@
+import argparse
+import datetime
+import os
+import numpy as np
+import pandas as pd
+from pricing_engine import MONTH_FACTORS, WEEKDAY_FACTORS, compute_price_grid, date_axis, grid_to_frame
+
+# مولدات بيانات اصطناعية بنفس مخطط (schema) ملفات المشروع، لاختبار الأداء على أحجام أكبر بكثير من البيانات الحقيقية
+# (من 10 آلاف إلى 10 ملايين صف). كل المولدات حتمية: نفس seed = نفس البيانات
+# أمثلة: python synthetic_data.py churn --rows 1m --output data/raw/WA_Fn-UseC_-Telco-Customer-Churn.csv
+#        python synthetic_data.py reviews --rows 100k --output data/raw/customer_reviews.csv
+
+# الأحجام المعتادة لقياسات الأداء
+SCALES = ["10k", "100k", "1m", "10m"]
+# عدد الصفوف التي تُولَّد وتُكتب في كل دفعة، حتى لا تحتاج الملايين من الصفوف إلى ذاكرة بحجمها
+GENERATION_CHUNKSIZE = 500_000
+
+TELCO_COLUMNS = [
+    "customerID", "gender", "SeniorCitizen", "Partner", "Dependents", "tenure", "PhoneService", "MultipleLines",
+    "InternetService", "OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV",
+    "StreamingMovies", "Contract", "PaperlessBilling", "PaymentMethod", "MonthlyCharges", "TotalCharges", "Churn",
+]
+INTERNET_ADDONS = ["OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV", "StreamingMovies"]
+# نسب تقريبية من ملف Telco الحقيقي
+INTERNET_SERVICE_SHARES = {"Fiber optic": 0.44, "DSL": 0.344, "No": 0.216}
+CONTRACT_SHARES = {"Month-to-month": 0.55, "One year": 0.209, "Two year": 0.241}
+PAYMENT_METHOD_SHARES = {
+    "Electronic check": 0.336, "Mailed check": 0.229, "Bank transfer (automatic)": 0.219, "Credit card (automatic)": 0.216,
+}
+ADDON_SHARE_WITH_INTERNET = {
+    "OnlineSecurity": 0.37, "OnlineBackup": 0.44, "DeviceProtection": 0.44,
+    "TechSupport": 0.37, "StreamingTV": 0.49, "StreamingMovies": 0.5,
+}
+
+POSITIVE_PHRASES = [
+    "خدمة تأجير السيارات كانت ممتازة وسريعة جداً", "تجربة رائعة", "السيارة نظيفة ومريحة", "الموظفون متعاونون",
+    "السعر جيد", "الاستلام كان سريعاً", "سأتعامل معكم مرة أخرى",
+]
+NEGATIVE_PHRASES = [
+    "تجربة سيئة للغاية", "السيارة كانت متسخة", "خدمة عملاء فظيعة", "تأخير طويل في الاستلام",
+    "السيارة تحتاج إلى صيانة", "لن أتعامل مع هذه الشركة مرة أخرى",
+]
+WEATHER_CONDITIONS = ["clear sky", "few clouds", "scattered clouds", "broken clouds", "light rain", "dust"]
+
+
+def parse_rows(value):
+    """Accept a row count as ``10000`` or with a ``k`` / ``m`` suffix such as ``10k`` / ``2.5m``."""
+    value = str(value).lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def _choice(rng, shares, n):
+    labels = np.array(list(shares.keys()), dtype=object)
+    probabilities = np.array(list(shares.values()))
+    return labels[rng.choice(len(labels), size=n, p=probabilities / probabilities.sum())]
+
+
+def _yes_no(mask):
+    return np.where(mask, "Yes", "No").astype(object)
+
+
+def customer_ids(start, n):
+    """Unique Telco-style IDs (``1234-ABCDE``) for rows ``start .. start + n - 1``."""
+    index = np.arange(start, start + n, dtype=np.int64)
+    chars = np.empty((n, 10), dtype=np.uint8)
+    digits = index % 10_000
+    for position in range(4):
+        chars[:, 3 - position] = ord("0") + (digits // 10 ** position) % 10
+    chars[:, 4] = ord("-")
+    letters = index // 10_000
+    for position in range(5):
+        chars[:, 9 - position] = ord("A") + (letters // 26 ** position) % 26
+    return chars.view("S10").ravel().astype(str).astype(object)
+
+
+def synthetic_churn_customers(n, seed=42, start_id=0):
+    """``n`` Telco churn customers with the raw file's columns, value sets and rough distributions.
+
+    Dependent columns stay consistent (no internet service -> "No internet service" add-ons,
+    TotalCharges ~ tenure x MonthlyCharges and empty for tenure 0), and Churn follows
+    a logistic model of contract, tenure, fiber and payment method so models have signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    tenure = np.clip(np.round(rng.exponential(30, n)), 0, 72).astype(np.int64)
+    phone = rng.random(n) < 0.903
+    internet = _choice(rng, INTERNET_SERVICE_SHARES, n)
+    has_internet = internet != "No"
+    contract = _choice(rng, CONTRACT_SHARES, n)
+    payment = _choice(rng, PAYMENT_METHOD_SHARES, n)
+    senior = (rng.random(n) < 0.162).astype(np.int64)
+
+    df = pd.DataFrame({
+        "customerID": customer_ids(start_id, n),
+        "gender": np.where(rng.random(n) < 0.505, "Male", "Female").astype(object),
+        "SeniorCitizen": senior,
+        "Partner": _yes_no(rng.random(n) < 0.483),
+        "Dependents": _yes_no(rng.random(n) < 0.3),
+        "tenure": tenure,
+        "PhoneService": _yes_no(phone),
+        "MultipleLines": np.where(phone, _yes_no(rng.random(n) < 0.467), "No phone service").astype(object),
+        "InternetService": internet,
+    })
+    monthly = 20.0 + np.where(internet == "Fiber optic", 50.0, np.where(internet == "DSL", 25.0, 0.0))
+    monthly += np.where(df["MultipleLines"] == "Yes", 5.0, 0.0)
+    for addon in INTERNET_ADDONS:
+        taken = has_internet & (rng.random(n) < ADDON_SHARE_WITH_INTERNET[addon])
+        df[addon] = np.where(has_internet, _yes_no(taken), "No internet service").astype(object)
+        monthly += np.where(taken, 5.0, 0.0)
+    df["Contract"] = contract
+    df["PaperlessBilling"] = _yes_no(rng.random(n) < 0.592)
+    df["PaymentMethod"] = payment
+    monthly = np.clip(monthly + rng.normal(0, 3, n), 18.25, 118.75).round(2)
+    df["MonthlyCharges"] = monthly
+    # العملاء الجدد (tenure = 0) ليس لهم إجمالي بعد، كما في الملف الحقيقي
+    total = (monthly * tenure * rng.uniform(0.95, 1.05, n)).round(2)
+    df["TotalCharges"] = np.where(tenure > 0, total, np.nan)
+
+    logit = (-1.6 + 1.3 * (contract == "Month-to-month") - 1.2 * (contract == "Two year")
+             + 0.9 * (internet == "Fiber optic") - 0.035 * tenure + 0.5 * (payment == "Electronic check")
+             + 0.3 * senior - 0.4 * (df["TechSupport"] == "Yes").to_numpy())
+    df["Churn"] = _yes_no(rng.random(n) < 1.0 / (1.0 + np.exp(-logit)))
+    return df[TELCO_COLUMNS]
+
+
+def synthetic_reviews(n, seed=42, duplicate_share=0.1, start_id=1, with_labels=False):
+    """``n`` Arabic customer reviews (``comment_id``, ``comment_text``).
+
+    About ``duplicate_share`` of the comments repeat an earlier text, so the
+    hash-based skipping in the sentiment pipeline has work to do. With
+    ``with_labels`` a ``label`` column (1 positive / 0 negative) is added.
+    """
+    rng = np.random.default_rng(seed)
+    positive = rng.random(n) < 0.6
+    phrases_pos = np.array(POSITIVE_PHRASES, dtype=object)
+    phrases_neg = np.array(NEGATIVE_PHRASES, dtype=object)
+    first = np.where(positive, phrases_pos[rng.integers(0, len(phrases_pos), n)], phrases_neg[rng.integers(0, len(phrases_neg), n)])
+    second = np.where(positive, phrases_pos[rng.integers(0, len(phrases_pos), n)], phrases_neg[rng.integers(0, len(phrases_neg), n)])
+    # رقم الحجز يجعل كل تعليق فريداً، ثم تُكرر نسبة منها عمداً
+    booking = rng.integers(10_000, 99_999_999, n).astype(str)
+    text = pd.Series(first + "، " + second + " (حجز رقم " + booking.astype(object) + ")")
+    duplicates = np.flatnonzero(rng.random(n) < duplicate_share)
+    duplicates = duplicates[duplicates > 0]
+    source = (rng.random(len(duplicates)) * duplicates).astype(np.int64)
+    text.iloc[duplicates] = text.iloc[source].to_numpy()
+    positive[duplicates] = positive[source]
+
+    df = pd.DataFrame({"comment_id": np.arange(start_id, start_id + n), "comment_text": text.to_numpy()})
+    if with_labels:
+        df["label"] = positive.astype(np.int64)
+    return df
+
+
+def seasonal_temperature(timestamps):
+    """Typical daily mean temperature (°C) of a hot coastal city for each timestamp: a yearly sine cycle."""
+    day_of_year = pd.DatetimeIndex(timestamps).dayofyear.to_numpy()
+    return 30 + 8 * np.sin(2 * np.pi * (day_of_year - 110) / 365.25)
+
+
+def synthetic_weather_history(n, n_locations=10, end=None, freq="3h", seed=42):
+    """About ``n`` readings (``timestamp``, ``location``, ``temperature_celsius``, ``condition``) for ``n_locations`` cities."""
+    rng = np.random.default_rng(seed)
+    periods = max(1, n // n_locations)
+    end = pd.Timestamp(end or datetime.datetime.now()).floor(freq)
+    timestamps = pd.date_range(end=end, periods=periods, freq=freq)
+    locations = [f"City {i + 1}" for i in range(n_locations)]
+
+    hour = timestamps.hour.to_numpy()
+    # دورة سنوية + دورة يومية + فرق ثابت لكل مدينة + ضوضاء
+    seasonal = seasonal_temperature(timestamps) + 4 * np.sin(2 * np.pi * (hour - 9) / 24)
+    offsets = rng.normal(0, 3, n_locations)
+    temperature = (seasonal[:, None] + offsets[None, :] + rng.normal(0, 1.5, (periods, n_locations))).round(2)
+    return pd.DataFrame({
+        "timestamp": np.repeat(timestamps.to_numpy(), n_locations),
+        "location": np.tile(np.array(locations, dtype=object), periods),
+        "temperature_celsius": temperature.ravel(),
+        "condition": np.array(WEATHER_CONDITIONS, dtype=object)[rng.integers(0, len(WEATHER_CONDITIONS), periods * n_locations)],
+    })
+
+
+def synthetic_daily_bookings(branches, categories, start, end, temperatures=None, seed=42):
+    """Daily booking counts (``date``, ``rental_branch``, ``car_category``, ``bookings``) of every branch x category.
+
+    Demand follows the pricing engine's weekday and month factors plus a heat
+    effect from ``temperatures`` (daily means indexed by date; other days use
+    ``seasonal_temperature``). Noise is drawn day by day, so extending ``end``
+    keeps the earlier days unchanged.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    n_series = len(branches) * len(categories)
+    # مستوى طلب ثابت لكل سلسلة (فرع × فئة)، ثم معاملات اليوم والشهر والحرارة المشتركة
+    levels = rng.gamma(4.0, 3.0, n_series)
+    temps = pd.Series(temperatures, dtype=float).reindex(dates).to_numpy() if temperatures is not None else np.full(len(dates), np.nan)
+    temps = np.where(np.isnan(temps), seasonal_temperature(dates), temps)
+    heat = 1 + np.clip(0.02 * (temps - 30), -0.1, 0.3)
+    expected = levels[None, :] * (WEEKDAY_FACTORS[dates.weekday] * MONTH_FACTORS[dates.month - 1] * heat)[:, None]
+    counts = np.maximum(0, np.round(expected + np.sqrt(expected) * rng.standard_normal((len(dates), n_series))))
+    return pd.DataFrame({
+        "date": np.repeat(dates.to_numpy(), n_series),
+        "rental_branch": np.tile(np.repeat(np.array(branches, dtype=object), len(categories)), len(dates)),
+        "car_category": np.tile(np.array(categories, dtype=object), len(dates) * len(branches)),
+        "bookings": counts.ravel().astype(np.int64),
+    })
+
+
+def synthetic_pricing_grid(n, n_categories=20, days=365, start=None):
+    """A suggested-price table of about ``n`` rows (categories x branches x days), in the pricing pipeline's format."""
+    n_branches = max(1, n // (n_categories * days))
+    categories = [f"Category {i + 1}" for i in range(n_categories)]
+    branches = [f"Branch {i + 1}" for i in range(n_branches)]
+    dates = date_axis(start or datetime.date.today(), days)
+    prices = compute_price_grid(categories, branches, dates)
+    return grid_to_frame(prices, categories, branches, dates, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def write_synthetic_csv(kind, n, output_path, seed=42, chunksize=GENERATION_CHUNKSIZE):
+    """Generate ``n`` rows of ``kind`` ("churn" or "reviews") into ``output_path`` chunk by chunk."""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    written = 0
+    for chunk_number, start in enumerate(range(0, n, chunksize)):
+        size = min(chunksize, n - start)
+        # seed مختلف لكل دفعة، والمعرفات تبدأ من حيث انتهت الدفعة السابقة
+        if kind == "churn":
+            chunk = synthetic_churn_customers(size, seed=seed + chunk_number, start_id=start)
+        elif kind == "reviews":
+            chunk = synthetic_reviews(size, seed=seed + chunk_number, start_id=start + 1)
+        else:
+            raise ValueError(f"Unknown synthetic dataset '{kind}'")
+        chunk.to_csv(output_path, mode="w" if chunk_number == 0 else "a", header=chunk_number == 0, index=False)
+        written += size
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write schema-faithful synthetic data for load testing")
+    parser.add_argument("kind", choices=["churn", "reviews", "weather", "pricing"])
+    parser.add_argument("--rows", default="10k", help="row count or scale name (10k, 100k, 1m, 10m)")
+    parser.add_argument("--output", required=True, help="output CSV path")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    if args.kind in ("churn", "reviews"):
+        rows = write_synthetic_csv(args.kind, rows, args.output, seed=args.seed)
+    else:
+        df = synthetic_weather_history(rows, seed=args.seed) if args.kind == "weather" else synthetic_pricing_grid(rows)
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        df.to_csv(args.output, index=False)
+        rows = len(df)
+    print(f"✅ {rows:,} synthetic {args.kind} rows written to {args.output}")
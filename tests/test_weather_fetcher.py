@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sys
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from weather_fetcher import fetch_weather_async  # noqa: E402
+
+# اختبار جلب الطقس مقابل خادم HTTP محلي بديل (stub) بدلاً من OpenWeatherMap
+# التشغيل من جذر المستودع: python -m pytest -q tests
+
+
+def fetch_from_stub(handler, tmp_path, locations=("Jeddah",), **kwargs):
+    """Serve ``handler`` on a local port and fetch the current weather for ``locations`` from it."""
+    calls = []
+
+    async def counted(request):
+        calls.append(request.query["q"])
+        return await handler(request)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/weather", counted)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            options = {"retries": 2, "backoff_s": 0.01, "timeout_s": 2, "cache_dir": str(tmp_path), **kwargs}
+            return await fetch_weather_async(list(locations), "test-key", endpoints=("weather",),
+                                             base_url=f"http://127.0.0.1:{port}", **options)
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run()), calls
+
+
+def test_success_is_returned_and_cached(tmp_path):
+    async def handler(request):
+        return web.json_response({"name": request.query["q"], "main": {"temp": 31.5}})
+
+    results, calls = fetch_from_stub(handler, tmp_path, locations=("Jeddah", "Riyadh"))
+    assert [result["weather"]["name"] for result in results] == ["Jeddah", "Riyadh"]
+    assert not any(result["from_cache"] for result in results)
+
+    cached, cached_calls = fetch_from_stub(handler, tmp_path, locations=("Jeddah",))
+    assert cached[0]["from_cache"] and cached[0]["weather"]["main"]["temp"] == 31.5
+    assert cached_calls == []
+
+
+def test_client_error_is_not_retried(tmp_path):
+    async def handler(request):
+        return web.json_response({"message": "Invalid API key"}, status=401)
+
+    results, calls = fetch_from_stub(handler, tmp_path)
+    assert "HTTP 401" in results[0]["error"]
+    assert len(calls) == 1
+
+
+def test_server_error_is_retried(tmp_path):
+    attempts = []
+
+    async def handler(request):
+        attempts.append(request.query["q"])
+        if len(attempts) == 1:
+            return web.Response(status=503)
+        return web.json_response({"name": "Jeddah"})
+
+    results, calls = fetch_from_stub(handler, tmp_path)
+    assert results[0]["weather"] == {"name": "Jeddah"}
+    assert len(calls) == 2
+
+
+def test_malformed_json_fails_only_that_location(tmp_path):
+    async def handler(request):
+        if request.query["q"] == "Broken":
+            return web.Response(text='{"name": "Bro', content_type="application/json")
+        return web.json_response({"name": request.query["q"]})
+
+    results, calls = fetch_from_stub(handler, tmp_path, locations=("Broken", "Jeddah"))
+    assert "Invalid JSON" in results[0]["error"]
+    assert results[1]["weather"] == {"name": "Jeddah"}
+    assert calls.count("Broken") == 1
+
+
+def test_html_body_is_not_retried(tmp_path):
+    async def handler(request):
+        return web.Response(text="<html>Service maintenance</html>", content_type="text/html")
+
+    results, calls = fetch_from_stub(handler, tmp_path)
+    assert "Invalid JSON" in results[0]["error"]
+    assert len(calls) == 1
+
+
+def test_timeout_gives_up_after_retries(tmp_path):
+    async def handler(request):
+        await asyncio.sleep(1)
+        return web.json_response({"name": "Jeddah"})
+
+    results, calls = fetch_from_stub(handler, tmp_path, timeout_s=0.1, retries=1)
+    assert "after 2 attempts" in results[0]["error"]
+    assert len(calls) == 2
@@ -0,0 +1,203 @@
+import datetime
+import os
+import shutil
+import time
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from data_storage import PARQUET_COMPRESSION, _atomic_write
+
+# مخزن سلاسل زمنية (طقس، طلب، ...) يُضاف إليه فقط ولا يُعاد كتابته في كل تشغيل
+# التقسيم: <dataset>/date=YYYY-MM-DD/location=<الفرع>/part-*.parquet
+# الأيام الأقدم من COMPACT_AFTER_DAYS تُدمج في ملف واحد لكل شهر وفرع: <dataset>/month=YYYY-MM/location=<الفرع>/data.parquet
+# والقراءة تُرجع الفترة المطلوبة مخفّضة مسبقاً إلى دقة الرسم البياني (max_points نقطة لكل فرع)
+# كل الأوقات مخزنة بتوقيت UTC (بدون منطقة زمنية)، سواء القراءات أو التوقعات
+
+TIMESERIES_ROOT = "data/timeseries"
+TIME_COLUMN = "timestamp"
+LOCATION_COLUMN = "location"
+# الاحتفاظ بسنتين من البيانات؛ ما هو أقدم يُحذف عند التنظيف
+RETENTION_DAYS = 730
+COMPACT_AFTER_DAYS = 7
+DEFAULT_MAX_POINTS = 500
+
+
+def utc_now():
+    """Current time as a naive UTC datetime, the time base of every stored point."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _dataset_dir(dataset, root):
+    return os.path.join(root, dataset)
+
+
+def _partition_dir(dataset, root, kind, value, location):
+    # quote: أسماء الفروع قد تحتوي مسافات أو "/" ولا يجب أن تكسر مسار المجلد
+    return os.path.join(_dataset_dir(dataset, root), f"{kind}={value}", f"{LOCATION_COLUMN}={quote(str(location), safe='')}")
+
+
+def _list_partitions(dataset, root):
+    """Yield (kind, value, location, directory) for every partition of ``dataset``."""
+    dataset_dir = _dataset_dir(dataset, root)
+    if not os.path.isdir(dataset_dir):
+        return
+    for period in sorted(os.listdir(dataset_dir)):
+        kind, _, value = period.partition("=")
+        if kind not in ("date", "month"):
+            continue
+        period_dir = os.path.join(dataset_dir, period)
+        for location_dir in sorted(os.listdir(period_dir)):
+            location = unquote(location_dir.partition("=")[2])
+            yield kind, value, location, os.path.join(period_dir, location_dir)
+
+
+def _partition_bounds(kind, value):
+    """First day and the day after the last day covered by a partition."""
+    if kind == "date":
+        first = datetime.date.fromisoformat(value)
+        return first, first + datetime.timedelta(days=1)
+    first = datetime.date.fromisoformat(f"{value}-01")
+    return first, (first.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def _parquet_files(directory):
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".parquet")]
+
+
+def _write_parquet(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _atomic_write(lambda tmp: df.to_parquet(tmp, index=False, compression=PARQUET_COMPRESSION), path)
+
+
+def append_points(dataset, df, root=TIMESERIES_ROOT):
+    """Append ``df`` (with ``timestamp`` and ``location`` columns) as new part files.
+
+    Existing files are never rewritten; each call adds one small file per
+    (date, location) it touches. Returns the number of rows appended.
+    """
+    if df.empty:
+        return 0
+    df = df.copy()
+    df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN])
+    part_name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+    for (day, location), group in df.groupby([df[TIME_COLUMN].dt.date, LOCATION_COLUMN], sort=False):
+        path = os.path.join(_partition_dir(dataset, root, "date", day.isoformat(), location), part_name)
+        _write_parquet(group.sort_values(TIME_COLUMN), path)
+    return len(df)
+
+
+def _dedupe(df):
+    # نفس النقطة قد تُكتب أكثر من مرة (مثلاً توقعات محدثة لنفس الساعة)؛ الأحدث إضافةً هو الذي يبقى
+    return df.drop_duplicates([LOCATION_COLUMN, TIME_COLUMN], keep="last").sort_values([LOCATION_COLUMN, TIME_COLUMN])
+
+
+def compact(dataset, root=TIMESERIES_ROOT, compact_after_days=COMPACT_AFTER_DAYS, today=None):
+    """Merge daily partitions older than ``compact_after_days`` into one file per month and location.
+
+    Returns the number of daily partitions that were merged.
+    """
+    today = today or utc_now().date()
+    cutoff = today - datetime.timedelta(days=compact_after_days)
+    pending = {}
+    for kind, value, location, directory in _list_partitions(dataset, root):
+        if kind == "date" and datetime.date.fromisoformat(value) < cutoff:
+            pending.setdefault((value[:7], location), []).append(directory)
+
+    for (month, location), day_dirs in pending.items():
+        month_path = os.path.join(_partition_dir(dataset, root, "month", month, location), "data.parquet")
+        files = [month_path] if os.path.exists(month_path) else []
+        for directory in day_dirs:
+            files.extend(_parquet_files(directory))
+        merged = _dedupe(pd.concat([pd.read_parquet(path) for path in files], ignore_index=True))
+        # نكتب ملف الشهر أولاً ثم نحذف الأيام؛ أي قراءة في المنتصف ترى تكراراً يزيله _dedupe وليس فجوة
+        _write_parquet(merged, month_path)
+        for directory in day_dirs:
+            shutil.rmtree(directory)
+            _remove_if_empty(os.path.dirname(directory))
+    return sum(len(day_dirs) for day_dirs in pending.values())
+
+
+def _remove_if_empty(directory):
+    if os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+
+
+def apply_retention(dataset, root=TIMESERIES_ROOT, retention_days=RETENTION_DAYS, today=None):
+    """Delete points older than ``retention_days``. Returns the number of partitions removed."""
+    today = today or utc_now().date()
+    cutoff = today - datetime.timedelta(days=retention_days)
+    removed = 0
+    for kind, value, location, directory in _list_partitions(dataset, root):
+        first, end = _partition_bounds(kind, value)
+        if end <= cutoff:
+            shutil.rmtree(directory)
+            _remove_if_empty(os.path.dirname(directory))
+            removed += 1
+        elif kind == "month" and first < cutoff:
+            # شهر يقطعه حد الاحتفاظ: نعيد كتابته بدون الأيام القديمة
+            path = os.path.join(directory, "data.parquet")
+            df = pd.read_parquet(path)
+            _write_parquet(df[df[TIME_COLUMN] >= pd.Timestamp(cutoff)], path)
+    return removed
+
+
+def maintain(dataset, root=TIMESERIES_ROOT, retention_days=RETENTION_DAYS, compact_after_days=COMPACT_AFTER_DAYS):
+    """Run retention then compaction; called by the pipelines after appending."""
+    removed = apply_retention(dataset, root, retention_days)
+    merged = compact(dataset, root, compact_after_days)
+    return removed, merged
+
+
+def _bucket_frequency(start, end, max_points):
+    # عرض كل "سلة" زمنية بحيث لا يتجاوز عدد النقاط max_points لكل فرع، مقرّباً لأقرب دقيقة
+    span_seconds = max((end - start).total_seconds(), 1)
+    minutes = max(1, -(-int(span_seconds) // (max_points * 60)))
+    return pd.Timedelta(minutes=minutes)
+
+
+def downsample(df, start, end, max_points):
+    """Average points into time buckets so each location has at most ``max_points`` rows."""
+    if df.empty or df.groupby(LOCATION_COLUMN).size().max() <= max_points:
+        return df.reset_index(drop=True)
+    frequency = _bucket_frequency(start, end, max_points)
+    bucket = df[TIME_COLUMN].dt.floor(frequency)
+    numeric_cols = [col for col in df.select_dtypes("number").columns]
+    other_cols = [col for col in df.columns if col not in numeric_cols and col not in (TIME_COLUMN, LOCATION_COLUMN)]
+    aggregations = {**{col: "mean" for col in numeric_cols}, **{col: "last" for col in other_cols}}
+    grouped = df.groupby([df[LOCATION_COLUMN], bucket.rename(TIME_COLUMN)], sort=True, observed=True).agg(aggregations)
+    return grouped.reset_index()
+
+
+def read_range(dataset, start, end, locations=None, columns=None, max_points=DEFAULT_MAX_POINTS, root=TIMESERIES_ROOT):
+    """Return points of ``dataset`` with ``start <= timestamp < end``, downsampled for plotting.
+
+    Only partitions overlapping the range (and the requested ``locations``) are
+    opened, and only ``columns`` (plus timestamp/location) are read. Pass
+    ``max_points=None`` to get the raw points.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    wanted_locations = None if locations is None else {str(location) for location in locations}
+    files = []
+    for kind, value, location, directory in _list_partitions(dataset, root):
+        first, after_last = _partition_bounds(kind, value)
+        if pd.Timestamp(after_last) <= start or pd.Timestamp(first) >= end:
+            continue
+        if wanted_locations is not None and location not in wanted_locations:
+            continue
+        files.extend(_parquet_files(directory))
+    if not files:
+        return pd.DataFrame(columns=[TIME_COLUMN, LOCATION_COLUMN] + list(columns or []))
+
+    if columns is not None:
+        schema_names = set(pq.read_schema(files[0]).names)
+        columns = [TIME_COLUMN, LOCATION_COLUMN] + [col for col in columns if col in schema_names and col not in (TIME_COLUMN, LOCATION_COLUMN)]
+    # قراءة كل الملفات دفعة واحدة (متوازية داخل pyarrow) مع تصفية الفترة قبل التحويل إلى pandas
+    time_field = ds.field(TIME_COLUMN)
+    table = ds.dataset(files, format="parquet").to_table(
+        columns=columns, filter=(time_field >= start.to_datetime64()) & (time_field < end.to_datetime64()),
+    )
+    df = _dedupe(table.to_pandas())
+    if max_points is None:
+        return df.reset_index(drop=True)
+    return downsample(df, start, end, max_points)
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import aiohttp
+
+# جلب بيانات الطقس (الحالية والتوقعات) لعدة مدن في نفس الوقت من OpenWeatherMap
+# جلسة HTTP واحدة مشتركة، حد أقصى للطلبات المتزامنة، مهلة لكل طلب، إعادة محاولة بتأخير متزايد،
+# وذاكرة مؤقتة على القرص (TTL) حتى لا تعيد التشغيلات المتقاربة طلب نفس البيانات
+
+OPENWEATHER_BASE_URL = os.environ.get("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5")
+WEATHER_CACHE_DIR = "data/cache/weather"
+WEATHER_CACHE_TTL_SECONDS = 30 * 60
+MAX_CONCURRENT_REQUESTS = 8
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+# حالات HTTP التي تستحق إعادة المحاولة (تجاوز الحد أو أخطاء الخادم)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class WeatherFetchError(Exception):
+    pass
+
+
+def _cache_path(cache_dir, endpoint, location, units):
+    key = hashlib.sha256(f"{endpoint}|{location}|{units}".encode('utf-8')).hexdigest()[:24]
+    return os.path.join(cache_dir, f"{endpoint}-{key}.json")
+
+
+def read_cached_response(cache_dir, endpoint, location, units, ttl_seconds):
+    """Return a cached API payload younger than ``ttl_seconds``, or None."""
+    path = _cache_path(cache_dir, endpoint, location, units)
+    try:
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if time.time() - entry.get("fetched_at", 0) > ttl_seconds:
+        return None
+    return entry["payload"]
+
+
+def write_cached_response(cache_dir, endpoint, location, units, payload):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, endpoint, location, units)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"fetched_at": time.time(), "location": location, "payload": payload}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+async def _get_json(session, semaphore, url, params, timeout_s, retries, backoff_s):
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout_s)) as response:
+                    if response.status in RETRYABLE_STATUSES:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status, message=response.reason,
+                        )
+                    if response.status >= 400:
+                        # أخطاء العميل (مفتاح خاطئ، مدينة غير موجودة) لا تتحسن بإعادة المحاولة
+                        raise WeatherFetchError(f"HTTP {response.status} from {url} for {params.get('q')}")
+                    try:
+                        return await response.json()
+                    except (aiohttp.ContentTypeError, ValueError) as e:
+                        # جسم الرد ليس JSON صالحاً (صفحة HTML مثلاً): خطأ لهذه المدينة فقط، بدون إعادة محاولة
+                        raise WeatherFetchError(f"Invalid JSON from {url} for {params.get('q')}: {e}") from e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_error = e
+            if attempt < retries:
+                # تأخير أسي مع عشوائية بسيطة حتى لا تعيد كل الطلبات المحاولة في نفس اللحظة
+                await asyncio.sleep(backoff_s * (2 ** attempt) * (1 + random.random() / 2))
+    raise WeatherFetchError(f"Giving up on {url} for {params.get('q')} after {retries + 1} attempts: {last_error!r}")
+
+
+async def _fetch_endpoint(session, semaphore, endpoint, location, api_key, options):
+    cached = read_cached_response(options["cache_dir"], endpoint, location, options["units"], options["ttl_seconds"])
+    if cached is not None:
+        return cached, True
+    params = {"q": location, "appid": api_key, "units": options["units"]}
+    payload = await _get_json(
+        session, semaphore, f"{options['base_url']}/{endpoint}", params,
+        options["timeout_s"], options["retries"], options["backoff_s"],
+    )
+    write_cached_response(options["cache_dir"], endpoint, location, options["units"], payload)
+    return payload, False
+
+
+async def _fetch_location(session, semaphore, location, api_key, endpoints, options):
+    result = {"location": location, "from_cache": True}
+    try:
+        payloads = await asyncio.gather(
+            *(_fetch_endpoint(session, semaphore, endpoint, location, api_key, options) for endpoint in endpoints)
+        )
+    except WeatherFetchError as e:
+        return {"location": location, "error": str(e)}
+    for endpoint, (payload, from_cache) in zip(endpoints, payloads):
+        result[endpoint] = payload
+        result["from_cache"] = result["from_cache"] and from_cache
+    return result
+
+
+async def fetch_weather_async(locations, api_key, endpoints=("weather", "forecast"), base_url=OPENWEATHER_BASE_URL,
+                              max_concurrency=MAX_CONCURRENT_REQUESTS, timeout_s=REQUEST_TIMEOUT_SECONDS,
+                              retries=MAX_RETRIES, backoff_s=BACKOFF_BASE_SECONDS, cache_dir=WEATHER_CACHE_DIR,
+                              ttl_seconds=WEATHER_CACHE_TTL_SECONDS, units="metric"):
+    """Fetch ``endpoints`` for every location concurrently.
+
+    Returns one dict per location, in input order: ``{"location", "weather", "forecast",
+    "from_cache"}`` on success or ``{"location", "error"}`` when a request failed.
+    """
+    options = {
+        "base_url": base_url.rstrip("/"), "timeout_s": timeout_s, "retries": retries, "backoff_s": backoff_s,
+        "cache_dir": cache_dir, "ttl_seconds": ttl_seconds, "units": units,
+    }
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(
+            *(_fetch_location(session, semaphore, location, api_key, endpoints, options) for location in locations)
+        )
+
+
+def fetch_weather(locations, api_key, **kwargs):
+    """Blocking wrapper around :func:`fetch_weather_async` for the pipeline scripts."""
+    return asyncio.run(fetch_weather_async(locations, api_key, **kwargs))